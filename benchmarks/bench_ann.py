@@ -0,0 +1,73 @@
+"""Recall-vs-latency benchmark: IVFIndex against the exact GalleryMatcher scan.
+
+Face galleries are clustered (several poses per identity), so the synthetic
+gallery draws each identity's poses around its own random centre.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_ann.py --identities 25000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from human_face.ann_index import IVFIndex
+from human_face.gallery import GalleryMatcher, l2_normalize
+
+
+def make_clustered_gallery(identities, poses, dim, noise, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = l2_normalize(rng.standard_normal((identities, dim)))
+    encodings = np.repeat(centres, poses, axis=0) + noise * rng.standard_normal((identities * poses, dim))
+    names = [f"person_{i}" for i in range(identities) for _ in range(poses)]
+    return centres, encodings.astype(np.float32), names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--identities", type=int, default=25_000)
+    parser.add_argument("--poses", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--noise", type=float, default=0.04, help="per-dimension pose noise")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    centres, encodings, names = make_clustered_gallery(args.identities, args.poses, args.dim, args.noise)
+    matcher = GalleryMatcher(encodings, names)
+    print(f"Gallery: {len(matcher)} embeddings, {matcher.num_identities} identities, dim {args.dim}")
+
+    rng = np.random.default_rng(1)
+    picks = rng.choice(args.identities, args.queries, replace=True)
+    queries = centres[picks] + args.noise * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    # Time single-query lookups, as the pipeline issues them per frame.
+    start = time.perf_counter()
+    for query in queries:
+        matcher.search(query, k=1)
+    exact_ms = (time.perf_counter() - start) / args.queries * 1e3
+    exact_names, _ = matcher.search(queries, k=1)
+    exact_top1 = [row[0] for row in exact_names]
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matcher.matrix, nlist=args.nlist)
+    print(f"Built IVF index with {index.nlist} lists in {time.perf_counter() - start:.1f}s")
+    matcher.attach_index(index)
+
+    print(f"{'nprobe':>6} | {'recall@1':>8} | {'ms/query':>9} | {'speedup':>8}")
+    print(f"{'exact':>6} | {1.0:>8.3f} | {exact_ms:>9.3f} | {1.0:>7.1f}x")
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        matcher.search(queries[:5], k=1)  # warm-up
+        start = time.perf_counter()
+        for query in queries:
+            matcher.search(query, k=1)
+        approx_ms = (time.perf_counter() - start) / args.queries * 1e3
+        approx_names, _ = matcher.search(queries, k=1)
+        recall = np.mean([a[0] == e if a else False for a, e in zip(approx_names, exact_top1)])
+        print(f"{nprobe:>6} | {recall:>8.3f} | {approx_ms:>9.3f} | {exact_ms / approx_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
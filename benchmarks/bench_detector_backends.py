@@ -0,0 +1,77 @@
+"""Detector backend benchmark: PyTorch vs. ONNX Runtime vs. OpenVINO on CPU.
+
+Times single-frame predict() on a folder of sample images and, when a dataset
+YAML is given, runs ultralytics val() for mAP50 / mAP50-95 on each backend.
+Missing exports are created on the fly. INT8 backends need a model built by
+human_face.quantization first; ask for them with --backends, and any without
+one are skipped.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_detector_backends.py --images samples/ --data data.yaml
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from human_face.detector_backends import (DEFAULT_WEIGHTS, DETECTOR_BACKENDS, INT8_BACKENDS, export_path,
+                                         load_detector, run_weights)
+
+
+def load_images(folder, limit):
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(folder, f"*.{ext}")))
+    images = [cv2.imread(p) for p in paths[:limit]]
+    return [img for img in images if img is not None]
+
+
+def time_predict(model, images, warmup, imgsz):
+    for img in images[:warmup]:
+        model.predict(img, imgsz=imgsz, verbose=False, device="cpu")
+    times = []
+    for img in images:
+        start = time.perf_counter()
+        model.predict(img, imgsz=imgsz, verbose=False, device="cpu")
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weights", default=None, help=f"PyTorch weights (default: {DEFAULT_WEIGHTS})")
+    parser.add_argument("--run", default=None, help="take weights from Training/runs/<run>/train/weights/best.pt")
+    parser.add_argument("--images", required=True, help="folder of sample frames for latency")
+    parser.add_argument("--data", default=None, help="dataset YAML for mAP (skipped when omitted)")
+    parser.add_argument("--backends", nargs="+", choices=DETECTOR_BACKENDS,
+                        default=[b for b in DETECTOR_BACKENDS if b not in INT8_BACKENDS])
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+
+    weights = run_weights(args.run) if args.run else (args.weights or DEFAULT_WEIGHTS)
+    images = load_images(args.images, args.limit)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+    print(f"{len(images)} images from {args.images}, weights {weights}, imgsz {args.imgsz}")
+
+    print(f"{'backend':>10} {'p50 ms':>8} {'p95 ms':>8} {'fps':>7} {'mAP50':>7} {'mAP50-95':>9}")
+    for backend in args.backends:
+        if backend in INT8_BACKENDS and not os.path.exists(export_path(weights, backend)):
+            print(f"{backend:>10} skipped: no INT8 model yet; build it with "
+                  f"`python -m human_face.quantization detector --backend {backend} --data <dataset.yaml>`")
+            continue
+        model = load_detector(backend, weights, imgsz=args.imgsz)
+        ms = time_predict(model, images, args.warmup, args.imgsz)
+        map50 = map5095 = float("nan")
+        if args.data:
+            metrics = model.val(data=args.data, imgsz=args.imgsz, batch=1, device="cpu", verbose=False, plots=False)
+            map50, map5095 = metrics.box.map50, metrics.box.map
+        print(f"{backend:>10} {np.percentile(ms, 50):8.1f} {np.percentile(ms, 95):8.1f} "
+              f"{1e3 / ms.mean():7.1f} {map50:7.3f} {map5095:9.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
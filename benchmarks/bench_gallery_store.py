@@ -0,0 +1,78 @@
+"""Startup benchmark: legacy face_data/ folders vs. the packed, memory-mapped gallery.
+
+Builds a synthetic legacy gallery in a temporary directory, migrates it, then
+times how long each layout takes to become a ready GalleryMatcher.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_gallery_store.py --people 50000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from human_face.gallery import GalleryMatcher
+from human_face.gallery_store import PackedGalleryStore, iter_legacy_gallery, migrate_legacy_gallery
+
+
+def write_legacy_gallery(root, people, poses, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    for p in range(people):
+        folder = os.path.join(root, f"person_{p:06d}")
+        os.makedirs(folder)
+        for i, enc in enumerate(rng.standard_normal((poses, dim)).astype(np.float32)):
+            np.save(os.path.join(folder, f"encoding_{i}.npy"), enc)
+
+
+def load_legacy(root):
+    encodings, names = [], []
+    for name, embeddings in iter_legacy_gallery(root):
+        encodings.extend(embeddings)
+        names.extend([name] * len(embeddings))
+    return GalleryMatcher(encodings, names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, default=5_000)
+    parser.add_argument("--poses", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--workdir", default=None, help="directory for the synthetic galleries (default: temp)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="gallery_bench_")
+    legacy_dir = os.path.join(workdir, "face_data")
+    packed_dir = os.path.join(workdir, "face_gallery")
+    try:
+        print(f"Writing {args.people} people x {args.poses} poses to {legacy_dir} ...")
+        write_legacy_gallery(legacy_dir, args.people, args.poses, args.dim)
+
+        start = time.perf_counter()
+        migrate_legacy_gallery(legacy_dir, packed_dir)
+        print(f"Migration:        {time.perf_counter() - start:8.3f} s")
+
+        start = time.perf_counter()
+        legacy = load_legacy(legacy_dir)
+        t_legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        packed = PackedGalleryStore(packed_dir).open().matcher()
+        t_packed = time.perf_counter() - start
+
+        query = np.random.default_rng(1).standard_normal((1, args.dim))
+        assert legacy.search(query)[0] == packed.search(query)[0]
+
+        print(f"Legacy startup:   {t_legacy * 1e3:8.1f} ms ({len(legacy)} embeddings)")
+        print(f"Packed startup:   {t_packed * 1e3:8.1f} ms ({len(packed)} embeddings, memmap={isinstance(packed.matrix, np.memmap)})")
+        print(f"Speedup:          {t_legacy / t_packed:8.1f}x")
+        print("Note: the legacy number includes a warm page cache; cold starts widen the gap.")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Import-time benchmark: cold-import cost of each UI page and pipeline module.
+
+Every module is imported in a fresh interpreter (--runs times, median kept),
+so the number is what a cold Streamlit process or service start pays for it.
+Alongside the time, each result lists which heavy dependencies (torch,
+ultralytics, insightface, onnxruntime, pygame, djitellopy, ...) the import
+dragged in; these should only load on first use, so a module that suddenly
+pulls one in is reported even when the timing noise hides it.
+
+Results go to --out as JSON. --baseline compares against an earlier results
+file and exits with status 1 when a module's import got slower by more than
+--tolerance or loads a heavy dependency it did not load before;
+--save-baseline writes this run as the new one.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_import_time.py --runs 5 \\
+        --out bench_import_time.json --baseline benchmarks/baselines/import_time.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from human_face.perf_utils import check_baseline, regressed, run_info, write_results
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = {
+    "login": "ui.views.login",
+    "navigation": "ui.views.dashboard.navigation",
+    "dashboard": "ui.views.dashboard.dashboard",
+    "video_feed": "ui.views.dashboard.video_feed",
+    "drone": "ui.views.dashboard.drone_dahsboard",
+    "face_registration": "ui.views.dashboard.face_registration",
+}
+PIPELINE = [
+    "human_face.securevision",
+    "human_face.multi_camera",
+    "human_face.process_pipeline",
+    "human_face.batch_video",
+    "human_face.service",
+    "human_face.model_registry",
+    "human_face.startup",
+]
+HEAVY = ("torch", "ultralytics", "insightface", "onnxruntime", "openvino", "pygame", "djitellopy")
+# Differences below this are interpreter noise, whatever the ratio
+MIN_REGRESSION_MS = 20.0
+
+# Runs in the child interpreter: time one import, report it and the heavy modules now loaded
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+    error = None
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+ms = (time.perf_counter() - start) * 1000
+heavy = sorted(m for m in sys.argv[2].split(",") if m in sys.modules)
+print(json.dumps({"ms": ms, "heavy": heavy, "error": error}))
+"""
+
+
+def import_once(module):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (REPO_ROOT, os.environ.get("PYTHONPATH")))))
+    proc = subprocess.run([sys.executable, "-c", PROBE, module, ",".join(HEAVY)], cwd=REPO_ROOT, env=env,
+                          capture_output=True, text=True)
+    # Streamlit and friends may print warnings first; the probe's JSON is the last line
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"ms": None, "heavy": [], "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+
+def measure(module, runs):
+    samples = [import_once(module) for _ in range(runs)]
+    errors = [s["error"] for s in samples if s["error"]]
+    times = [s["ms"] for s in samples if s["ms"] is not None and not s["error"]]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(times), 1) if times else None,
+        "min_ms": round(min(times), 1) if times else None,
+        "heavy": sorted({m for s in samples for m in s["heavy"]}),
+        "error": errors[0] if errors else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing each regression of `results` against `baseline`; empty when none."""
+    regressions = []
+    for name, current in results["modules"].items():
+        base = baseline.get("modules", {}).get(name)
+        if base is None:
+            continue
+        new_heavy = sorted(set(current["heavy"]) - set(base["heavy"]))
+        if new_heavy:
+            regressions.append(f"{name}: now imports {', '.join(new_heavy)}")
+        before, after = base["median_ms"], current["median_ms"]
+        if before is None or after is None:
+            continue
+        if regressed(before, after, tolerance, MIN_REGRESSION_MS):
+            regressions.append(f"{name}: import {before:.0f} -> {after:.0f} ms")
+    return regressions
+
+
+def print_report(results):
+    print(f"{'module':>34} {'median ms':>10} {'min ms':>8}  heavy dependencies")
+    for name, r in results["modules"].items():
+        if r["median_ms"] is None:
+            print(f"{name:>34} {'-':>10} {'-':>8}  failed: {r['error']}")
+            continue
+        note = f"  (last run failed: {r['error']})" if r["error"] else ""
+        print(f"{name:>34} {r['median_ms']:10.1f} {r['min_ms']:8.1f}  {', '.join(r['heavy']) or '-'}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--module", action="append", default=[],
+                        help="module to measure instead of the defaults (repeatable)")
+    parser.add_argument("--out", default="bench_import_time.json", help="where to write this run's results")
+    parser.add_argument("--baseline", default=None, help="earlier results to compare against")
+    parser.add_argument("--save-baseline", default=None, help="also write this run here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging, as a fraction")
+    args = parser.parse_args()
+
+    targets = {m: m for m in args.module} or {**{f"page:{k}": v for k, v in PAGES.items()},
+                                               **{m: m for m in PIPELINE}}
+    results = run_info(runs=args.runs, modules={})
+    for name, module in targets.items():
+        print(f"importing {module} ...", flush=True)
+        results["modules"][name] = measure(module, args.runs)
+
+    print_report(results)
+    write_results(results, args.out, args.save_baseline)
+    if args.baseline:
+        check_baseline(results, args.baseline, args.tolerance, compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Microbenchmark: sklearn cosine_similarity per box vs. GalleryMatcher batch lookup.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_matcher.py
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from human_face.gallery import GalleryMatcher
+
+
+def make_gallery(size, dim, poses_per_person=5, seed=0):
+    rng = np.random.default_rng(seed)
+    encodings = rng.standard_normal((size, dim)).astype(np.float32)
+    names = [f"person_{i // poses_per_person}" for i in range(size)]
+    return encodings, names
+
+
+def time_call(fn, repeats):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def sklearn_per_box(queries, encodings, names, threshold):
+    # Mirrors the old recognize_face: one cosine_similarity call per person box.
+    results = []
+    for query in queries:
+        sims = cosine_similarity(query.reshape(1, -1), encodings)[0]
+        best_idx = np.argmax(sims)
+        results.append(names[best_idx] if sims[best_idx] > threshold else "Unknown")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=8, help="query embeddings per frame (people in view)")
+    parser.add_argument("--threshold", type=float, default=0.35)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'gallery':>9} | {'sklearn/frame':>14} | {'matcher/frame':>14} | {'speedup':>8}")
+    print("-" * 56)
+    for size in args.sizes:
+        encodings, names = make_gallery(size, args.dim)
+        queries = rng.standard_normal((args.batch, args.dim)).astype(np.float32)
+        matcher = GalleryMatcher(encodings, names)
+        repeats = max(3, min(200, 2_000_000 // size))
+
+        t_sklearn = time_call(lambda: sklearn_per_box(queries, encodings, names, args.threshold), repeats)
+        t_matcher = time_call(lambda: matcher.match(queries, args.threshold), repeats)
+        print(f"{size:>9} | {t_sklearn * 1e3:>11.3f} ms | {t_matcher * 1e3:>11.3f} ms | {t_sklearn / t_matcher:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Motion gate benchmark: how many YOLO passes a static scene saves, and what the gate costs.
+
+Runs MotionGate over a recorded clip (or a synthetic empty corridor with a
+person walking through part of the time) and reports the gate's own cost per
+frame, the share of frames it lets skip detection and, with --detector, the
+YOLO time that saves.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_motion_gate.py --video night_corridor.mp4 --detector onnx
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from human_face.motion_gate import MotionGate
+
+
+def synthetic_frames(n, h=720, w=1280, active=0.1, seed=0):
+    """Static noisy background; a dark block crosses the scene during the first `active` share of frames."""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 200, (h, w, 3), dtype=np.uint8)
+    walk = int(n * active)
+    for i in range(n):
+        frame = background + rng.integers(0, 4, background.shape, dtype=np.uint8)
+        if i < walk:
+            x = int(i / max(1, walk) * (w - 150))
+            frame[h // 3:h // 3 + 350, x:x + 150] = 20
+        yield frame
+
+
+def video_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while count < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        count += 1
+        yield frame
+    cap.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default=None, help="recorded clip (default: synthetic corridor)")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--detector", default=None, help="detector backend to time for the savings estimate")
+    args = parser.parse_args()
+
+    frames = video_frames(args.video, args.frames) if args.video else synthetic_frames(args.frames)
+    gate = MotionGate()
+    gate_time = 0.0
+    sample = None
+    for frame in frames:
+        sample = frame if sample is None else sample
+        start = time.perf_counter()
+        gate.should_detect(frame)
+        gate_time += time.perf_counter() - start
+    stats = gate.stats()
+    gate_ms = gate_time * 1e3 / max(1, stats["frames"])
+    print(f"frames {stats['frames']}, skipped {stats['skipped']} ({stats['skip_ratio']:.1%}), gate {gate_ms:.2f} ms/frame")
+
+    if args.detector and sample is not None:
+        from human_face.detector_backends import load_detector
+
+        model = load_detector(args.detector)
+        for _ in range(5):
+            model.predict(sample, verbose=False, device="cpu")
+        start = time.perf_counter()
+        for _ in range(20):
+            model.predict(sample, verbose=False, device="cpu")
+        yolo_ms = (time.perf_counter() - start) * 1e3 / 20
+        before = yolo_ms
+        after = gate_ms + (1 - stats["skip_ratio"]) * yolo_ms
+        print(f"YOLO {yolo_ms:.1f} ms/frame: detection cost {before:.1f} -> {after:.1f} ms/frame "
+              f"({1 - after / before:.0%} saved)")
+
+
+if __name__ == "__main__":
+    main()
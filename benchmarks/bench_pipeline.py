@@ -0,0 +1,317 @@
+"""Pipeline benchmark: per-stage latency, throughput, CPU and memory of MultiPersonFaceRecognitionApp.
+
+Drives the app headless, one frame at a time, through the same calls as
+processing_worker, and times each stage per frame:
+
+  capture  read + fit_within (recorded clips) or frame synthesis (synthetic)
+  detect   detect_persons / YOLO + ByteTrack
+  faces    face detection + embedding (get_box_embeddings)
+  match    gallery lookup (score_embeddings)
+  track    the rest of analyze_frame: scheduling, track state, events
+  draw     the annotated copy: FPS, ROI, boxes and labels (draw_overlay)
+  display  scaling to the display size + JPEG encode, as the UI push does
+  total    all of the above
+
+Workloads are recorded clips (--video, real detections) and synthetic
+scenes (--synthetic PERSONS:FACES). Synthetic scenes paste enrolled face
+crops from face_data/ onto the first FACES of PERSONS walking figures and
+feed those scripted tracks to analyze_frame, so person and face counts are
+exact; YOLO still runs on every frame so detect is timed at full cost.
+
+Results go to --out as JSON. --baseline compares against an earlier results
+file and exits with status 1 when a stage's p95 or the throughput regresses
+by more than --tolerance; --save-baseline writes this run as the new one.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_pipeline.py --synthetic 1:1 4:2 8:8 --video clip.mp4 \\
+        --out bench_pipeline.json --baseline benchmarks/baselines/pipeline.json
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from human_face.perf_utils import check_baseline, process_rss_mb, regressed, run_info, write_results
+from human_face.preprocess import MAX_FRAME_SIZE, fit_within
+
+STAGES = ("capture", "detect", "faces", "match", "track", "draw", "display", "total")
+PERCENTILES = (50, 95, 99)
+# Stage differences below this many milliseconds are noise, not regressions
+MIN_REGRESSION_MS = 0.5
+
+
+def load_faces(face_dir, limit=16):
+    paths = sorted(glob.glob(os.path.join(face_dir, "*", "face_*.jpg")))[:limit]
+    faces = [cv2.imread(p) for p in paths]
+    return [f for f in faces if f is not None]
+
+
+class SyntheticScene:
+    """`persons` figures walking across a static background, the first `faces` of them wearing an enrolled face.
+
+    `frame(i)` returns the frame and the scripted `(boxes, ids, confs)` a
+    tracker would report for it.
+    """
+
+    def __init__(self, persons, faces, face_crops, width=1280, height=720, seed=0):
+        if faces and not face_crops:
+            raise ValueError("synthetic faces need face crops (face_data/<name>/face_*.jpg)")
+        rng = np.random.default_rng(seed)
+        self.width, self.height = width, height
+        self.background = rng.integers(60, 180, (height, width, 3), dtype=np.uint8)
+        self.figures = []
+        for idx in range(persons):
+            bh = int(rng.uniform(0.45, 0.7) * height)
+            bw = int(bh * 0.4)
+            self.figures.append({
+                "id": idx + 1,
+                "size": (bw, bh),
+                "y": int(rng.uniform(0, height - bh)),
+                "x0": rng.uniform(0, width - bw),
+                "speed": rng.uniform(2, 6) * rng.choice([-1, 1]),
+                "face": face_crops[idx % len(face_crops)] if idx < faces else None,
+                "color": tuple(int(c) for c in rng.integers(0, 255, 3)),
+            })
+
+    def frame(self, i):
+        frame = self.background.copy()
+        boxes, ids = [], []
+        for fig in self.figures:
+            bw, bh = fig["size"]
+            span = self.width - bw
+            # Bounce between the frame edges
+            x = int(abs((fig["x0"] + fig["speed"] * i) % (2 * span) - span)) if span > 0 else 0
+            y = fig["y"]
+            cv2.rectangle(frame, (x, y + bh // 4), (x + bw, y + bh), fig["color"], -1)
+            head = int(bw * 0.8)
+            hx = x + (bw - head) // 2
+            if fig["face"] is not None:
+                frame[y:y + head, hx:hx + head] = cv2.resize(fig["face"], (head, head), interpolation=cv2.INTER_AREA)
+            else:
+                cv2.ellipse(frame, (hx + head // 2, y + head // 2), (head // 3, head // 2), 0, 0, 360, (90, 90, 90), -1)
+            boxes.append((x, y, x + bw, y + bh))
+            ids.append(fig["id"])
+        return frame, (np.array(boxes, dtype=int).reshape(-1, 4), ids, np.full(len(ids), 0.9))
+
+
+def synthetic_workload(persons, faces, face_crops, frames):
+    scene = SyntheticScene(persons, faces, face_crops)
+    for i in range(frames):
+        start = time.perf_counter()
+        frame, tracks = scene.frame(i)
+        yield frame, tracks, time.perf_counter() - start
+
+
+def video_workload(path, frames, max_frame_size=MAX_FRAME_SIZE):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Cannot open video {path}")
+    try:
+        for _ in range(frames):
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+                if not ret:
+                    return
+            frame, _ = fit_within(frame, max_frame_size)
+            yield frame, None, time.perf_counter() - start
+    finally:
+        cap.release()
+
+
+def timed(method, sink):
+    """Wrap a bound method so each call adds its duration to `sink[0]`."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            sink[0] += time.perf_counter() - start
+    return wrapper
+
+
+def run_scenario(app, workload, warmup):
+    """Push every frame of `workload` through `app`; returns per-stage times (ms) and resource use."""
+    faces_time, match_time, draw_time = [0.0], [0.0], [0.0]
+    # Instance attributes shadow the methods analyze_frame calls, so it times them for us
+    app.get_box_embeddings = timed(app.get_box_embeddings, faces_time)
+    app.score_embeddings = timed(app.score_embeddings, match_time)
+    app.draw_overlay = timed(app.draw_overlay, draw_time)
+    samples = {stage: [] for stage in STAGES}
+    counts = {"frames": 0, "persons": 0, "recognized": 0}
+    wall = cpu = 0.0
+    memory = [process_rss_mb()]
+    try:
+        for index, (frame, scripted, capture_s) in enumerate(workload):
+            measure = index >= warmup
+            if measure and counts["frames"] == 0:
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+            faces_time[0] = match_time[0] = draw_time[0] = 0.0
+
+            start = time.perf_counter()
+            if scripted is None:
+                boxes, ids, confs = app.detect_persons(frame)
+            else:
+                app.track_persons(frame)
+                boxes, ids, confs = scripted
+            detect_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            display = app.analyze_frame(frame, boxes, ids, confs)
+            analyze_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            shown, _ = fit_within(display, app.display_size)
+            cv2.imencode(".jpg", shown)
+            display_s = time.perf_counter() - start
+
+            while not app.detection_queue.empty():
+                app.detection_queue.get_nowait()
+            if not measure:
+                continue
+            stages = {
+                "capture": capture_s,
+                "detect": detect_s,
+                "faces": faces_time[0],
+                "match": match_time[0],
+                "track": max(0.0, analyze_s - faces_time[0] - match_time[0] - draw_time[0]),
+                "draw": draw_time[0],
+                "display": display_s,
+            }
+            stages["total"] = sum(stages.values())
+            for stage, seconds in stages.items():
+                samples[stage].append(seconds * 1e3)
+            counts["frames"] += 1
+            counts["persons"] += len(ids)
+            counts["recognized"] += sum(
+                1 for t in ids if (s := app.track_store.get(t, app.frame_idx - 1)) is not None and s.name != "Unknown"
+            )
+            if counts["frames"] % 50 == 0:
+                memory.append(process_rss_mb())
+        if counts["frames"]:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+    finally:
+        del app.get_box_embeddings, app.score_embeddings, app.draw_overlay
+
+    frames = counts["frames"]
+    memory = [m for m in memory + [process_rss_mb()] if m is not None]
+    return {
+        "frames": frames,
+        "fps": round(frames / wall, 2) if wall else 0.0,
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+        "memory_mb": round(memory[-1], 1) if memory else None,
+        "peak_memory_mb": round(max(memory), 1) if memory else None,
+        "persons_per_frame": round(counts["persons"] / frames, 2) if frames else 0.0,
+        "recognized_per_frame": round(counts["recognized"] / frames, 2) if frames else 0.0,
+        "stages": {
+            stage: {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+            | {"mean": round(float(np.mean(values)), 3)}
+            for stage, values in samples.items() if values
+        },
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing each regression of `results` against `baseline`; empty when none."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if base["fps"] and current["fps"] < base["fps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['fps']} -> {current['fps']} fps")
+        for stage, stats in current["stages"].items():
+            before = base["stages"].get(stage, {}).get("p95")
+            after = stats["p95"]
+            if before is None:
+                continue
+            if regressed(before, after, tolerance, MIN_REGRESSION_MS):
+                regressions.append(f"{name}: {stage} p95 {before:.2f} -> {after:.2f} ms")
+    return regressions
+
+
+def print_report(results):
+    header = f"{'scenario':>20} {'stage':>8} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES)
+    for name, scenario in results["scenarios"].items():
+        print(f"\n{name}: {scenario['frames']} frames, {scenario['fps']} fps, CPU {scenario['cpu_percent']}%, "
+              f"RSS {scenario['memory_mb']} MB, {scenario['persons_per_frame']} persons/frame, "
+              f"{scenario['recognized_per_frame']} recognized/frame")
+        print(header)
+        for stage, stats in scenario["stages"].items():
+            print(f"{name:>20} {stage:>8} " + " ".join(f"{stats['p' + str(p)]:8.2f}" for p in PERCENTILES))
+
+
+def parse_mix(text):
+    try:
+        persons, faces = (int(v) for v in text.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PERSONS:FACES, got {text!r}") from None
+    if faces > persons or persons < 0 or faces < 0:
+        raise argparse.ArgumentTypeError(f"FACES must be between 0 and PERSONS, got {text!r}")
+    return persons, faces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", type=parse_mix, nargs="*", default=[(1, 1), (4, 2), (8, 8)],
+                        metavar="PERSONS:FACES", help="synthetic scenes to run")
+    parser.add_argument("--video", action="append", default=[], help="recorded clip to run (repeatable)")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured frames before each scenario")
+    parser.add_argument("--face-pass", choices=["per_box", "full_frame"], default="per_box")
+    parser.add_argument("--recognition-budget", type=int, default=4)
+    parser.add_argument("--detector-backend", default=None)
+    parser.add_argument("--face-dir", default="face_data", help="enrolled face crops for synthetic scenes")
+    parser.add_argument("--out", default="bench_pipeline.json", help="where to write this run's results")
+    parser.add_argument("--baseline", default=None, help="earlier results to compare against")
+    parser.add_argument("--save-baseline", default=None, help="also write this run here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before flagging, as a fraction")
+    args = parser.parse_args()
+
+    from human_face.securevision import MultiPersonFaceRecognitionApp
+
+    face_crops = load_faces(args.face_dir)
+    workloads = [(f"synthetic-{p}p{f}f", lambda p=p, f=f: synthetic_workload(p, f, face_crops, args.frames + args.warmup))
+                 for p, f in args.synthetic]
+    workloads += [(os.path.splitext(os.path.basename(v))[0], lambda v=v: video_workload(v, args.frames + args.warmup))
+                  for v in args.video]
+    if not workloads:
+        parser.error("nothing to run: give --synthetic and/or --video")
+
+    results = run_info(
+        cpu_count=os.cpu_count(),
+        config={k: getattr(args, k) for k in ("frames", "warmup", "face_pass", "recognition_budget",
+                                               "detector_backend")},
+        scenarios={},
+    )
+    shared, owner = {}, None
+    for name, workload in workloads:
+        # Fresh app per scenario so ByteTrack and track state start empty; the models and gallery are
+        # loaded once, by the first app, and shared with the rest
+        app = MultiPersonFaceRecognitionApp(stream_url=None, face_pass=args.face_pass,
+                                            recognition_budget=args.recognition_budget, frame_buffer="queue",
+                                            detector_backend=args.detector_backend, **shared)
+        app.sound_alerts = False
+        if owner is None:
+            owner = app
+            shared = {"model": app.model, "model_lock": app.model_lock, "face_app": app.face_app,
+                      "gallery": app.gallery}
+        print(f"running {name} ...", flush=True)
+        results["scenarios"][name] = run_scenario(app, workload(), args.warmup)
+    # The first app runs the shared gallery's poller; stop it once every scenario is done
+    owner.stop_event.set()
+
+    print_report(results)
+    write_results(results, args.out, args.save_baseline)
+    if args.baseline:
+        check_baseline(results, args.baseline, args.tolerance, compare)
+
+
+if __name__ == "__main__":
+    main()
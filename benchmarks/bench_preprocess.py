@@ -0,0 +1,121 @@
+"""Preprocessing benchmark: resize/copy overhead per frame, old squash path vs. single-resize path.
+
+Replays the image operations each path performs on one frame with N person
+boxes, without running the networks:
+
+  old: grabber squashes to 640x640, every person crop is squashed to 640x640
+       and SCRFD resizes that again, display copy is squashed to 640x640
+  new: frame stays native (YOLO letterboxes once), SCRFD resizes each crop
+       once into a detector input sized to the crop, display copy as-is
+
+With --face-models, also times MultiPersonFaceRecognitionApp.get_face_embedding
+both ways on real crops (needs face_models/ and a frame with people in it).
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_preprocess.py --width 1920 --height 1080 --boxes 6
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from human_face.preprocess import det_input_size, fit_within, letterbox
+
+
+def scrfd_input(image, size):
+    """What SCRFD.detect does to its input: aspect-preserving resize, pad, blob."""
+    h, w = image.shape[:2]
+    scale = min(size[1] / h, size[0] / w)
+    nh, nw = int(h * scale), int(w * scale)
+    canvas = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    canvas[:nh, :nw] = cv2.resize(image, (nw, nh))
+    return cv2.dnn.blobFromImage(canvas, 1.0 / 128, size, (127.5, 127.5, 127.5), swapRB=True)
+
+
+def person_boxes(h, w, n, rng):
+    boxes = []
+    for _ in range(n):
+        bh = int(rng.uniform(0.25, 0.6) * h)
+        bw = int(bh * rng.uniform(0.35, 0.5))
+        x1, y1 = int(rng.uniform(0, w - bw)), int(rng.uniform(0, h - bh))
+        boxes.append((x1, y1, x1 + bw, y1 + bh))
+    return boxes
+
+
+def old_path(frame, boxes):
+    nbytes = 0
+    squashed = cv2.resize(frame, (640, 640))
+    nbytes += squashed.nbytes
+    nbytes += letterbox(squashed, 640).nbytes
+    for x1, y1, x2, y2 in boxes:
+        crop = cv2.resize(squashed[y1 * 640 // frame.shape[0]:y2 * 640 // frame.shape[0],
+                                   x1 * 640 // frame.shape[1]:x2 * 640 // frame.shape[1]], (640, 640))
+        nbytes += crop.nbytes + scrfd_input(crop, (640, 640)).nbytes
+    display = squashed.copy()
+    nbytes += display.nbytes + cv2.resize(display, (640, 640)).nbytes
+    return nbytes
+
+
+def new_path(frame, boxes):
+    nbytes = 0
+    frame, _ = fit_within(frame)
+    nbytes += letterbox(frame, 640).nbytes
+    for x1, y1, x2, y2 in boxes:
+        crop = frame[y1:y2, x1:x2]
+        nbytes += scrfd_input(crop, det_input_size(*crop.shape[:2])).nbytes
+    display = frame.copy()
+    nbytes += display.nbytes + fit_within(display, (720, 1280))[0].nbytes
+    return nbytes
+
+
+def time_path(fn, frame, boxes, repeats):
+    fn(frame, boxes)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        nbytes = fn(frame, boxes)
+    return (time.perf_counter() - start) * 1e3 / repeats, nbytes / 1e6
+
+
+def bench_face_models(frame, boxes, repeats):
+    from insightface.app import FaceAnalysis
+    from human_face.preprocess import detect_faces
+
+    app = FaceAnalysis(name="buffalo_l", root=os.path.abspath("face_models"), allowed_modules=["detection", "recognition"])
+    app.prepare(ctx_id=0, det_size=(640, 640))
+    crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes]
+    for label, fn in (("old get_face_embedding", lambda c: app.get(cv2.resize(c, (640, 640)))),
+                      ("new get_face_embedding", lambda c: detect_faces(app, c))):
+        for crop in crops:
+            fn(crop)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for crop in crops:
+                fn(crop)
+        print(f"{label:>24}: {(time.perf_counter() - start) * 1e3 / repeats:8.2f} ms/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--boxes", type=int, default=6)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--frame", default=None, help="real frame to use instead of noise")
+    parser.add_argument("--face-models", action="store_true", help="also time real InsightFace calls")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = cv2.imread(args.frame) if args.frame else rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    boxes = person_boxes(*frame.shape[:2], args.boxes, rng)
+    print(f"frame {frame.shape[1]}x{frame.shape[0]}, {len(boxes)} person boxes")
+    for label, fn in (("old (squash 640x640)", old_path), ("new (single resize)", new_path)):
+        ms, mb = time_path(fn, frame, boxes, args.repeats)
+        print(f"{label:>24}: {ms:8.2f} ms/frame, {mb:7.1f} MB written/frame")
+    if args.face_models:
+        bench_face_models(frame, boxes, max(1, args.repeats // 10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Scaling benchmark: cameras per machine, one process per camera vs. the threaded engine.
+
+Feeds the same video to N simulated cameras and counts annotated frames per
+second across all of them, for N = 1, 2, 4, 8, 16. Process mode loops the
+file; threaded mode reads it once, so give it a clip longer than --seconds.
+
+Run from the repo root:
+    PYTHONPATH=. python benchmarks/bench_process_scaling.py --video clip.mp4 --mode both
+"""
+import argparse
+import time
+
+from human_face.process_pipeline import ProcessCameraPool
+
+
+def sources_for(video, n):
+    return [{"name": f"cam{i}", "source_type": "IP/Video URL", "source_input": video} for i in range(n)]
+
+
+def run_processes(video, n, seconds, warmup):
+    pool = ProcessCameraPool(sources_for(video, n), loop_files=True)
+    pool.start()
+    try:
+        # Model loading happens inside the workers; wait for every camera's first frame
+        deadline = time.monotonic() + warmup
+        while time.monotonic() < deadline and not all(s["processed"] for s in pool.stats().values()):
+            time.sleep(0.2)
+        before = sum(s["processed"] for s in pool.stats().values())
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            pool.latest_frames()
+            pool.drain_events()
+            time.sleep(0.01)
+        processed = sum(s["processed"] for s in pool.stats().values()) - before
+        return processed / (time.perf_counter() - start)
+    finally:
+        pool.stop()
+
+
+def run_threads(video, n, seconds, warmup):
+    from human_face.multi_camera import MultiCameraEngine
+
+    engine = MultiCameraEngine(sources_for(video, n))
+    engine.start()
+    try:
+        time.sleep(warmup)
+        before = engine.stats()["frames"]
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            engine.latest_frames()
+            engine.drain_events()
+            time.sleep(0.01)
+        return (engine.stats()["frames"] - before) / (time.perf_counter() - start)
+    finally:
+        engine.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", required=True, help="video file (or stream URL) every camera reads")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=30.0, help="seconds allowed for model loading")
+    parser.add_argument("--mode", choices=["process", "threads", "both"], default="process")
+    args = parser.parse_args()
+
+    modes = ["threads", "process"] if args.mode == "both" else [args.mode]
+    runners = {"process": run_processes, "threads": run_threads}
+    print(f"{'cameras':>8} " + " ".join(f"{m + ' fps':>14} {'per cam':>8}" for m in modes))
+    for n in args.cameras:
+        row = [f"{n:>8}"]
+        for mode in modes:
+            fps = runners[mode](args.video, n, args.seconds, args.warmup)
+            row.append(f"{fps:>14.1f} {fps / n:>8.1f}")
+        print(" ".join(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
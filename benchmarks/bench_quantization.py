@@ -0,0 +1,122 @@
+"""INT8 validation harness: accuracy and speed of the quantized models against FP32.
+
+Detector: mAP50 / mAP50-95 from ultralytics val() and per-frame latency, for an
+FP32 backend and its INT8 counterpart. Recognizer: leave-one-out top-1 over the
+enrolled face_data crops, genuine/impostor acceptance at our thresholds,
+FP32-vs-INT8 embedding agreement, and per-face / per-frame latency.
+
+Build the INT8 models first (see `python -m human_face.quantization -h`), then:
+    PYTHONPATH=. python benchmarks/bench_quantization.py detector --data data.yaml
+    PYTHONPATH=. python benchmarks/bench_quantization.py recognizer
+"""
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from human_face.gallery import l2_normalize
+from human_face.quantization import (FACE_MODEL_ROOT, FP32_FACE_PACK, INT8_FACE_PACK, RECOGNITION_MODEL,
+                                     aligned_face_crops, calibration_images, face_pack_dir)
+
+# MultiPersonFaceRecognitionApp and FaceRecognizer thresholds
+THRESHOLDS = (0.35, 0.45)
+
+
+def bench_detector(args):
+    from human_face.detector_backends import DEFAULT_WEIGHTS, load_detector
+
+    images = [cv2.imread(p) for p in calibration_images(args.data, args.limit, split="val")]
+    images = [img for img in images if img is not None]
+    print(f"{'backend':>14} {'p50 ms':>8} {'p95 ms':>8} {'mAP50':>7} {'mAP50-95':>9}")
+    for backend in (args.fp32, args.fp32 + "_int8"):
+        model = load_detector(backend, args.weights or DEFAULT_WEIGHTS, imgsz=args.imgsz)
+        for img in images[:10]:
+            model.predict(img, imgsz=args.imgsz, verbose=False, device="cpu")
+        times = []
+        for img in images:
+            start = time.perf_counter()
+            model.predict(img, imgsz=args.imgsz, verbose=False, device="cpu")
+            times.append((time.perf_counter() - start) * 1e3)
+        metrics = model.val(data=args.data, imgsz=args.imgsz, batch=1, device="cpu", verbose=False, plots=False)
+        print(f"{backend:>14} {np.percentile(times, 50):8.1f} {np.percentile(times, 95):8.1f} "
+              f"{metrics.box.map50:7.3f} {metrics.box.map:9.3f}", flush=True)
+
+
+def recognition_metrics(embeddings, names):
+    sims = embeddings @ embeddings.T
+    same = names[:, None] == names[None, :]
+    np.fill_diagonal(sims, -np.inf)
+    top1 = float(np.mean(names[np.argmax(sims, axis=1)] == names))
+    off_diag = ~np.eye(len(names), dtype=bool)
+    genuine, impostor = sims[same & off_diag], sims[~same]
+    rates = {t: (float(np.mean(genuine >= t)) if genuine.size else float("nan"),
+                 float(np.mean(impostor >= t)) if impostor.size else float("nan")) for t in THRESHOLDS}
+    return top1, rates
+
+
+def bench_recognizer(args):
+    from insightface.app import FaceAnalysis
+    from insightface.model_zoo import get_model
+
+    crops = aligned_face_crops(args.face_data)
+    if len(crops) < 2:
+        raise SystemExit(f"Need at least two enrolled face crops under {args.face_data}")
+    names = np.array([name for name, _ in crops])
+    images = [crop for _, crop in crops]
+    print(f"{len(images)} aligned crops of {len(set(names))} people from {args.face_data}")
+
+    frames = []
+    for person in sorted(os.listdir(args.face_data)):
+        folder = os.path.join(args.face_data, person)
+        if os.path.isdir(folder):
+            frames.extend(cv2.imread(os.path.join(folder, f)) for f in sorted(os.listdir(folder)) if f.endswith(".jpg"))
+    frames = [f for f in frames if f is not None][:args.limit]
+
+    embeddings = {}
+    header = " ".join(f"{'TAR@' + str(t):>9} {'FAR@' + str(t):>9}" for t in THRESHOLDS)
+    print(f"{'pack':>16} {'top-1':>6} {header} {'ms/face':>8} {'ms/frame':>9}")
+    for pack in (FP32_FACE_PACK, INT8_FACE_PACK):
+        rec = get_model(os.path.join(face_pack_dir(pack), RECOGNITION_MODEL), providers=["CPUExecutionProvider"])
+        rec.prepare(ctx_id=-1)
+        start = time.perf_counter()
+        feats = np.vstack([rec.get_feat(img) for img in images])
+        per_face = (time.perf_counter() - start) * 1e3 / len(images)
+        embeddings[pack] = l2_normalize(feats)
+
+        app = FaceAnalysis(name=pack, root=os.path.abspath(FACE_MODEL_ROOT), allowed_modules=["detection", "recognition"])
+        app.prepare(ctx_id=0, det_size=(640, 640))
+        app.get(frames[0])
+        start = time.perf_counter()
+        for frame in frames:
+            app.get(frame)
+        per_frame = (time.perf_counter() - start) * 1e3 / len(frames)
+
+        top1, rates = recognition_metrics(embeddings[pack], names)
+        cells = " ".join(f"{tar:9.3f} {far:9.4f}" for tar, far in rates.values())
+        print(f"{pack:>16} {top1:6.3f} {cells} {per_face:8.2f} {per_frame:9.1f}", flush=True)
+
+    agreement = np.sum(embeddings[FP32_FACE_PACK] * embeddings[INT8_FACE_PACK], axis=1)
+    print(f"FP32 vs INT8 embedding cosine: mean {agreement.mean():.4f}, min {agreement.min():.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    det = sub.add_parser("detector")
+    det.add_argument("--data", required=True, help="dataset YAML; val split is used")
+    det.add_argument("--weights", default=None)
+    det.add_argument("--fp32", choices=["onnx", "openvino"], default="openvino",
+                     help="FP32 backend, compared with its _int8 counterpart")
+    det.add_argument("--imgsz", type=int, default=640)
+    det.add_argument("--limit", type=int, default=200)
+    rec = sub.add_parser("recognizer")
+    rec.add_argument("--face-data", default="face_data")
+    rec.add_argument("--limit", type=int, default=200, help="frames timed for the end-to-end latency")
+    args = parser.parse_args()
+    bench_detector(args) if args.command == "detector" else bench_recognizer(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@ import os
 import warnings
 import cv2
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from insightface.app import FaceAnalysis
+from human_face.gallery import GalleryMatcher
+from human_face.gallery_store import DEFAULT_GALLERY_DIR, load_gallery_matcher
+from human_face.quantization import face_model_pack
 
 # ONNX runtime fixes
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
@@ -11,17 +13,18 @@ os.environ["ORT_LOG_SEVERITY_LEVEL"] = "3"
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 class FaceRecognizer:
-    def __init__(self, model_dir="face_models", face_data_dir="face_data", ctx_id=0, threshold=0.45):
+    def __init__(self, model_dir="face_models", face_data_dir="face_data", ctx_id=0, threshold=0.45,
+                 gallery_dir=DEFAULT_GALLERY_DIR, face_model=None):
         self.model_dir = os.path.abspath(model_dir)
         self.face_data_dir = face_data_dir
+        self.gallery_dir = gallery_dir
         self.ctx_id = ctx_id
         self.threshold = threshold
-        self.known_encodings = []
-        self.known_names = []
+        self.matcher = GalleryMatcher([], [])
 
         # Load InsightFace with detection + recognition
         self.app = FaceAnalysis(
-            name="buffalo_l",
+            name=face_model_pack(face_model),
             root=self.model_dir,
             allowed_modules=["detection", "recognition"]
         )
@@ -31,28 +34,18 @@ class FaceRecognizer:
 
     def load_known_faces(self):
         print("[INFO] Loading known face encodings...")
-        for person in os.listdir(self.face_data_dir):
-            person_folder = os.path.join(self.face_data_dir, person)
-            if not os.path.isdir(person_folder):
-                continue
-            for file in os.listdir(person_folder):
-                if file.startswith("encoding_") and file.endswith(".npy"):
-                    path = os.path.join(person_folder, file)
-                    encoding = np.load(path)
-                    self.known_encodings.append(encoding)
-                    self.known_names.append(person)
-        print(f"[INFO] Loaded {len(self.known_encodings)} encodings for {len(set(self.known_names))} people.")
+        self.matcher = load_gallery_matcher(self.gallery_dir, self.face_data_dir)
+        print(f"[INFO] Loaded {len(self.matcher)} encodings for {self.matcher.num_identities} people.")
 
     def recognize(self, face_embedding):
-        if not self.known_encodings:
-            return "Unknown"
+        return self.recognize_batch([face_embedding])[0]
+
+    def recognize_batch(self, face_embeddings):
+        if len(self.matcher) == 0 or not face_embeddings:
+            return ["Unknown"] * len(face_embeddings)
 
-        face_embedding = face_embedding.reshape(1, -1)
-        similarities = cosine_similarity(face_embedding, self.known_encodings)[0]
-        best_index = np.argmax(similarities)
-        if similarities[best_index] >= self.threshold:
-            return self.known_names[best_index]
-        return "Unknown"
+        queries = np.vstack([emb.reshape(1, -1) for emb in face_embeddings])
+        return [name for name, _ in self.matcher.match(queries, self.threshold)]
 
     def annotate_frame(self, frame, face, name):
         bbox = face.bbox.astype(int)
@@ -74,11 +67,8 @@ class FaceRecognizer:
             if not ret:
                 continue
 
-            faces = self.app.get(frame)
-            for face in faces:
-                name = "Unknown"
-                if face.embedding is not None:
-                    name = self.recognize(face.embedding)
+            faces = [face for face in self.app.get(frame) if face.embedding is not None]
+            for face, name in zip(faces, self.recognize_batch([face.embedding for face in faces])):
                 self.annotate_frame(frame, face, name)
 
             cv2.imshow("Face Recognition", frame)
@@ -3,8 +3,7 @@ import warnings
 import cv2
 import numpy as np
 import json
-from insightface.app import FaceAnalysis
-import torch
+from human_face.gallery_store import sync_person
 
 # Fixes for ONNX runtime
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
@@ -13,6 +12,8 @@ warnings.filterwarnings("ignore", category=FutureWarning, message="`rcond` param
 
 class FaceDataCollector:
     def __init__(self, model_dir, ctx_id):
+        from insightface.app import FaceAnalysis
+
         self.model_dir = os.path.abspath(model_dir)
         self.app = FaceAnalysis(
             name="buffalo_l",
@@ -102,10 +103,13 @@ class FaceDataCollector:
 
         cap.release()
         cv2.destroyAllWindows()
+        sync_person(person_name.replace(" ", "_"))
         print("\n[INFO] Data collection complete. You may now close the window or proceed with the next step.")
 
 # Run the collector
 if __name__ == "__main__":
+    import torch
+
     model_dir=os.path.join("face_models")
     # Detect device
     if torch.backends.mps.is_available():
@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+from human_face.gallery import l2_normalize
+
+ANN_INDEX_FILE = "ann_index.npz"
+# Retrain once the gallery has grown or shrunk by this fraction since the centroids were trained
+RETRAIN_DRIFT = 0.25
+
+
+def rows_digest(matrix, n=None):
+    """Cheap identity of the first `n` rows of `matrix`: their count and a strided sample."""
+    n = len(matrix) if n is None else n
+    digest = hashlib.sha1(f"{n},{matrix.shape[1]}".encode())
+    if n:
+        digest.update(np.ascontiguousarray(matrix[:n][::max(1, n // 256)]).tobytes())
+        digest.update(np.ascontiguousarray(matrix[n - 1]).tobytes())
+    return digest.hexdigest()
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over unit-length embeddings.
+
+    A spherical k-means coarse quantizer splits the gallery into `nlist` cells.
+    Rows are stored cell by cell in one contiguous matrix, so a query scores
+    the centroids, then scans only the `nprobe` closest cells.
+
+    Gallery changes are folded in with `extend`, which keeps the trained
+    centroids; `needs_retrain` says when the gallery has drifted far enough
+    from the training set for a fresh `build` to be worth it.
+    """
+
+    def __init__(self, centroids, list_offsets, row_ids, fingerprint="", trained_rows=None, digest=""):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.fingerprint = fingerprint
+        # Rows the centroids were trained on, and rows_digest() of the rows indexed
+        self.trained_rows = len(self.row_ids) if trained_rows is None else int(trained_rows)
+        self.digest = digest
+        self.vectors = None
+        self._gather = False
+        self.nprobe = 16
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix, nlist=None, n_iter=10, max_train_points=256, seed=0, fingerprint=""):
+        """Train the coarse quantizer on `matrix` (rows assumed L2-normalized) and fill the lists."""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        n = len(matrix)
+        if n == 0:
+            raise ValueError("Cannot build an index over an empty gallery")
+        if nlist is None:
+            nlist = int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        rng = np.random.default_rng(seed)
+        train_size = min(n, nlist * max_train_points)
+        train = matrix[rng.choice(n, train_size, replace=False)] if train_size < n else matrix
+        centroids = train[rng.choice(len(train), nlist, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assign = cls._assign(train, centroids)
+            order = np.argsort(assign, kind="stable")
+            cells, starts = np.unique(assign[order], return_index=True)
+            sums = np.add.reduceat(train[order], starts, axis=0)
+            centroids[cells] = l2_normalize(sums)
+            empty = np.setdiff1d(np.arange(nlist), cells)
+            if len(empty):
+                centroids[empty] = train[rng.choice(len(train), len(empty), replace=False)]
+
+        index = cls(centroids, [], [], fingerprint=fingerprint, trained_rows=n, digest=rows_digest(matrix))
+        index._fill(matrix)
+        return index
+
+    def extend(self, matrix, fingerprint=""):
+        """Index of `matrix` over these trained centroids, without re-running k-means.
+
+        When `matrix` starts with the rows this index covers (the packed
+        gallery only ever appends), just the new rows are assigned to their
+        nearest centroid; otherwise every row is reassigned.
+        """
+        covered = len(self.row_ids)
+        if covered <= len(matrix) and self.digest and rows_digest(matrix, covered) == self.digest:
+            assign = np.empty(len(matrix), dtype=np.int64)
+            assign[self.row_ids] = np.repeat(np.arange(self.nlist), np.diff(self.list_offsets))
+            assign[covered:] = self._assign(matrix[covered:], self.centroids)
+        else:
+            assign = self._assign(matrix, self.centroids)
+        counts = np.bincount(assign, minlength=self.nlist)
+        index = IVFIndex(self.centroids, np.concatenate(([0], np.cumsum(counts))), np.argsort(assign, kind="stable"),
+                         fingerprint=fingerprint, trained_rows=self.trained_rows, digest=rows_digest(matrix))
+        index.nprobe = self.nprobe
+        return index.attach(matrix)
+
+    def needs_retrain(self, max_drift=RETRAIN_DRIFT):
+        return abs(len(self.row_ids) - self.trained_rows) > max_drift * max(1, self.trained_rows)
+
+    @staticmethod
+    def _assign(vectors, centroids, chunk=65536):
+        assign = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            assign[start:start + chunk] = np.argmax(block @ centroids.T, axis=1)
+        return assign
+
+    def _fill(self, matrix):
+        assign = self._assign(matrix, self.centroids)
+        self.row_ids = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.nlist)
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.vectors = np.ascontiguousarray(matrix[self.row_ids])
+        self._gather = False
+
+    def attach(self, matrix):
+        """Re-gather list vectors from the gallery matrix after `load`.
+
+        A memory-mapped gallery is kept as-is and gathered per query instead,
+        so worker processes keep sharing its pages rather than each holding a
+        reordered copy.
+        """
+        if isinstance(matrix, np.memmap):
+            self.vectors = matrix
+            self._gather = True
+        else:
+            self.vectors = np.ascontiguousarray(np.asarray(matrix, dtype=np.float32)[self.row_ids])
+            self._gather = False
+        return self
+
+    def _list_vectors(self, lo, hi):
+        return self.vectors[self.row_ids[lo:hi]] if self._gather else self.vectors[lo:hi]
+
+    def search(self, queries, k=1, nprobe=None):
+        """Return `(row_ids, scores)`, each (n_queries, k), padded with -1 / -inf."""
+        if self.vectors is None:
+            raise RuntimeError("Index has no vectors; call attach(matrix) after load()")
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        queries = l2_normalize(queries)
+
+        coarse = queries @ self.centroids.T
+        probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for qi, query in enumerate(queries):
+            spans = [(self.list_offsets[c], self.list_offsets[c + 1]) for c in probes[qi]]
+            spans = [(lo, hi) for lo, hi in spans if hi > lo]
+            if not spans:
+                continue
+            positions = np.concatenate([np.arange(lo, hi) for lo, hi in spans])
+            scores = np.concatenate([self._list_vectors(lo, hi) @ query for lo, hi in spans])
+            kk = min(k, len(scores))
+            top = np.argpartition(-scores, kk - 1)[:kk]
+            top = top[np.argsort(-scores[top])]
+            out_ids[qi, :kk] = self.row_ids[positions[top]]
+            out_scores[qi, :kk] = scores[top]
+        return out_ids, out_scores
+
+    def save(self, path):
+        """Write the index to `path` atomically.
+
+        The UI, the service and pipeline workers may all rebuild the same
+        index, so it is written to a temporary file next to `path` and swapped
+        in; readers see either the old file or the new one, never a partial one.
+        """
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                   dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    centroids=self.centroids,
+                    list_offsets=self.list_offsets,
+                    row_ids=self.row_ids,
+                    fingerprint=np.array(self.fingerprint),
+                    trained_rows=np.array(self.trained_rows),
+                    digest=np.array(self.digest),
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            # Indexes saved before extend() existed carry no training size or digest
+            return cls(
+                data["centroids"],
+                data["list_offsets"],
+                data["row_ids"],
+                fingerprint=str(data["fingerprint"]),
+                trained_rows=data["trained_rows"] if "trained_rows" in data else None,
+                digest=str(data["digest"]) if "digest" in data else "",
+            )
+
+
+def save_index(index, path):
+    try:
+        index.save(path)
+    except OSError as e:
+        logging.warning(f"Could not save ANN index to {path}: {e}")
+
+
+def build_index(matrix, fingerprint, path, **build_kwargs):
+    """Train a fresh index over `matrix` and save it to `path`."""
+    index = IVFIndex.build(matrix, fingerprint=fingerprint, **build_kwargs)
+    save_index(index, path)
+    logging.info(f"Built ANN index with {index.nlist} lists for {len(matrix)} embeddings → {path}")
+    return index
+
+
+def load_or_build_index(matrix, fingerprint, path, previous=None, **build_kwargs):
+    """Index for `matrix`: the one saved at `path` if its fingerprint matches, else an extended one.
+
+    `previous` (or a stale saved index) is brought up to date with `extend`,
+    which costs one assignment pass; k-means only runs when there is nothing
+    to extend. The result is saved back to `path`.
+    """
+    if previous is None and os.path.exists(path):
+        try:
+            index = IVFIndex.load(path)
+            if index.fingerprint == fingerprint:
+                logging.info(f"Loaded ANN index from {path} ({index.nlist} lists)")
+                return index.attach(matrix)
+            previous = index
+        except Exception as e:
+            logging.warning(f"Failed to load ANN index {path}: {e}")
+
+    if previous is None or previous.centroids.shape[1] != matrix.shape[1]:
+        return build_index(matrix, fingerprint, path, **build_kwargs)
+    index = previous.extend(matrix, fingerprint)
+    save_index(index, path)
+    logging.info(f"Extended ANN index to {len(matrix)} embeddings ({index.nlist} lists, "
+                 f"trained on {index.trained_rows}) → {path}")
+    return index
+
+
+def maybe_attach_index(matcher, path, min_size=5000, previous=None, **build_kwargs):
+    """Attach a saved/extended/built IVF index to `matcher` once the gallery is large enough to benefit."""
+    if len(matcher) < min_size:
+        return matcher
+    index = load_or_build_index(matcher.matrix, matcher.fingerprint(), path, previous, **build_kwargs)
+    return matcher.attach_index(index)
@@ -0,0 +1,266 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import cv2
+
+from human_face.securevision import DEFAULT_FACE_PASS, FACE_PASS_MODES, MultiPersonFaceRecognitionApp
+
+_END = object()
+
+
+class TrackTimeline:
+    """Per-track identity segments: one row each time a track is seen under a new name."""
+
+    def __init__(self):
+        self._open = {}
+        self.segments = []
+
+    def observe(self, track_id, name, ts, score):
+        seg = self._open.get(track_id)
+        if seg is not None and seg["name"] != name:
+            self.segments.append(seg)
+            seg = None
+        if seg is None:
+            seg = self._open[track_id] = {"track_id": track_id, "name": name, "start": ts, "end": ts,
+                                          "frames": 0, "max_score": 0.0}
+        seg["end"] = ts
+        seg["frames"] += 1
+        if score is not None:
+            seg["max_score"] = max(seg["max_score"], float(score))
+
+    def close(self):
+        self.segments.extend(self._open.values())
+        self._open = {}
+        return sorted(self.segments, key=lambda s: (s["start"], s["track_id"]))
+
+
+def _put(frames, item, stop):
+    while not stop.is_set():
+        try:
+            frames.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _decode_ahead(path, frames, stop, fps_hint):
+    """Fill `frames` with `(index, pts_seconds, frame)`; blocks when full instead of dropping."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or fps_hint
+    index = 0
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            pts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 or index / fps
+            if not _put(frames, (index, pts, frame), stop):
+                break
+            index += 1
+    finally:
+        cap.release()
+        _put(frames, _END, stop)
+
+
+def _write_behind(writer, pending):
+    while True:
+        frame = pending.get()
+        if frame is _END:
+            return
+        writer.write(frame)
+
+
+def _summarize(events):
+    """Visits, total dwell and first/last sighting per identity."""
+    summary = {}
+    for event in events:
+        entry = summary.setdefault(event.name, {"visits": 0, "dwell_seconds": 0.0, "first_seen": None,
+                                                "last_seen": None})
+        if event.kind == "enter":
+            entry["visits"] += 1
+            entry["first_seen"] = event.timestamp if entry["first_seen"] is None else entry["first_seen"]
+        if event.kind == "leave":
+            entry["dwell_seconds"] += event.dwell
+            entry["last_seen"] = event.timestamp
+    return summary
+
+
+def analyze_video(path, output_dir, batch_size=16, face_pass=DEFAULT_FACE_PASS, recognition_budget=8,
+                  detector_backend=None, write_video=True, start_time=0.0, conf=0.25, iou=0.20, app=None):
+    """Run detection, tracking and recognition over a whole video file as fast as possible.
+
+    Frames are decoded ahead on a thread, sent through YOLO in batches of
+    `batch_size` with this file's own ByteTrack, then recognised and drawn by
+    a `MultiPersonFaceRecognitionApp` running on the video's timeline
+    (`start_time` + presentation time, so events line up with the footage).
+    Nothing is dropped or throttled.
+
+    Writes to `output_dir`: `<name>_annotated.mp4`, `<name>_timeline.csv`
+    (per-track identity segments), `<name>_events.csv` and
+    `<name>_summary.json`. Returns the summary dict. With `write_video` off
+    frames are not drawn at all.
+    """
+    from human_face.tracker import track_result
+
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    probe = cv2.VideoCapture(path)
+    if not probe.isOpened():
+        raise FileNotFoundError(f"Cannot open video {path}")
+    fps = probe.get(cv2.CAP_PROP_FPS) or 25.0
+    total = int(probe.get(cv2.CAP_PROP_FRAME_COUNT))
+    probe.release()
+
+    if app is None:
+        app = MultiPersonFaceRecognitionApp(stream_url=None, face_pass=face_pass, recognition_budget=recognition_budget,
+                                            frame_buffer="queue", detector_backend=detector_backend)
+    app.sound_alerts = False
+    if not write_video:
+        app.draw = False
+    # Fresh track state per video, timed to the file's frame rate
+    app.use_tracker(frame_rate=round(fps))
+    current_ts = [start_time]
+    app.clock = lambda: current_ts[0]
+
+    frames = queue.Queue(maxsize=batch_size * 4)
+    stop = threading.Event()
+    decoder = threading.Thread(target=_decode_ahead, args=(path, frames, stop, fps), daemon=True)
+    decoder.start()
+
+    writer = writer_thread = pending = None
+    timeline = TrackTimeline()
+    events = []
+    processed = 0
+    started = time.perf_counter()
+    try:
+        done = False
+        while not done:
+            batch = []
+            while len(batch) < batch_size:
+                item = frames.get()
+                if item is _END:
+                    done = True
+                    break
+                batch.append(item)
+            if not batch:
+                break
+            # The app's model may be the registry's shared one
+            with app.model_lock:
+                results = app.model.predict([f for _, _, f in batch], conf=conf, iou=iou, verbose=False,
+                                            device=app.device)
+            for (index, pts, frame), result in zip(batch, results):
+                current_ts[0] = start_time + pts
+                boxes, ids, confs = track_result(app.tracker, result)
+                display = app.analyze_frame(frame, boxes, ids, confs)
+                for track_id in ids:
+                    state = app.track_store.get(track_id, app.frame_idx - 1)
+                    if state is not None:
+                        timeline.observe(track_id, state.name, current_ts[0], state.score)
+                while not app.detection_queue.empty():
+                    events.append(app.detection_queue.get_nowait())
+                if write_video:
+                    if writer is None:
+                        h, w = display.shape[:2]
+                        out_path = os.path.join(output_dir, f"{stem}_annotated.mp4")
+                        writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+                        pending = queue.Queue(maxsize=batch_size * 2)
+                        writer_thread = threading.Thread(target=_write_behind, args=(writer, pending), daemon=True)
+                        writer_thread.start()
+                    pending.put(display)
+                processed += 1
+            if processed % (batch_size * 50) < batch_size:
+                logging.info(f"{stem}: {processed}/{total or '?'} frames")
+        app.emit_events(app.events.flush(current_ts[0], force=True))
+        while not app.detection_queue.empty():
+            events.append(app.detection_queue.get_nowait())
+    finally:
+        stop.set()
+        app.stop_event.set()
+        if writer is not None:
+            pending.put(_END)
+            writer_thread.join()
+            writer.release()
+
+    elapsed = time.perf_counter() - started
+    segments = timeline.close()
+    with open(os.path.join(output_dir, f"{stem}_timeline.csv"), "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["track_id", "name", "start", "end", "frames", "max_score"])
+        w.writeheader()
+        w.writerows(segments)
+    with open(os.path.join(output_dir, f"{stem}_events.csv"), "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Name", "Timestamp", "Event", "Dwell", "Track"])
+        for e in events:
+            w.writerow([e.name, f"{e.timestamp:.2f}", e.kind, f"{e.dwell:.1f}", e.track_id])
+    summary = {
+        "video": path,
+        "frames": processed,
+        "video_seconds": processed / fps,
+        "processing_seconds": round(elapsed, 2),
+        "fps": round(processed / elapsed, 1) if elapsed else 0.0,
+        "speedup_vs_realtime": round(processed / fps / elapsed, 2) if elapsed else 0.0,
+        "tracks": len({s["track_id"] for s in segments}),
+        "identities": _summarize(events),
+    }
+    with open(os.path.join(output_dir, f"{stem}_summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def _analyze_in_worker(path, output_dir, torch_threads, kwargs):
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    return analyze_video(path, output_dir, **kwargs)
+
+
+def analyze_videos(paths, output_dir, workers=None, **kwargs):
+    """Analyse several files in parallel worker processes, splitting the cores between them."""
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or 1, len(paths)))
+    if workers == 1:
+        return {path: analyze_video(path, output_dir, **kwargs) for path in paths}
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = {pool.submit(_analyze_in_worker, path, output_dir, max(1, cores // workers), kwargs): path
+                   for path in paths}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse recorded footage offline at full speed.")
+    parser.add_argument("videos", nargs="+", help="video files to analyse")
+    parser.add_argument("--out", default="batch_results", help="output directory")
+    parser.add_argument("--batch", type=int, default=16, help="frames per YOLO batch")
+    parser.add_argument("--workers", type=int, default=1, help="files analysed in parallel (one process each)")
+    parser.add_argument("--face-pass", choices=FACE_PASS_MODES, default=DEFAULT_FACE_PASS)
+    parser.add_argument("--detector-backend", default=None)
+    parser.add_argument("--no-video", action="store_true", help="skip writing the annotated video")
+    parser.add_argument("--start-time", type=float, default=0.0,
+                        help="epoch seconds of the first frame (default: timestamps are offsets into the video)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", force=True)
+    results = analyze_videos(
+        args.videos, args.out, workers=args.workers, batch_size=args.batch, face_pass=args.face_pass,
+        detector_backend=args.detector_backend, write_video=not args.no_video, start_time=args.start_time,
+    )
+    for path, summary in results.items():
+        print(f"{path}: {summary['frames']} frames in {summary['processing_seconds']} s "
+              f"({summary['fps']} fps, {summary['speedup_vs_realtime']}x real time), "
+              f"{len(summary['identities'])} identities")
+
+
+if __name__ == "__main__":
+    main()
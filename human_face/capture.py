@@ -0,0 +1,297 @@
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+CAPTURE_BACKENDS = ("auto", "opencv", "pyav")
+CAPTURE_BACKEND_ENV = "SECUREVISION_CAPTURE_BACKEND"
+
+# Keep FFmpeg from buffering: no probe delay, no jitter buffer, TCP so RTSP does not lose packets
+LOW_LATENCY_OPTIONS = {
+    "fflags": "nobuffer",
+    "flags": "low_delay",
+    "probesize": "32768",
+    "analyzeduration": "0",
+    "max_delay": "0",
+}
+RTSP_OPTIONS = {**LOW_LATENCY_OPTIONS, "rtsp_transport": "tcp"}
+
+
+def is_live_url(url):
+    return isinstance(url, str) and url.split("://", 1)[0].lower() in ("rtsp", "rtsps", "rtmp", "http", "https", "udp", "tcp")
+
+
+class PyAVCapture:
+    """FFmpeg capture through PyAV, shaped like `cv2.VideoCapture` (`isOpened`/`read`/`release`).
+
+    A decoder thread keeps reading so the consumer never waits on the network.
+    Live sources keep only the newest `buffer` frames (older ones count as
+    dropped); files block the decoder instead, so nothing is lost. When a live
+    stream errors, stalls past `read_timeout` or ends, the thread reconnects
+    with exponential backoff. Every frame carries its presentation time and
+    the wall-clock time it was decoded.
+    """
+
+    def __init__(self, url, buffer=1, open_timeout=5.0, read_timeout=5.0, backoff=(0.5, 30.0),
+                 loop=False, realtime=False, options=None):
+        import av  # optional dependency, only needed for this backend
+
+        self._av = av
+        self.url = url
+        self.live = is_live_url(url)
+        self.loop = loop
+        # Pace a file at its own frame rate, to stand in for a camera
+        self.realtime = realtime
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.backoff = backoff
+        if options is None:
+            options = RTSP_OPTIONS if str(url).lower().startswith("rtsp") else (LOW_LATENCY_OPTIONS if self.live else {})
+        self.options = options
+        self._frames = queue.Queue(maxsize=max(1, buffer) if self.live else max(2, buffer))
+        self._stop = threading.Event()
+        # Opened at least once, and streaming right now; the latter clears while reconnecting
+        self._opened = threading.Event()
+        self._connected = threading.Event()
+        self._finished = threading.Event()
+        self.last_pts = None
+        self.last_decoded_at = None
+        self.decoded = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.errors = 0
+        self._fps_window = (time.monotonic(), 0)
+        self.decode_fps = 0.0
+        self._thread = threading.Thread(target=self._decode_loop, name=f"pyav-{url}", daemon=True)
+        self._thread.start()
+        self._opened.wait(open_timeout)
+
+    def _open(self):
+        return self._av.open(self.url, options=self.options, timeout=(self.open_timeout, self.read_timeout))
+
+    def _push(self, packet):
+        if self.live:
+            while True:
+                try:
+                    self._frames.put_nowait(packet)
+                    return
+                except queue.Full:
+                    try:
+                        self._frames.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        while not self._stop.is_set():
+            try:
+                self._frames.put(packet, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _count_fps(self):
+        start, count = self._fps_window
+        count += 1
+        now = time.monotonic()
+        if now - start >= 1.0:
+            self.decode_fps = count / (now - start)
+            start, count = now, 0
+        self._fps_window = (start, count)
+
+    def _decode_stream(self, container):
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"  # frame + slice threading in the decoder
+        started = None
+        for frame in container.decode(stream):
+            if self._stop.is_set():
+                return
+            pts = float(frame.time) if frame.time is not None else None
+            if self.realtime and pts is not None:
+                if started is None:
+                    started = time.monotonic() - pts
+                delay = started + pts - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            image = frame.to_ndarray(format="bgr24")
+            self.decoded += 1
+            self._count_fps()
+            self._push((image, pts, time.time()))
+
+    def _decode_loop(self):
+        delay = self.backoff[0]
+        while not self._stop.is_set():
+            try:
+                with self._open() as container:
+                    self._opened.set()
+                    self._connected.set()
+                    delay = self.backoff[0]
+                    self._decode_stream(container)
+            except Exception as e:
+                self.errors += 1
+                logging.warning(f"Capture {self.url}: {e}")
+            finally:
+                self._connected.clear()
+            if self._stop.is_set():
+                break
+            if not self.live:
+                # Files end (or fail) for good unless looping one that opened fine
+                if self.loop and self._opened.is_set():
+                    continue
+                break
+            self.reconnects += 1
+            logging.info(f"Capture {self.url}: reconnecting in {delay:.1f}s (attempt {self.reconnects})")
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, self.backoff[1])
+        self._finished.set()
+
+    def isOpened(self):
+        if self.live:
+            # Still trying: a camera that is down at startup is reconnected to, not given up on
+            return not self._finished.is_set()
+        return self._opened.is_set() and not (self._finished.is_set() and self._frames.empty())
+
+    def read_packet(self, timeout=None):
+        """`(frame, pts_seconds, decoded_at)` for the next frame; None on timeout or end of file."""
+        timeout = self.read_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                packet = self._frames.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self._finished.is_set() or time.monotonic() >= deadline:
+                    return None
+        self.delivered += 1
+        _, self.last_pts, self.last_decoded_at = packet
+        return packet
+
+    def read(self):
+        packet = self.read_packet()
+        return (False, None) if packet is None else (True, packet[0])
+
+    def release(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+    def stats(self):
+        return {
+            "backend": "pyav",
+            "connected": self._connected.is_set(),
+            "decoded": self.decoded,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "decode_fps": round(self.decode_fps, 1),
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+            # Seconds between decoding the last delivered frame and now
+            "lag": round(time.time() - self.last_decoded_at, 3) if self.last_decoded_at else None,
+        }
+
+
+def resolve_capture_backend(backend=None, stream_url=None):
+    backend = backend or os.environ.get(CAPTURE_BACKEND_ENV, "auto")
+    if backend not in CAPTURE_BACKENDS:
+        raise ValueError(f"capture backend must be one of {CAPTURE_BACKENDS}, got {backend!r}")
+    if backend != "auto":
+        return backend
+    # Device indices stay on OpenCV; network streams go to FFmpeg when PyAV is installed
+    if not is_live_url(stream_url):
+        return "opencv"
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return "opencv"
+    return "pyav"
+
+
+def open_capture(stream_url, backend=None, **kwargs):
+    """`cv2.VideoCapture` or `PyAVCapture` for `stream_url`, per `backend` / $SECUREVISION_CAPTURE_BACKEND."""
+    if stream_url is None:
+        return None
+    if resolve_capture_backend(backend, stream_url) == "pyav":
+        return PyAVCapture(stream_url, **kwargs)
+    return cv2.VideoCapture(stream_url)
+
+
+def serve_file(path, port=8090, codec="mpeg2video", loop=True):
+    """Re-stream a local file as MPEG-TS over TCP at camera pace: a local stand-in for a network camera.
+
+    Serves a single client; stop and restart it to exercise the reader's reconnects.
+    """
+    import av
+
+    print(f"Serving {path} at tcp://127.0.0.1:{port}")
+    with av.open(f"tcp://127.0.0.1:{port}?listen=1", mode="w", format="mpegts") as out:
+        stream = None
+        frame_index = 0
+        while True:
+            with av.open(path) as src:
+                video = src.streams.video[0]
+                rate = video.average_rate or 25
+                if stream is None:
+                    stream = out.add_stream(codec, rate=rate)
+                    stream.width, stream.height = video.codec_context.width, video.codec_context.height
+                    stream.pix_fmt = "yuv420p"
+                started = time.monotonic() - frame_index / float(rate)
+                for frame in src.decode(video):
+                    delay = started + frame_index / float(rate) - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    frame = frame.reformat(format="yuv420p")
+                    frame.pts = frame_index
+                    frame_index += 1
+                    for packet in stream.encode(frame):
+                        out.mux(packet)
+            if not loop:
+                break
+        for packet in stream.encode():
+            out.mux(packet)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyAV capture backend: read a stream and print its stats, "
+                                                 "or serve a local file as a stand-in network camera.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    read = sub.add_parser("read", help="read a stream and print stats every second")
+    read.add_argument("url", help="rtsp://, http://, tcp:// or a local video file")
+    read.add_argument("--seconds", type=float, default=10.0)
+    read.add_argument("--loop", action="store_true", help="loop a local file")
+    read.add_argument("--realtime", action="store_true", help="pace a local file at its frame rate, like a camera")
+    read.add_argument("--consumer-fps", type=float, default=0.0, help="simulate a slow consumer (0 = as fast as possible)")
+    serve = sub.add_parser("serve", help="re-stream a local file as MPEG-TS over raw TCP (tcp://) at camera pace")
+    serve.add_argument("path")
+    serve.add_argument("--port", type=int, default=8090)
+    serve.add_argument("--once", action="store_true", help="stop at the end of the file instead of looping")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "serve":
+        serve_file(args.path, args.port, loop=not args.once)
+        return
+
+    cap = PyAVCapture(args.url, loop=args.loop, realtime=args.realtime)
+    end = time.monotonic() + args.seconds
+    next_report = time.monotonic() + 1.0
+    try:
+        while time.monotonic() < end:
+            packet = cap.read_packet(timeout=1.0)
+            if packet is None and not cap.isOpened():
+                print("stream ended")
+                break
+            if args.consumer_fps:
+                time.sleep(1.0 / args.consumer_fps)
+            if time.monotonic() >= next_report:
+                next_report += 1.0
+                print(cap.stats(), flush=True)
+    finally:
+        cap.release()
+    print(cap.stats())
+
+
+if __name__ == "__main__":
+    main()
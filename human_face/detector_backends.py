@@ -0,0 +1,117 @@
+import argparse
+import functools
+import logging
+import os
+
+# Exported ONNX / OpenVINO models are still driven through `ultralytics.YOLO`, so
+# track(), predict() and val() behave the same whichever backend is loaded.
+# Export once, then select with SECUREVISION_DETECTOR_BACKEND or `detector_backend`:
+#     python -m human_face.detector_backends export --backend openvino --run yolov12n
+DETECTOR_BACKENDS = ("torch", "onnx", "openvino", "onnx_int8", "openvino_int8")
+# INT8 models need calibration images, so they are built by human_face.quantization, not here
+INT8_BACKENDS = ("onnx_int8", "openvino_int8")
+DEFAULT_WEIGHTS = "yolo models/new_best12n.pt"
+TRAINING_RUNS_DIR = os.path.join("Training", "runs")
+BACKEND_ENV = "SECUREVISION_DETECTOR_BACKEND"
+
+
+def run_weights(run, which="best"):
+    """Weights written by a training run, e.g. `Training/runs/yolov12n/train/weights/best.pt`."""
+    return os.path.join(TRAINING_RUNS_DIR, run, "train", "weights", f"{which}.pt")
+
+
+def resolve_backend(backend=None):
+    backend = backend or os.environ.get(BACKEND_ENV, "torch")
+    if backend not in DETECTOR_BACKENDS:
+        raise ValueError(f"detector backend must be one of {DETECTOR_BACKENDS}, got {backend!r}")
+    return backend
+
+
+def export_path(weights, backend):
+    """Where ultralytics writes the export of `weights` for `backend`."""
+    stem, _ = os.path.splitext(weights)
+    if backend == "onnx":
+        return stem + ".onnx"
+    if backend == "openvino":
+        return stem + "_openvino_model"
+    if backend == "onnx_int8":
+        return stem + "_int8.onnx"
+    if backend == "openvino_int8":
+        return stem + "_int8_openvino_model"
+    return weights
+
+
+def export_detector(weights=DEFAULT_WEIGHTS, backend="onnx", imgsz=640):
+    """Export `weights` for `backend` and return the path of the exported model."""
+    backend = resolve_backend(backend)
+    if backend == "torch":
+        return weights
+    if backend in INT8_BACKENDS:
+        raise FileNotFoundError(
+            f"No {backend} model for {weights}; build one with "
+            f"`python -m human_face.quantization detector --backend {backend} --data <dataset.yaml>`"
+        )
+    from ultralytics import YOLO
+
+    # Dynamic batch so MultiCameraEngine can send several streams' frames at once
+    path = YOLO(weights).export(format=backend, imgsz=imgsz, dynamic=True)
+    logging.info(f"Exported {weights} to {path}")
+    return str(path)
+
+
+@functools.lru_cache(maxsize=None)
+def torch_device():
+    """Best torch device on this machine (MPS, then CUDA, then CPU); torch is imported on first call."""
+    import torch
+
+    if torch.backends.mps.is_available():
+        device = torch.device("mps")
+    elif torch.cuda.is_available():
+        device = torch.device("cuda:0")
+    else:
+        device = torch.device("cpu")
+    logging.info(f"Using device: {device}")
+    return device
+
+
+def detector_device(backend):
+    """Device to pass to predict/track: exported engines here are CPU builds."""
+    return torch_device() if backend == "torch" else "cpu"
+
+
+def ensure_export(backend=None, weights=DEFAULT_WEIGHTS, imgsz=640):
+    """Path of the `backend` model for `weights`, exporting it first if it does not exist yet."""
+    backend = resolve_backend(backend)
+    path = export_path(weights, backend)
+    if not os.path.exists(path):
+        logging.info(f"No {backend} export of {weights} yet, exporting...")
+        path = export_detector(weights, backend, imgsz=imgsz)
+    return path
+
+
+def load_detector(backend=None, weights=DEFAULT_WEIGHTS, imgsz=640):
+    """`YOLO` model for `backend`, exporting `weights` first if needed."""
+    from ultralytics import YOLO
+
+    return YOLO(ensure_export(backend, weights, imgsz), task="detect")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the person detector for a CPU inference backend.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export weights to ONNX and/or OpenVINO")
+    export.add_argument("--backend", choices=["onnx", "openvino", "all"], default="all")
+    source = export.add_mutually_exclusive_group()
+    source.add_argument("--weights", default=None, help=f"weights to export (default: {DEFAULT_WEIGHTS})")
+    source.add_argument("--run", default=None, help="training run under Training/runs, e.g. yolov12n")
+    export.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+
+    weights = run_weights(args.run) if args.run else (args.weights or DEFAULT_WEIGHTS)
+    backends = ["onnx", "openvino"] if args.backend == "all" else [args.backend]
+    for backend in backends:
+        print(f"{backend}: {export_detector(weights, backend, imgsz=args.imgsz)}")
+
+
+if __name__ == "__main__":
+    main()
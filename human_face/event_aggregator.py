@@ -0,0 +1,76 @@
+from collections import namedtuple
+
+# kind is "enter" when an identity appears, "heartbeat" while it stays in view and
+# "leave" once it is gone; dwell is seconds since it appeared.
+DetectionEvent = namedtuple("DetectionEvent", ["name", "timestamp", "kind", "dwell", "track_id"])
+
+
+class _Presence:
+    __slots__ = ("name", "track_id", "first_seen", "last_seen", "last_emitted")
+
+    def __init__(self, name, track_id, ts):
+        self.name = name
+        self.track_id = track_id
+        self.first_seen = ts
+        self.last_seen = ts
+        self.last_emitted = ts
+
+
+class EventAggregator:
+    """Turns per-frame (track, name) observations into enter/heartbeat/leave events.
+
+    A known identity is one presence per camera however many track IDs
+    ByteTrack gives it; each Unknown track is its own presence, since two
+    Unknown tracks are usually two different people.
+    """
+
+    def __init__(self, heartbeat_interval=60.0, leave_after=3.0):
+        self.heartbeat_interval = heartbeat_interval
+        self.leave_after = leave_after
+        self._present = {}
+        self._track_keys = {}
+
+    @staticmethod
+    def _key(track_id, name):
+        return ("Unknown", track_id) if name == "Unknown" else name
+
+    def observe(self, track_id, name, ts):
+        """Record that `track_id` was seen as `name` at `ts`; returns any events this causes."""
+        events = []
+        key = self._key(track_id, name)
+
+        previous = self._track_keys.get(track_id)
+        if previous is not None and previous != key and previous == ("Unknown", track_id):
+            # The track was recognised: close its Unknown presence straight away
+            presence = self._present.pop(previous, None)
+            if presence is not None:
+                events.append(self._leave(presence, ts))
+        self._track_keys[track_id] = key
+
+        presence = self._present.get(key)
+        if presence is None:
+            presence = self._present[key] = _Presence(name, track_id, ts)
+            events.append(DetectionEvent(name, ts, "enter", 0.0, track_id))
+        else:
+            presence.last_seen = ts
+            presence.track_id = track_id
+            if ts - presence.last_emitted >= self.heartbeat_interval:
+                presence.last_emitted = ts
+                events.append(DetectionEvent(name, ts, "heartbeat", ts - presence.first_seen, track_id))
+        return events
+
+    def _leave(self, presence, ts):
+        self._track_keys = {t: k for t, k in self._track_keys.items() if self._present.get(k) is not None}
+        return DetectionEvent(presence.name, presence.last_seen, "leave",
+                              presence.last_seen - presence.first_seen, presence.track_id)
+
+    def flush(self, ts, force=False):
+        """Emit leave events for presences unseen for `leave_after` seconds (or all, when `force`)."""
+        gone = [key for key, p in self._present.items() if force or ts - p.last_seen >= self.leave_after]
+        events = []
+        for key in gone:
+            events.append(self._leave(self._present.pop(key), ts))
+        return events
+
+    def __len__(self):
+        return len(self._present)
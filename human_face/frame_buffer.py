@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+
+
+class LatestFrameBuffer:
+    """Single-slot hand-off between grabber and processor where the newest frame wins.
+
+    `put` never blocks: it overwrites whatever the processor has not picked up
+    yet and counts it as dropped. `get` always returns the most recent frame,
+    so the processor never works on a backlog. Each frame gets a sequence
+    number; gaps between consecutive `get_packet` results are frames the
+    processor skipped. A trace frame ID given to `put` travels in the same
+    packet, so it cannot end up on another frame.
+
+    The `put`/`get`/`full`/`empty` methods mirror `queue.Queue` so either can
+    sit in `MultiPersonFaceRecognitionApp.frame_queue`.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._packet = None
+        self.seq = 0
+        self.dropped = 0
+        self.delivered = 0
+
+    def put(self, frame, block=True, timeout=None, frame_id=None):
+        """Make `frame` the pending one; returns its sequence number."""
+        with self._cond:
+            self.seq += 1
+            if self._packet is not None:
+                self.dropped += 1
+            self._packet = (self.seq, time.monotonic(), frame, frame_id)
+            self._cond.notify()
+            return self.seq
+
+    put_nowait = put
+
+    def get_packet(self, block=True, timeout=None):
+        """Return `(seq, grab_time, frame, frame_id)` for the newest frame; raises queue.Empty on timeout."""
+        with self._cond:
+            if self._packet is None:
+                if not block or not self._cond.wait_for(lambda: self._packet is not None, timeout):
+                    raise queue.Empty
+            packet, self._packet = self._packet, None
+            self.delivered += 1
+            return packet
+
+    def get(self, block=True, timeout=None):
+        return self.get_packet(block, timeout)[2]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def full(self):
+        # Never full: a new frame replaces the pending one
+        return False
+
+    def empty(self):
+        return self._packet is None
+
+    def qsize(self):
+        return 0 if self._packet is None else 1
+
+    def stats(self):
+        return {"produced": self.seq, "delivered": self.delivered, "dropped": self.dropped}
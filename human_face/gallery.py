@@ -0,0 +1,172 @@
+import hashlib
+
+import numpy as np
+
+
+def l2_normalize(vectors):
+    """Return a C-contiguous float32 copy of `vectors` with unit-length rows."""
+    vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class GalleryMatcher:
+    """Cosine-similarity matcher over a pre-normalized embedding gallery.
+
+    Rows are grouped by identity at build time so a batch of queries can be
+    scored with one matrix multiply and reduced to per-identity scores with a
+    single `np.maximum.reduceat`.
+    """
+
+    def __init__(self, encodings, names):
+        encodings = np.asarray(encodings, dtype=np.float32)
+        if len(names) != len(encodings):
+            raise ValueError(f"Got {len(encodings)} encodings but {len(names)} names")
+
+        order = np.argsort(np.asarray(names, dtype=object), kind="stable") if len(names) else np.array([], dtype=int)
+        sorted_names = [names[i] for i in order]
+
+        identities = []
+        starts = []
+        for row, name in enumerate(sorted_names):
+            if not identities or identities[-1] != name:
+                identities.append(name)
+                starts.append(row)
+
+        dim = encodings.shape[1] if encodings.ndim == 2 else 0
+        matrix = l2_normalize(encodings[order]) if len(order) else np.zeros((0, dim), dtype=np.float32)
+        self._set_layout(matrix, identities, starts, np.arange(len(identities)))
+
+    @classmethod
+    def from_groups(cls, matrix, identities, group_starts, group_identity):
+        """Wrap an already L2-normalized matrix (e.g. a read-only memmap) without copying it.
+
+        Rows from `group_starts[i]` up to the next start belong to
+        `identities[group_identity[i]]`, or to nobody when that entry is -1.
+        """
+        matcher = cls.__new__(cls)
+        matcher._set_layout(matrix, identities, group_starts, group_identity)
+        return matcher
+
+    def _set_layout(self, matrix, identities, group_starts, group_identity):
+        self.matrix = matrix
+        self.dim = matrix.shape[1]
+        self.identities = list(identities)
+        self.group_starts = np.asarray(group_starts, dtype=np.intp)
+        self.group_identity = np.asarray(group_identity, dtype=np.intp)
+        group_sizes = np.diff(np.append(self.group_starts, len(matrix)))
+        self.row_identity = np.repeat(self.group_identity, group_sizes)
+        self.num_rows = int(np.count_nonzero(self.row_identity >= 0))
+        self._one_group_per_identity = np.array_equal(self.group_identity, np.arange(len(self.identities)))
+        self._one_row_per_identity = self._one_group_per_identity and len(matrix) == len(self.identities)
+        self.index = None
+
+    def attach_index(self, index):
+        """Route `search` through an approximate index built over `self.matrix`."""
+        self.index = index
+        return self
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def num_identities(self):
+        return len(self.identities)
+
+    @property
+    def row_names(self):
+        return [self.identities[i] for i in self.row_identity if i >= 0]
+
+    def fingerprint(self):
+        """Cheap identity of the gallery layout, used to tell whether a saved index is stale.
+
+        Hashes the identities, the row grouping and a strided sample of rows
+        rather than the full matrix.
+        """
+        digest = hashlib.sha1(f"{self.matrix.shape}".encode())
+        for name in self.identities:
+            digest.update(name.encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(self.group_starts.tobytes())
+        digest.update(self.group_identity.tobytes())
+        digest.update(np.ascontiguousarray(self.matrix[::max(1, len(self.matrix) // 256)]).tobytes())
+        return digest.hexdigest()
+
+    def identity_scores(self, queries):
+        """Return an (n_queries, n_identities) matrix of best cosine similarity per identity."""
+        queries = l2_normalize(queries)
+        scores = queries @ self.matrix.T
+        if self._one_row_per_identity:
+            return scores
+        group_scores = np.maximum.reduceat(scores, self.group_starts, axis=1)
+        if self._one_group_per_identity:
+            return group_scores
+        out = np.full((len(scores), len(self.identities)), -np.inf, dtype=np.float32)
+        live = self.group_identity >= 0
+        np.maximum.at(out.T, self.group_identity[live], group_scores[:, live].T)
+        return out
+
+    def search(self, queries, k=1):
+        """Top-k identities per query.
+
+        Returns `(names, scores)` where `names[i]` is a list of up to k identity
+        names for query i and `scores` is an (n_queries, k) float32 array.
+        """
+        queries = np.atleast_2d(queries)
+        if len(self) == 0 or len(queries) == 0:
+            return [[] for _ in range(len(queries))], np.zeros((len(queries), 0), dtype=np.float32)
+
+        if self.index is not None:
+            return self._search_index(queries, k)
+
+        scores = self.identity_scores(queries)
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        names = [[self.identities[j] for j in row] for row in top]
+        return names, top_scores
+
+    def _search_index(self, queries, k):
+        # Over-fetch rows so several poses of one identity don't crowd out the top-k.
+        row_ids, row_scores = self.index.search(queries, k=k * 8)
+        names, scores = [], np.zeros((len(queries), k), dtype=np.float32)
+        for qi, (ids, sims) in enumerate(zip(row_ids, row_scores)):
+            seen = []
+            for row, sim in zip(ids, sims):
+                if row < 0:
+                    break
+                identity = self.row_identity[row]
+                if identity < 0 or identity in seen:
+                    continue
+                scores[qi, len(seen)] = sim
+                seen.append(identity)
+                if len(seen) == k:
+                    break
+            names.append([self.identities[i] for i in seen])
+        return names, scores[:, :max((len(n) for n in names), default=0)]
+
+    def match(self, queries, threshold):
+        """Best identity per query as `(name, score)`, with "Unknown" below threshold."""
+        names, scores = self.search(queries, k=1)
+        results = []
+        for row_names, row_scores in zip(names, scores):
+            if row_names and row_scores[0] >= threshold:
+                results.append((row_names[0], float(row_scores[0])))
+            else:
+                results.append(("Unknown", float(row_scores[0]) if len(row_scores) else 0.0))
+        return results
+
+    @staticmethod
+    def similarity(emb1, emb2):
+        """Cosine similarity between two single embeddings."""
+        a = np.asarray(emb1, dtype=np.float32).ravel()
+        b = np.asarray(emb2, dtype=np.float32).ravel()
+        denom = np.linalg.norm(a) * np.linalg.norm(b)
+        return float(a @ b / denom) if denom else 0.0
@@ -0,0 +1,298 @@
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+
+from human_face.ann_index import ANN_INDEX_FILE, maybe_attach_index
+from human_face.gallery import GalleryMatcher, l2_normalize
+
+DEFAULT_GALLERY_DIR = "face_gallery"
+LEGACY_FACE_DATA_DIR = "face_data"
+
+
+class PackedGalleryStore:
+    """Single-directory face gallery backed by one memory-mapped embedding matrix.
+
+    Layout of `root`:
+        embeddings.f32  raw float32 rows, L2-normalized, `dim` columns
+        manifest.json   dim, row count and each identity's (offset, count) after the last compaction
+        append.log      JSON lines of add/remove operations since the last compaction
+
+    New rows are appended to the end of embeddings.f32 and recorded in the log,
+    so enrolling a person never rewrites the matrix. Readers map the file
+    read-only, so every process using the gallery shares the same pages.
+    """
+
+    EMBEDDINGS = "embeddings.f32"
+    MANIFEST = "manifest.json"
+    LOG = "append.log"
+
+    def __init__(self, root=DEFAULT_GALLERY_DIR, dim=512):
+        self.root = root
+        self.dim = dim
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        # name -> list of (offset, count) row segments, in enrolment order
+        self.segments = {}
+        self.rows = 0
+        self.log_entries = 0
+
+    @classmethod
+    def exists(cls, root=DEFAULT_GALLERY_DIR):
+        return os.path.isfile(os.path.join(root, cls.MANIFEST))
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def open(self):
+        with open(self._path(self.MANIFEST)) as f:
+            manifest = json.load(f)
+        self.dim = manifest["dim"]
+        self.rows = manifest["rows"]
+        self.segments = {entry["name"]: [(entry["offset"], entry["count"])] for entry in manifest["identities"]}
+
+        self.log_entries = 0
+        if os.path.exists(self._path(self.LOG)):
+            with open(self._path(self.LOG)) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        op = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crashed writer; its rows are simply unreferenced.
+                        logging.warning(f"Skipping malformed gallery log line in {self.root}")
+                        continue
+                    self._apply(op)
+                    self.log_entries += 1
+
+        self._map()
+        return self
+
+    def _apply(self, op):
+        if op["op"] == "add":
+            if op.get("replace"):
+                self.segments.pop(op["name"], None)
+            self.segments.setdefault(op["name"], []).append((op["offset"], op["count"]))
+            self.rows = max(self.rows, op["offset"] + op["count"])
+        elif op["op"] == "remove":
+            self.segments.pop(op["name"], None)
+
+    def _map(self):
+        if self.rows == 0:
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+        else:
+            self.matrix = np.memmap(self._path(self.EMBEDDINGS), dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+
+    @property
+    def identities(self):
+        return sorted(self.segments)
+
+    def __len__(self):
+        return sum(count for segs in self.segments.values() for _, count in segs)
+
+    def matcher(self):
+        """Build a GalleryMatcher that scores directly against the shared memmap.
+
+        Identities left without rows (emptied by a remove, awaiting compaction)
+        are left out, so they never come back as a -inf runner-up.
+        """
+        identities = sorted(name for name, segs in self.segments.items() if any(count > 0 for _, count in segs))
+        index_of = {name: idx for idx, name in enumerate(identities)}
+        owned = sorted(
+            (offset, count, index_of[name])
+            for name, segs in self.segments.items()
+            for offset, count in segs
+            if count > 0
+        )
+        starts, owners = [], []
+        cursor = 0
+        for offset, count, owner in owned:
+            if offset > cursor:
+                # rows of removed or replaced identities
+                starts.append(cursor)
+                owners.append(-1)
+            starts.append(offset)
+            owners.append(owner)
+            cursor = offset + count
+        if cursor < self.rows:
+            starts.append(cursor)
+            owners.append(-1)
+        return GalleryMatcher.from_groups(self.matrix, identities, starts, owners)
+
+    def embeddings_for(self, name):
+        return np.vstack([self.matrix[offset:offset + count] for offset, count in self.segments.get(name, [])])
+
+    # === Writers ===
+    def create(self):
+        """Initialise an empty gallery at `root`."""
+        os.makedirs(self.root, exist_ok=True)
+        open(self._path(self.EMBEDDINGS), "wb").close()
+        open(self._path(self.LOG), "w").close()
+        self.segments, self.rows, self.log_entries = {}, 0, 0
+        self._write_manifest()
+        self._map()
+        return self
+
+    def _write_manifest(self):
+        identities = []
+        for name in sorted(self.segments):
+            (offset, count), = self.segments[name]
+            identities.append({"name": name, "offset": offset, "count": count})
+        manifest = {"version": 1, "dim": self.dim, "rows": self.rows, "identities": identities}
+        tmp = self._path(self.MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._path(self.MANIFEST))
+
+    def _append_log(self, op):
+        with open(self._path(self.LOG), "a") as f:
+            f.write(json.dumps(op) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(op)
+        self.log_entries += 1
+
+    def add(self, name, embeddings, replace=True):
+        """Append embeddings for `name`; by default they replace any existing ones."""
+        rows = l2_normalize(np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim))
+        row_bytes = self.dim * 4
+        with open(self._path(self.EMBEDDINGS), "ab") as f:
+            size = f.tell()
+            if size % row_bytes:
+                # Realign after a torn write so offsets stay whole rows.
+                f.write(b"\0" * (row_bytes - size % row_bytes))
+            offset = -(-size // row_bytes)
+            f.write(rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._append_log({"op": "add", "name": name, "offset": offset, "count": len(rows), "replace": replace})
+        self._map()
+
+    def remove(self, name):
+        if name in self.segments:
+            self._append_log({"op": "remove", "name": name})
+
+    def compact(self):
+        """Rewrite the matrix grouped by identity, dropping dead rows, and clear the log.
+
+        Processes that already mapped the old file keep reading it until they
+        reopen; on Windows the replace fails while any process still maps it.
+        """
+        tmp = self._path(self.EMBEDDINGS + ".tmp")
+        segments, offset = {}, 0
+        with open(tmp, "wb") as f:
+            for name in sorted(self.segments):
+                rows = self.embeddings_for(name)
+                f.write(np.ascontiguousarray(rows, dtype=np.float32).tobytes())
+                segments[name] = [(offset, len(rows))]
+                offset += len(rows)
+        # Drop our own mapping before replacing the file it points at.
+        self.matrix = None
+        os.replace(tmp, self._path(self.EMBEDDINGS))
+        self.segments, self.rows = segments, offset
+        self._write_manifest()
+        open(self._path(self.LOG), "w").close()
+        self.log_entries = 0
+        self._map()
+
+
+def iter_legacy_gallery(data_root=LEGACY_FACE_DATA_DIR):
+    """Yield `(person_name, embeddings)` from the per-person `encoding_N.npy` layout."""
+    for person_name in sorted(os.listdir(data_root)):
+        folder = os.path.join(data_root, person_name)
+        if not os.path.isdir(folder):
+            continue
+        files = sorted(f for f in os.listdir(folder) if f.startswith("encoding_") and f.endswith(".npy"))
+        if files:
+            yield person_name, np.vstack([np.load(os.path.join(folder, f)).reshape(1, -1) for f in files])
+
+
+def migrate_legacy_gallery(src=LEGACY_FACE_DATA_DIR, dst=DEFAULT_GALLERY_DIR):
+    """Pack a `face_data/<person>/encoding_N.npy` tree into a PackedGalleryStore at `dst`.
+
+    Landmarks and face images are left in `src`; only embeddings are needed for matching.
+    """
+    people = list(iter_legacy_gallery(src))
+    dim = people[0][1].shape[1] if people else 512
+    store = PackedGalleryStore(dst, dim=dim).create()
+    tmp = store._path(store.EMBEDDINGS)
+    offset = 0
+    with open(tmp, "wb") as f:
+        for name, embeddings in people:
+            f.write(l2_normalize(embeddings).tobytes())
+            store.segments[name] = [(offset, len(embeddings))]
+            offset += len(embeddings)
+    store.rows = offset
+    store._write_manifest()
+    store._map()
+    logging.info(f"Migrated {len(people)} people ({offset} embeddings) from {src} to {dst}")
+    return store
+
+
+def sync_person(person_name, legacy_dir=LEGACY_FACE_DATA_DIR, gallery_dir=DEFAULT_GALLERY_DIR):
+    """Mirror one person's legacy folder into the packed gallery, if one has been migrated.
+
+    Called after registration or deletion so both layouts stay in step.
+    """
+    if not PackedGalleryStore.exists(gallery_dir):
+        return
+    store = PackedGalleryStore(gallery_dir).open()
+    folder = os.path.join(legacy_dir, person_name)
+    files = sorted(f for f in os.listdir(folder) if f.startswith("encoding_") and f.endswith(".npy")) \
+        if os.path.isdir(folder) else []
+    if files:
+        store.add(person_name, np.vstack([np.load(os.path.join(folder, f)).reshape(1, -1) for f in files]))
+    else:
+        store.remove(person_name)
+
+
+def load_gallery_matcher(gallery_dir=DEFAULT_GALLERY_DIR, legacy_dir=LEGACY_FACE_DATA_DIR):
+    """Open the packed gallery if present, otherwise fall back to walking the legacy folders.
+
+    Large galleries also get an IVF index, saved next to whichever source was used.
+    """
+    if PackedGalleryStore.exists(gallery_dir):
+        matcher = PackedGalleryStore(gallery_dir).open().matcher()
+        index_dir = gallery_dir
+    else:
+        encodings, names = [], []
+        if os.path.isdir(legacy_dir):
+            for person_name, embeddings in iter_legacy_gallery(legacy_dir):
+                encodings.extend(embeddings)
+                names.extend([person_name] * len(embeddings))
+        matcher = GalleryMatcher(encodings, names)
+        index_dir = legacy_dir
+    return maybe_attach_index(matcher, os.path.join(index_dir, ANN_INDEX_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the packed face gallery.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="pack a face_data/<person>/encoding_N.npy tree")
+    migrate.add_argument("--src", default=LEGACY_FACE_DATA_DIR)
+    migrate.add_argument("--dst", default=DEFAULT_GALLERY_DIR)
+
+    compact = sub.add_parser("compact", help="fold the append log back into the matrix")
+    compact.add_argument("--gallery", default=DEFAULT_GALLERY_DIR)
+
+    info = sub.add_parser("info", help="print gallery statistics")
+    info.add_argument("--gallery", default=DEFAULT_GALLERY_DIR)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+
+    if args.command == "migrate":
+        store = migrate_legacy_gallery(args.src, args.dst)
+    else:
+        store = PackedGalleryStore(args.gallery).open()
+        if args.command == "compact":
+            store.compact()
+    print(f"[INFO] {store.root}: {len(store.identities)} people, {len(store)} embeddings, "
+          f"{store.rows} rows on disk, {store.log_entries} pending log entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+from human_face.ann_index import ANN_INDEX_FILE, build_index, maybe_attach_index
+from human_face.gallery import GalleryMatcher
+from human_face.gallery_store import DEFAULT_GALLERY_DIR, LEGACY_FACE_DATA_DIR, PackedGalleryStore
+
+
+class GalleryReloader:
+    """Keeps a GalleryMatcher in step with the gallery on disk.
+
+    `reload()` rescans the packed store (manifest + append log) or the legacy
+    `face_data/<person>/` folders and only re-reads identities whose files
+    changed. The new matcher is built off to the side and published with a
+    single attribute assignment, so readers holding `self.matcher` never see a
+    half-built gallery and are never blocked.
+
+    Large galleries carry an IVF index. A change extends the current index
+    with its trained centroids, so a new identity is searchable on the next
+    poll; k-means retraining only happens once the gallery has drifted, on a
+    background thread, while the extended index keeps serving.
+    """
+
+    def __init__(self, gallery_dir=DEFAULT_GALLERY_DIR, legacy_dir=LEGACY_FACE_DATA_DIR):
+        self.gallery_dir = gallery_dir
+        self.legacy_dir = legacy_dir
+        self.matcher = GalleryMatcher([], [])
+        self.version = 0
+        # person -> (signature, embeddings) for the legacy layout
+        self._legacy_cache = {}
+        self._packed_signature = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._retrain_thread = None
+        self.reload()
+
+    # === Change detection ===
+    def _packed_state(self):
+        sig = []
+        for name in (PackedGalleryStore.MANIFEST, PackedGalleryStore.LOG):
+            try:
+                st = os.stat(os.path.join(self.gallery_dir, name))
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _person_signature(self, folder):
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in os.scandir(folder)
+            if entry.name.startswith("encoding_") and entry.name.endswith(".npy")
+        ))
+
+    def _reload_packed(self):
+        signature = self._packed_state()
+        if signature == self._packed_signature:
+            return None
+        matcher = PackedGalleryStore(self.gallery_dir).open().matcher()
+        self._packed_signature = signature
+        return matcher, f"packed gallery {self.gallery_dir}"
+
+    def _reload_legacy(self):
+        people = {}
+        if os.path.isdir(self.legacy_dir):
+            for entry in os.scandir(self.legacy_dir):
+                if entry.is_dir():
+                    people[entry.name] = entry.path
+
+        cache = dict(self._legacy_cache)
+        added, changed, removed = [], [], [name for name in cache if name not in people]
+        for name in removed:
+            del cache[name]
+        for name, folder in people.items():
+            try:
+                signature = self._person_signature(folder)
+            except OSError:
+                continue
+            cached = cache.get(name)
+            if cached is not None and cached[0] == signature:
+                continue
+            try:
+                embeddings = [np.load(os.path.join(folder, f)).reshape(-1) for f, _, _ in signature]
+            except Exception as e:
+                # Most likely a file still being written; keep the old entry and retry next poll.
+                logging.warning(f"Gallery reload: skipping {name} for now: {e}")
+                continue
+            (changed if cached is not None else added).append(name)
+            cache[name] = (signature, embeddings)
+
+        if not (added or changed or removed):
+            return None
+        encodings, names = [], []
+        for name, (_, embeddings) in cache.items():
+            encodings.extend(embeddings)
+            names.extend([name] * len(embeddings))
+        self._legacy_cache = cache
+        summary = f"+{len(added)} ~{len(changed)} -{len(removed)} identities"
+        return GalleryMatcher(encodings, names), summary
+
+    # === Public API ===
+    def reload(self):
+        """Pick up gallery changes; returns True when a new matcher was published."""
+        with self._lock:
+            try:
+                if PackedGalleryStore.exists(self.gallery_dir):
+                    result = self._reload_packed()
+                    index_dir = self.gallery_dir
+                else:
+                    result = self._reload_legacy()
+                    index_dir = self.legacy_dir
+            except Exception as e:
+                logging.error(f"Gallery reload failed: {e}")
+                return False
+            if result is None:
+                return False
+
+            matcher, summary = result
+            index_path = os.path.join(index_dir, ANN_INDEX_FILE)
+            maybe_attach_index(matcher, index_path, previous=self.matcher.index)
+            self.matcher = matcher
+            self.version += 1
+            logging.info(f"Gallery v{self.version}: {summary}; "
+                         f"{len(matcher)} encodings for {matcher.num_identities} persons")
+            if matcher.index is not None and matcher.index.needs_retrain():
+                self._start_retrain(matcher, index_path)
+            return True
+
+    def _start_retrain(self, matcher, index_path):
+        if self._retrain_thread is not None and self._retrain_thread.is_alive():
+            return
+        self._retrain_thread = threading.Thread(target=self._retrain, args=(matcher, index_path),
+                                                name="gallery-index-retrain", daemon=True)
+        self._retrain_thread.start()
+
+    def _retrain(self, matcher, index_path):
+        try:
+            index = build_index(matcher.matrix, matcher.fingerprint(), index_path)
+        except Exception as e:
+            logging.error(f"ANN index retrain failed: {e}")
+            return
+        with self._lock:
+            current = self.matcher
+            if current.index is None:
+                return
+            if current is not matcher:
+                # The gallery changed while training; catch the new index up to it
+                index = index.extend(current.matrix, current.fingerprint())
+            current.attach_index(index)
+
+    def start(self, stop_event, interval=2.0):
+        """Poll for changes every `interval` seconds on a daemon thread until `stop_event` is set."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def poll():
+            while not stop_event.wait(interval):
+                self.reload()
+
+        self._thread = threading.Thread(target=poll, name="gallery-reloader", daemon=True)
+        self._thread.start()
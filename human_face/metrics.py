@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Hot-path stage timings, counters and gauges for the recognition pipeline.
+# Off unless $SECUREVISION_METRICS is set (or `METRICS.enabled = True`); while
+# off every call returns straight away, so the instrumentation can stay in
+# the frame loop. `METRICS.serve()` exposes them as Prometheus text.
+
+METRICS_ENV = "SECUREVISION_METRICS"
+METRICS_PORT = 9108
+# Seconds; 1 ms up to 2.5 s covers capture through a slow face pass
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PERCENTILES = (50, 95, 99)
+
+
+class RollingHistogram:
+    """Cumulative bucket counts for Prometheus plus the last `window` samples for percentiles."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "recent", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+            self.recent.append(value)
+
+    def percentiles(self, ps=PERCENTILES):
+        """`{p: value}` over the rolling window; empty while nothing was observed."""
+        with self._lock:
+            values = sorted(self.recent)
+        if not values:
+            return {}
+        return {p: values[min(len(values) - 1, int(len(values) * p / 100))] for p in ps}
+
+    def cumulative(self):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        running, buckets = 0, []
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            buckets.append((bound, running))
+        return buckets, total, count
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "labels", "start")
+
+    def __init__(self, metrics, stage, labels):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A block that raised (e.g. a queue wait that timed out) is not a latency sample
+        if exc_type is None:
+            self.metrics.observe(self.stage, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def _format_labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """Process-wide registry of stage latencies, counters and gauges.
+
+    Labels are tuples of `(key, value)` pairs, e.g. `(("camera", "lobby"),)`,
+    so callers build them once and the hot path only hashes a tuple.
+    """
+
+    def __init__(self, enabled=False, window=1024, prefix="securevision"):
+        self.enabled = enabled
+        self.window = window
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._gauges = {}
+        self._server = None
+
+    def timer(self, stage, labels=()):
+        """Context manager that records its block's duration under `stage`."""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, stage, labels)
+
+    def observe(self, stage, seconds, labels=()):
+        if not self.enabled:
+            return
+        key = (stage, labels)
+        hist = self._stages.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(key, RollingHistogram(window=self.window))
+        hist.observe(seconds)
+
+    def inc(self, name, amount=1, labels=()):
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, labels=()):
+        if not self.enabled:
+            return
+        self._gauges[(name, labels)] = value
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def snapshot(self):
+        """Plain dicts for the dashboard: stage percentiles in ms, counters and gauges."""
+        with self._lock:
+            stages = list(self._stages.items())
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        rows = []
+        for (stage, labels), hist in sorted(stages, key=lambda item: (item[0][1], item[0][0])):
+            row = {"stage": stage, **dict(labels), "count": hist.count}
+            row.update({f"p{p} ms": round(v * 1e3, 2) for p, v in hist.percentiles().items()})
+            rows.append(row)
+        return {
+            "stages": rows,
+            "counters": [{"name": name, **dict(labels), "value": v} for (name, labels), v in sorted(counters.items())],
+            "gauges": [{"name": name, **dict(labels), "value": v} for (name, labels), v in sorted(gauges.items())],
+        }
+
+    def render(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+        p = self.prefix
+        lines = [f"# HELP {p}_stage_seconds Pipeline stage latency.", f"# TYPE {p}_stage_seconds histogram"]
+        for (stage, labels), hist in stages:
+            base = (("stage", stage),) + labels
+            buckets, total, count = hist.cumulative()
+            for bound, n in buckets:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{p}_stage_seconds_bucket{_format_labels(base, (('le', le),))} {n}")
+            lines.append(f"{p}_stage_seconds_sum{_format_labels(base)} {total}")
+            lines.append(f"{p}_stage_seconds_count{_format_labels(base)} {count}")
+        lines += [f"# HELP {p}_stage_rolling_seconds Stage latency percentiles over the last {self.window} frames.",
+                  f"# TYPE {p}_stage_rolling_seconds gauge"]
+        for (stage, labels), hist in stages:
+            base = (("stage", stage),) + labels
+            for pct, v in hist.percentiles().items():
+                lines.append(f"{p}_stage_rolling_seconds{_format_labels(base, (('quantile', pct / 100),))} {v}")
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines += [f"{p}_{name}_total{_format_labels(labels)} {v}" for (n, labels), v in counters if n == name]
+        for name in sorted({name for (name, _), _ in gauges}):
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines += [f"{p}_{name}{_format_labels(labels)} {v}" for (n, labels), v in gauges if n == name]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """Enable collection and expose /metrics on a daemon thread; later calls reuse the server."""
+        self.enabled = True
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.info(f"Metrics at http://{host}:{port}/metrics")
+        return self._server
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+METRICS = Metrics(enabled=os.environ.get(METRICS_ENV, "") not in ("", "0"))
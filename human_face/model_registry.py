@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from human_face.detector_backends import DEFAULT_WEIGHTS, detector_device, load_detector, resolve_backend
+from human_face.gallery_watcher import GalleryReloader
+from human_face.perf_utils import process_rss_mb
+from human_face.quantization import face_model_pack
+
+# One copy of each model per process. Every pipeline (the video page, the
+# drone page, the multi-camera engine) borrows from REGISTRY instead of
+# loading YOLO, running FaceAnalysis.prepare and scanning the gallery itself.
+
+
+class ModelEntry:
+    """A loaded model plus what it cost: load and warm-up seconds, and the RSS it added."""
+
+    __slots__ = ("key", "model", "lock", "load_seconds", "warmup_seconds", "memory_mb")
+
+    def __init__(self, key, model, load_seconds, warmup_seconds, memory_mb):
+        self.key = key
+        self.model = model
+        # Held around inference: ultralytics predictors are not safe to call from two threads at once
+        self.lock = threading.Lock()
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.memory_mb = memory_mb
+
+
+class ModelRegistry:
+    """Thread-safe, load-once store of the detector, face models and gallery.
+
+    Loads are serialised, so concurrent first requests for a model wait for
+    the one load instead of starting their own, and the RSS growth around
+    each load is attributable to that model.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._load_lock = threading.RLock()
+        # Registry-owned objects (the gallery poller) live as long as the process
+        self.stop_event = threading.Event()
+
+    def _get(self, key, load, warmup=None):
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        with self._load_lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            before = process_rss_mb()
+            start = time.perf_counter()
+            model = load()
+            loaded = time.perf_counter()
+            if warmup is not None:
+                warmup(model)
+            warmed = time.perf_counter()
+            after = process_rss_mb()
+            memory = round(after - before, 1) if before is not None and after is not None else None
+            entry = ModelEntry(key, model, loaded - start, warmed - loaded, memory)
+            self._entries[key] = entry
+            logging.info(f"Model registry: loaded {key} in {entry.load_seconds:.1f}s "
+                         f"(+{entry.warmup_seconds:.1f}s warm-up, {memory} MB)")
+            return entry
+
+    def detector(self, backend=None, weights=DEFAULT_WEIGHTS, warmup=True):
+        """Shared YOLO detector entry for `backend`; `.model` to predict with, under `.lock`."""
+        backend = resolve_backend(backend)
+        return self._get(("detector", backend, weights), lambda: load_detector(backend, weights),
+                         (lambda model: _warm_detector(model, backend)) if warmup else None)
+
+    def face_app(self, face_model=None, warmup=True):
+        """Shared, prepared InsightFace FaceAnalysis (detection + recognition) entry."""
+        pack = face_model_pack(face_model)
+
+        def load():
+            from insightface.app import FaceAnalysis
+
+            app = FaceAnalysis(name=pack, root=os.path.abspath("face_models"),
+                               allowed_modules=["detection", "recognition"])
+            app.prepare(ctx_id=0)
+            app.det_size = (640, 640)
+            return app
+
+        return self._get(("face", pack), load, _warm_face_app if warmup else None)
+
+    def gallery(self, gallery_dir="face_gallery", legacy_dir="face_data"):
+        """Shared gallery, polled for new registrations for the life of the process."""
+        def load():
+            gallery = GalleryReloader(gallery_dir, legacy_dir)
+            gallery.start(self.stop_event)
+            return gallery
+
+        return self._get(("gallery", gallery_dir, legacy_dir), load)
+
+    def app_kwargs(self, detector_backend=None, face_model=None):
+        """Keyword arguments that make a MultiPersonFaceRecognitionApp borrow the shared models."""
+        detector = self.detector(detector_backend)
+        return {
+            "model": detector.model,
+            "model_lock": detector.lock,
+            "face_app": self.face_app(face_model).model,
+            "gallery": self.gallery().model,
+            "detector_backend": detector_backend,
+            "face_model": face_model,
+        }
+
+    def stats(self):
+        """One row per loaded model: what it is, load and warm-up seconds, and the memory it added."""
+        return [
+            {"model": " / ".join(str(part) for part in entry.key), "load s": round(entry.load_seconds, 2),
+             "warm-up s": round(entry.warmup_seconds, 2), "memory MB": entry.memory_mb}
+            for entry in list(self._entries.values())
+        ]
+
+
+def _warm_detector(model, backend):
+    # First predict builds the predictor and, for ONNX/OpenVINO, compiles the graph. Ultralytics keeps
+    # the device of that first call, so warm on the one inference will use or it sets up again
+    model.predict(np.zeros((640, 640, 3), dtype=np.uint8), imgsz=640, device=detector_device(backend),
+                  verbose=False)
+
+
+def _warm_face_app(app):
+    app.get(np.zeros((640, 640, 3), dtype=np.uint8))
+    recognizer = app.models.get("recognition")
+    if recognizer is not None:
+        recognizer.get_feat(np.zeros((112, 112, 3), dtype=np.uint8))
+
+
+REGISTRY = ModelRegistry()
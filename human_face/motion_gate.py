@@ -0,0 +1,61 @@
+import cv2
+
+
+class MotionGate:
+    """Cheap change detector that decides whether a frame needs YOLO at all.
+
+    Each frame is shrunk to a small blurred greyscale thumbnail and compared
+    with a running-average background. If fewer than `min_changed_fraction`
+    of the thumbnail's pixels moved by more than `pixel_threshold`, the scene
+    is static and detection can be skipped; the caller reuses its last
+    tracks. A full detection still runs every `max_skip_frames` so slow
+    changes the background model absorbs are not missed.
+    """
+
+    def __init__(self, width=160, pixel_threshold=25, min_changed_fraction=0.002, alpha=0.05,
+                 max_skip_frames=50):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.alpha = alpha
+        self.max_skip_frames = max_skip_frames
+        self._background = None
+        self._since_detect = 0
+        self.frames = 0
+        self.skipped = 0
+        self.last_changed_fraction = 0.0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def changed_fraction(self, frame):
+        """Fraction of thumbnail pixels that differ from the background; updates the background."""
+        thumb = self._thumbnail(frame)
+        if self._background is None or self._background.shape != thumb.shape:
+            self._background = thumb.astype("float32")
+            return 1.0
+        diff = cv2.absdiff(thumb, cv2.convertScaleAbs(self._background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(thumb, self._background, self.alpha)
+        return changed / thumb.size
+
+    def should_detect(self, frame):
+        """True when `frame` differs enough from the background (or a refresh is due)."""
+        self.frames += 1
+        self.last_changed_fraction = self.changed_fraction(frame)
+        if self.last_changed_fraction >= self.min_changed_fraction or self._since_detect >= self.max_skip_frames:
+            self._since_detect = 0
+            return True
+        self._since_detect += 1
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+        }
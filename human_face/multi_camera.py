@@ -0,0 +1,214 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from human_face.detector_backends import DEFAULT_WEIGHTS, detector_device, load_detector, resolve_backend
+from human_face.gallery_watcher import GalleryReloader
+from human_face.metrics import METRICS
+from human_face.tracing import TRACER
+from human_face.preprocess import detector_imgsz
+from human_face.quantization import face_model_pack
+from human_face.securevision import DEFAULT_FACE_PASS, MultiPersonFaceRecognitionApp
+from human_face.tracker import track_result
+
+
+def source_to_stream_url(source):
+    """Turn a `video_source_registry` entry into something cv2.VideoCapture accepts."""
+    if source["source_type"] == "Webcam":
+        return int(source["source_input"])
+    return source["source_input"]
+
+
+class CameraStream:
+    """One registered source: its own capture, buffers, ByteTrack state and recognition state."""
+
+    def __init__(self, name, app):
+        self.name = name
+        self.app = app
+        self.frames_processed = 0
+
+    @property
+    def tracker(self):
+        return self.app.tracker
+
+
+class MultiCameraEngine:
+    """Runs N camera sources against one YOLO model and one InsightFace model.
+
+    Each stream keeps its own grabber thread, latest-frame buffer and
+    ByteTrack tracker. A single inference thread takes the newest frame from
+    every stream that has one, runs them through YOLO as one batch, updates
+    each stream's tracker, then fans out face recognition and drawing per
+    stream on a thread pool (InsightFace/ONNX Runtime releases the GIL).
+    """
+
+    def __init__(self, sources, weights=DEFAULT_WEIGHTS, tracker_cfg="bytrack/bytetrack.yaml",
+                 face_pass=DEFAULT_FACE_PASS, recognition_budget=4, conf=0.25, iou=0.20, batch_wait=0.005,
+                 detector_backend=None, face_model=None, draw=True, sound_alerts=True, model=None,
+                 model_lock=None, face_app=None, gallery=None):
+        # model / face_app / gallery can be borrowed (see human_face.model_registry) instead of loaded here
+        self.detector_backend = resolve_backend(detector_backend)
+        self.model = model if model is not None else load_detector(self.detector_backend, weights)
+        self.model_lock = model_lock or threading.Lock()
+        self.device = detector_device(self.detector_backend)
+        self.tracker_cfg = tracker_cfg
+        self.conf = conf
+        self.iou = iou
+        # After the first frame arrives, wait this long for other streams to fill the batch
+        self.batch_wait = batch_wait
+
+        if face_app is None:
+            from insightface.app import FaceAnalysis
+
+            face_app = FaceAnalysis(name=face_model_pack(face_model), root=os.path.abspath("face_models"),
+                                    allowed_modules=["detection", "recognition"])
+            face_app.prepare(ctx_id=0)
+            face_app.det_size = (640, 640)
+
+        self.stop_event = threading.Event()
+        if gallery is None:
+            gallery = GalleryReloader("face_gallery", "face_data")
+            gallery.start(self.stop_event)
+        self.gallery = gallery
+
+        self.streams = []
+        for source in sources:
+            app = MultiPersonFaceRecognitionApp(
+                stream_url=source_to_stream_url(source),
+                face_pass=face_pass,
+                recognition_budget=recognition_budget,
+                frame_buffer="latest",
+                model=self.model,
+                model_lock=self.model_lock,
+                face_app=face_app,
+                gallery=self.gallery,
+                detector_backend=self.detector_backend,
+                motion_gate=source.get("motion_gate", False),
+                roi=source.get("roi"),
+            )
+            # Streams share the engine's lifetime
+            app.stop_event = self.stop_event
+            app.metric_labels = (("camera", source["name"]),)
+            app.draw = draw
+            app.sound_alerts = sound_alerts
+            if self.tracker_cfg != app.TRACK_CFG:
+                app.use_tracker(self.tracker_cfg)
+            self.streams.append(CameraStream(source["name"], app))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.streams)), thread_name_prefix="camera")
+        self._threads = []
+        self.batches = 0
+        self.frames = 0
+
+
+    def _collect_batch(self):
+        """Newest pending frame from every stream, waiting briefly so slower streams can join."""
+        batch = []
+        deadline = None
+        pending = list(self.streams)
+        while pending and not self.stop_event.is_set():
+            for stream in list(pending):
+                try:
+                    frame = stream.app.next_frame(timeout=0)
+                except queue.Empty:
+                    continue
+                batch.append((stream, frame))
+                pending.remove(stream)
+            if batch and deadline is None:
+                deadline = time.monotonic() + self.batch_wait
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.001)
+        return batch
+
+
+    def _analyze(self, stream, frame, tracked):
+        boxes, ids, confs = tracked
+        with METRICS.timer("analyze", stream.app.metric_labels), \
+                TRACER.span("analyze", stream.app.current_frame_id, camera=stream.name):
+            display_frame = stream.app.analyze_frame(frame, boxes, ids, confs)
+        stream.app.publish(display_frame)
+        METRICS.inc("frames_processed", labels=stream.app.metric_labels)
+        stream.frames_processed += 1
+
+    def inference_worker(self):
+        logging.info(f"Multi-camera inference started for {len(self.streams)} streams.")
+        while not self.stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            # Only each stream's ROI goes to YOLO; streams whose motion gate sees a
+            # static scene keep their last tracks
+            moving = []
+            for stream, frame in batch:
+                view, offset = stream.app.roi_view(frame)
+                if stream.app.needs_detection(view):
+                    moving.append((stream, frame, view, offset))
+            if moving:
+                views = [view for _, _, view, _ in moving]
+                imgsz = max(detector_imgsz(*view.shape[:2]) for view in views)
+                with METRICS.timer("detect_batch"), \
+                        TRACER.span("detect_batch", frames=[s.app.current_frame_id for s, _, _, _ in moving]):
+                    with self.model_lock:
+                        results = self.model.predict(views, imgsz=imgsz, conf=self.conf, iou=self.iou,
+                                                     verbose=False, device=self.device)
+                METRICS.set_gauge("batch_size", len(views))
+                for (stream, frame, _, offset), result in zip(moving, results):
+                    stream.app.last_tracks = stream.app.to_frame_tracks(track_result(stream.tracker, result), offset, frame.shape)
+            futures = [self._pool.submit(self._analyze, stream, frame, stream.app.last_tracks) for stream, frame in batch]
+            for future in futures:
+                future.result()
+            self.batches += 1
+            self.frames += len(batch)
+        for stream in self.streams:
+            stream.app.emit_events(stream.app.events.flush(time.time(), force=True))
+        logging.info("Multi-camera inference stopped.")
+
+    def start(self):
+        for stream in self.streams:
+            t = threading.Thread(target=stream.app.frame_grabber, name=f"grab-{stream.name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self.inference_worker, name="multi-camera-inference", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def latest_frames(self):
+        """`(name, frame)` for every stream with an annotated frame waiting."""
+        frames = []
+        for stream in self.streams:
+            try:
+                frames.append((stream.name, stream.app.next_result(timeout=0)[0]))
+            except queue.Empty:
+                continue
+        return frames
+
+    def drain_events(self):
+        """`(stream name, DetectionEvent)` pairs emitted since the last call."""
+        events = []
+        for stream in self.streams:
+            while True:
+                try:
+                    events.append((stream.name, stream.app.detection_queue.get_nowait()))
+                except queue.Empty:
+                    break
+        return events
+
+    def stop(self):
+        self.stop_event.set()
+        for t in self._threads:
+            t.join(timeout=2)
+        for stream in self.streams:
+            if stream.app.cap is not None:
+                stream.app.cap.release()
+        self._pool.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": self.frames / self.batches if self.batches else 0.0,
+            "streams": {s.name: {"processed": s.frames_processed, **s.app.frame_stats()} for s in self.streams},
+        }
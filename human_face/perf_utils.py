@@ -0,0 +1,78 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Measurement helpers shared by the runtime bookkeeping (model registry,
+# startup log) and the benchmarks: process memory, the commit being run,
+# and the results-file / baseline-compare scaffolding every benchmark uses.
+
+
+def process_rss_mb():
+    """Resident set size in MB; peak RSS where psutil is missing; None when neither is available."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        import resource
+
+        # Peak rather than current on this fallback; KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    except ImportError:
+        return None
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_info(**fields):
+    """Header for a results file: when, at which commit and where it ran, plus `fields`."""
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        **fields,
+    }
+
+
+def regressed(before, after, tolerance, min_delta):
+    """True when `after` is more than `tolerance` (a fraction) and `min_delta` above `before`."""
+    return after > before * (1 + tolerance) and after - before > min_delta
+
+
+def write_results(results, *paths):
+    """Write `results` as JSON to each non-empty path."""
+    for path in filter(None, paths):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {path}")
+
+
+def check_baseline(results, baseline_path, tolerance, compare):
+    """Compare `results` against the file at `baseline_path`; exit with status 1 on any regression.
+
+    `compare(results, baseline, tolerance)` returns one line per regression.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {baseline_path} (tolerance {tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nno regressions against {baseline_path} (tolerance {tolerance:.0%})")
@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+# SCRFD input sizes to pick from for a crop; the detector needs multiples of 32
+DET_SIZES = (128, 160, 224, 320, 480, 640)
+# Frames above this (h, w) are scaled down once at capture; everything else stays native
+MAX_FRAME_SIZE = (1080, 1920)
+
+
+def fit_within(image, max_hw=MAX_FRAME_SIZE):
+    """Scale `image` down, keeping its aspect ratio, so it fits in `max_hw`.
+
+    Returns `(image, scale)`; an image that already fits comes back untouched
+    (no copy) with scale 1.0.
+    """
+    h, w = image.shape[:2]
+    scale = min(max_hw[0] / h, max_hw[1] / w)
+    if scale >= 1.0:
+        return image, 1.0
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+
+def letterbox(image, size=640):
+    """Resize keeping aspect ratio and pad to `size` x `size` with grey, as ultralytics does."""
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = round(h * scale), round(w * scale)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    canvas[top:top + nh, left:left + nw] = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return canvas
+
+
+def detector_imgsz(h, w, max_size=640, stride=32):
+    """YOLO input size for an `h` x `w` view: never upscale it, never exceed `max_size`.
+
+    Lets a cropped region of interest cost less than a full frame.
+    """
+    longest = min(max(h, w), max_size)
+    return max(stride, -(-longest // stride) * stride)
+
+
+def det_input_size(h, w, sizes=DET_SIZES):
+    """Smallest square SCRFD input that holds an `h` x `w` crop without shrinking it."""
+    longest = max(h, w)
+    for size in sizes:
+        if longest <= size:
+            return size, size
+    return sizes[-1], sizes[-1]
+
+
+def detect_faces(face_app, image, det_size=None, offset=(0, 0), max_num=0):
+    """`FaceAnalysis.get` for one image at its native scale.
+
+    SCRFD resizes internally (aspect preserved) to `det_size`, chosen from
+    DET_SIZES by the image size when not given, so a small person crop costs
+    a small detector pass instead of being blown up to 640x640. Recognition
+    aligns from the crop's own pixels. Boxes and landmarks are shifted by
+    `offset` (the crop's top-left corner) into frame coordinates.
+    """
+    from insightface.app.common import Face
+
+    h, w = image.shape[:2]
+    if h < 8 or w < 8:
+        return []
+    det_size = det_size or det_input_size(h, w)
+    bboxes, kpss = face_app.det_model.detect(image, input_size=det_size, max_num=max_num, metric="default")
+    faces = []
+    for i in range(bboxes.shape[0]):
+        face = Face(bbox=bboxes[i, 0:4], kps=kpss[i] if kpss is not None else None, det_score=bboxes[i, 4])
+        for taskname, model in face_app.models.items():
+            if taskname != "detection":
+                model.get(image, face)
+        faces.append(face)
+    if offset != (0, 0):
+        shift = np.array(offset, dtype=np.float32)
+        for face in faces:
+            face.bbox = face.bbox + np.tile(shift, 2)
+            if face.kps is not None:
+                face.kps = face.kps + shift
+    return faces
@@ -0,0 +1,277 @@
+import errno
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import cv2
+
+from human_face.capture import PyAVCapture, is_live_url, open_capture, resolve_capture_backend
+from human_face.preprocess import MAX_FRAME_SIZE, fit_within
+from human_face.shared_frames import SharedFrameRing, ring_bytes, shm_free_bytes
+
+# Largest frame a ring slot holds (the capture size cap); rings are sized per source below this
+FRAME_SHAPE = (*MAX_FRAME_SIZE, 3)
+# Seconds to wait for a live source to open and deliver a frame when probing its resolution
+PROBE_TIMEOUT = 3.0
+
+
+def probe_frame_shape(stream_url, max_shape=FRAME_SHAPE, capture_backend=None, timeout=PROBE_TIMEOUT):
+    """Shape of `stream_url`'s frames once fitted within `max_shape`; `max_shape` when it cannot be probed.
+
+    Opens the source through the backend its capture process will use.
+    OpenCV has no open or read timeout, so live URLs on that backend are not
+    probed at all: a camera that is down must not hold up the pool's start.
+    """
+    backend = resolve_capture_backend(capture_backend, stream_url)
+    cap = None
+    if backend == "pyav" or not is_live_url(stream_url):
+        cap = open_capture(stream_url, backend, open_timeout=timeout, read_timeout=timeout)
+    h = w = 0
+    try:
+        if cap is not None and cap.isOpened():
+            if backend == "opencv":
+                h, w = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            if h <= 0 or w <= 0:
+                ret, frame = cap.read()
+                h, w = frame.shape[:2] if ret else (0, 0)
+    finally:
+        if cap is not None:
+            cap.release()
+    if h <= 0 or w <= 0:
+        logging.info(f"Could not probe the resolution of {stream_url!r}; sizing its rings for {max_shape[:2]}")
+        return tuple(max_shape)
+    # Same rounding as fit_within, which the capture process applies to every frame
+    scale = min(1.0, max_shape[0] / h, max_shape[1] / w)
+    if scale < 1.0:
+        h, w = max(1, round(h * scale)), max(1, round(w * scale))
+    return (h, w, max_shape[2])
+
+
+def capture_process(stream_url, ring_name, slots, max_shape, stop_event, loop_file=False, capture_backend=None):
+    """Decode one source into its input ring. Imports nothing heavier than OpenCV (or PyAV)."""
+    cv2.setNumThreads(1)
+    ring = SharedFrameRing.attach(ring_name, slots, max_shape)
+    use_pyav = resolve_capture_backend(capture_backend, stream_url) == "pyav"
+    cap = PyAVCapture(stream_url, loop=loop_file) if use_pyav else cv2.VideoCapture(stream_url)
+    if not cap.isOpened():
+        logging.warning(f"Cannot open video source {stream_url!r}")
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                if loop_file and not use_pyav:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                else:
+                    time.sleep(0.1)
+                continue
+            # PyAV stamps each frame when it was decoded; OpenCV frames are stamped here
+            decoded_ns = int(cap.last_decoded_at * 1e9) if use_pyav else None
+            ring.write(fit_within(frame, max_shape[:2])[0], decoded_ns)
+    finally:
+        cap.release()
+        ring.close()
+
+
+def inference_process(name, in_ring_name, out_ring_name, slots, max_shape, event_queue, stop_event,
+                      processed, face_pass=None, recognition_budget=4, torch_threads=1,
+                      detector_backend=None, motion_gate=False, roi=None, draw=True, sound_alerts=True):
+    """Track, recognise and annotate frames from one camera's input ring into its output ring.
+
+    `face_pass` None means the app's default, as in MultiCameraEngine.
+    """
+    import torch
+    from human_face.securevision import DEFAULT_FACE_PASS, MultiPersonFaceRecognitionApp
+
+    torch.set_num_threads(torch_threads)
+    cv2.setNumThreads(1)
+    in_ring = SharedFrameRing.attach(in_ring_name, slots, max_shape)
+    out_ring = SharedFrameRing.attach(out_ring_name, slots, max_shape)
+    # No capture of its own: frames come from the input ring
+    app = MultiPersonFaceRecognitionApp(stream_url=None, face_pass=face_pass or DEFAULT_FACE_PASS,
+                                        recognition_budget=recognition_budget, frame_buffer="latest",
+                                        detector_backend=detector_backend, motion_gate=motion_gate,
+                                        roi=roi)
+    app.draw = draw
+    app.sound_alerts = sound_alerts
+    last_seq = 0
+
+    def forward_events():
+        while True:
+            try:
+                event_queue.put_nowait((name, app.detection_queue.get_nowait()))
+            except (queue.Empty, queue.Full):
+                return
+
+    try:
+        while not stop_event.is_set():
+            packet = in_ring.read_latest(last_seq)
+            if packet is None:
+                time.sleep(0.002)
+                continue
+            last_seq, capture_ns, frame = packet
+            boxes, ids, confs = app.detect_persons(frame)
+            out_ring.write(app.analyze_frame(frame, boxes, ids, confs), capture_ns)
+            with processed.get_lock():
+                processed.value += 1
+            forward_events()
+        app.emit_events(app.events.flush(time.time(), force=True))
+        forward_events()
+    finally:
+        app.stop_event.set()
+        in_ring.close()
+        out_ring.close()
+
+
+def _shm_message(cameras, needed, free):
+    available = f"only {free / 2**20:.0f} MB free" if free is not None else "not enough free"
+    return (f"Frame rings for {cameras} cameras need {needed / 2**20:.0f} MB of shared memory but /dev/shm has "
+            f"{available}; give the container more (docker run --shm-size=1g) or use fewer slots or cameras.")
+
+
+class ProcessCamera:
+    """Shared-memory rings and worker processes belonging to one registered source."""
+
+    def __init__(self, name, stream_url, in_ring, out_ring, processed, motion_gate=False, roi=None):
+        self.name = name
+        self.stream_url = stream_url
+        self.max_shape = in_ring.max_shape
+        self.motion_gate = motion_gate
+        self.roi = roi
+        self.in_ring = in_ring
+        self.out_ring = out_ring
+        self.processed = processed
+        self.processes = []
+        self.last_seq = 0
+
+
+class ProcessCameraPool:
+    """Runs every camera's capture and inference in worker processes of its own.
+
+    Each source gets a capture process writing decoded frames into an input
+    `SharedFrameRing` and an inference process reading the newest of them,
+    running YOLO + ByteTrack + InsightFace, and writing annotated frames to an
+    output ring. Frames never get pickled; only the small DetectionEvents go
+    through a queue. Each camera's rings are sized for its probed resolution
+    (capped at `max_shape`), so a 720p camera takes about 22 MB of shared
+    memory rather than the 50 MB of 1080p slots. The UI process just reads output rings and drains events,
+    so a slow camera can no longer hold the GIL for the others.
+
+    Exposes the same `latest_frames()` / `drain_events()` interface as
+    `MultiCameraEngine` so the dashboard can drive either.
+    """
+
+    def __init__(self, sources, face_pass=None, recognition_budget=4, slots=4,
+                 max_shape=FRAME_SHAPE, torch_threads=None, loop_files=False, detector_backend=None,
+                 capture_backend=None, draw=True, sound_alerts=True):
+        self.ctx = mp.get_context("spawn")  # fork and an initialised torch do not mix
+        self.face_pass = face_pass
+        self.recognition_budget = recognition_budget
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        # Split the cores between the inference processes instead of letting each grab all of them
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // max(1, len(sources)))
+        self.loop_files = loop_files
+        self.detector_backend = detector_backend
+        self.capture_backend = capture_backend
+        self.draw = draw
+        self.sound_alerts = sound_alerts
+        self.stop_event = self.ctx.Event()
+        self.event_queue = self.ctx.Queue(maxsize=1000)
+        # multi_camera pulls in YOLO/InsightFace; keep that out of the capture processes' imports
+        from human_face.detector_backends import ensure_export
+        from human_face.multi_camera import source_to_stream_url
+
+        # Export once here rather than racing one export per inference process
+        ensure_export(detector_backend)
+
+        urls = [source_to_stream_url(source) for source in sources]
+        shapes = [probe_frame_shape(url, self.max_shape, self.capture_backend) for url in urls]
+        needed = sum(2 * ring_bytes(slots, shape) for shape in shapes)
+        free = shm_free_bytes()
+        if free is not None and needed > free:
+            raise OSError(errno.ENOSPC, _shm_message(len(sources), needed, free))
+
+        self.cameras = []
+        try:
+            for source, url, shape in zip(sources, urls, shapes):
+                in_ring = SharedFrameRing.create(slots, shape)
+                try:
+                    out_ring = SharedFrameRing.create(slots, shape)
+                except OSError:
+                    in_ring.close()
+                    raise
+                self.cameras.append(ProcessCamera(
+                    source["name"],
+                    url,
+                    in_ring,
+                    out_ring,
+                    self.ctx.Value("q", 0),
+                    bool(source.get("motion_gate", False)),
+                    source.get("roi"),
+                ))
+        except OSError as e:
+            for cam in self.cameras:
+                cam.in_ring.close()
+                cam.out_ring.close()
+            raise OSError(e.errno, _shm_message(len(sources), needed, shm_free_bytes())) from e
+
+    def start(self):
+        for cam in self.cameras:
+            ring_args = (cam.in_ring.name, self.slots, cam.max_shape)
+            cam.processes = [
+                self.ctx.Process(target=capture_process, name=f"capture-{cam.name}", daemon=True,
+                                 args=(cam.stream_url, *ring_args, self.stop_event, self.loop_files,
+                                       self.capture_backend)),
+                self.ctx.Process(target=inference_process, name=f"infer-{cam.name}", daemon=True,
+                                 args=(cam.name, cam.in_ring.name, cam.out_ring.name, self.slots, cam.max_shape,
+                                       self.event_queue, self.stop_event, cam.processed, self.face_pass,
+                                       self.recognition_budget, self.torch_threads, self.detector_backend,
+                                       cam.motion_gate, cam.roi, self.draw,
+                                       self.sound_alerts)),
+            ]
+            for p in cam.processes:
+                p.start()
+        logging.info(f"Started {len(self.cameras)} camera processes with {self.torch_threads} torch threads each.")
+
+    def latest_frames(self):
+        """`(name, frame)` for every camera with an annotated frame newer than the last call."""
+        frames = []
+        for cam in self.cameras:
+            packet = cam.out_ring.read_latest(cam.last_seq)
+            if packet is not None:
+                cam.last_seq, _, frame = packet
+                frames.append((cam.name, frame))
+        return frames
+
+    def drain_events(self):
+        """`(camera name, DetectionEvent)` pairs sent by the workers since the last call."""
+        events = []
+        while True:
+            try:
+                events.append(self.event_queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        for cam in self.cameras:
+            for p in cam.processes:
+                p.join(timeout=timeout)
+                if p.is_alive():
+                    p.terminate()
+        for cam in self.cameras:
+            cam.in_ring.close()
+            cam.out_ring.close()
+
+    def stats(self):
+        return {
+            cam.name: {
+                "captured": cam.in_ring.write_seq,
+                "processed": cam.processed.value,
+                "displayed_seq": cam.last_seq,
+                "alive": all(p.is_alive() for p in cam.processes),
+            }
+            for cam in self.cameras
+        }
@@ -0,0 +1,205 @@
+import argparse
+import glob
+import logging
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+from human_face.preprocess import letterbox
+
+FACE_MODEL_ROOT = "face_models"
+FACE_MODEL_ENV = "SECUREVISION_FACE_MODEL"
+FP32_FACE_PACK = "buffalo_l"
+INT8_FACE_PACK = "buffalo_l_int8"
+RECOGNITION_MODEL = "w600k_r50.onnx"
+IMAGE_EXTENSIONS = ("jpg", "jpeg", "png", "bmp")
+
+
+def face_model_pack(name=None):
+    """InsightFace model pack to load: `name`, else $SECUREVISION_FACE_MODEL, else buffalo_l."""
+    return name or os.environ.get(FACE_MODEL_ENV, FP32_FACE_PACK)
+
+
+def face_pack_dir(pack, root=FACE_MODEL_ROOT):
+    # FaceAnalysis(name=pack, root=root) loads every *.onnx in root/models/pack
+    return os.path.join(root, "models", pack)
+
+
+def _images_under(path):
+    if os.path.isdir(path):
+        return sorted(p for ext in IMAGE_EXTENSIONS
+                      for p in glob.glob(os.path.join(path, "**", f"*.{ext}"), recursive=True))
+    if path.endswith(".txt"):
+        base = os.path.dirname(path)
+        with open(path) as f:
+            return [os.path.join(base, line.strip()) for line in f if line.strip()]
+    return [path]
+
+
+def calibration_images(data, limit=300, split="train"):
+    """Up to `limit` image paths from the `split` of an ultralytics dataset YAML."""
+    from ultralytics.data.utils import check_det_dataset
+
+    entries = check_det_dataset(data)[split]
+    paths = []
+    for entry in entries if isinstance(entries, list) else [entries]:
+        paths.extend(_images_under(entry))
+    if not paths:
+        raise FileNotFoundError(f"No {split} images found for {data}")
+    # Spread the sample across the whole split rather than its first folder
+    step = max(1, len(paths) // limit)
+    return paths[::step][:limit]
+
+
+def _detector_blobs(paths, imgsz):
+    # One letterboxed 1x3xHxW float32 blob at a time: all 300 at 640 px would hold ~1.5 GB
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            logging.warning(f"Skipping unreadable calibration image {path}")
+            continue
+        rgb = cv2.cvtColor(letterbox(image, imgsz), cv2.COLOR_BGR2RGB)
+        yield np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+class _ArrayCalibrationReader:
+    """onnxruntime CalibrationDataReader over an iterable of preprocessed input blobs, consumed lazily."""
+
+    def __init__(self, input_name, blobs):
+        self.input_name = input_name
+        self._blobs = iter(blobs)
+
+    def get_next(self):
+        blob = next(self._blobs, None)
+        return None if blob is None else {self.input_name: blob}
+
+
+def _quantize_onnx(src, dst, blobs, per_channel=True):
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name = ort.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    prepared = dst + ".prep.onnx"
+    quant_pre_process(src, prepared)
+    try:
+        quantize_static(
+            prepared, dst, _ArrayCalibrationReader(input_name, blobs),
+            quant_format=QuantFormat.QDQ,
+            per_channel=per_channel,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+    finally:
+        os.remove(prepared)
+    # Carry over the metadata ultralytics reads back (names, stride, imgsz, task)
+    fp32, int8 = onnx.load(src), onnx.load(dst)
+    del int8.metadata_props[:]
+    int8.metadata_props.extend(fp32.metadata_props)
+    onnx.save(int8, dst)
+    return dst
+
+
+def quantize_detector(weights, backend, data, imgsz=640, limit=300):
+    """INT8 person detector calibrated on `data`'s training images; returns the model path.
+
+    "openvino_int8" uses ultralytics' NNCF export. "onnx_int8" quantizes the
+    FP32 ONNX export with onnxruntime static quantization.
+    """
+    from ultralytics import YOLO
+    from human_face.detector_backends import ensure_export, export_path
+
+    if backend == "openvino_int8":
+        path = YOLO(weights).export(format="openvino", int8=True, data=data, imgsz=imgsz, dynamic=True)
+        return str(path)
+    if backend != "onnx_int8":
+        raise ValueError(f"No INT8 recipe for detector backend {backend!r}")
+    fp32 = ensure_export("onnx", weights, imgsz)
+    paths = calibration_images(data, limit)
+    logging.info(f"Calibrating {fp32} on {len(paths)} images")
+    return _quantize_onnx(fp32, export_path(weights, backend), _detector_blobs(paths, imgsz))
+
+
+def aligned_face_crops(face_data_dir="face_data", face_app=None, limit=None):
+    """`(person, 112x112 aligned crop)` for every face found in the enrolled face_data images."""
+    from insightface.app import FaceAnalysis
+    from insightface.utils import face_align
+
+    if face_app is None:
+        face_app = FaceAnalysis(name=FP32_FACE_PACK, root=os.path.abspath(FACE_MODEL_ROOT),
+                                allowed_modules=["detection"])
+        face_app.prepare(ctx_id=0, det_size=(640, 640))
+    crops = []
+    for person in sorted(os.listdir(face_data_dir)):
+        folder = os.path.join(face_data_dir, person)
+        if not os.path.isdir(folder):
+            continue
+        for path in _images_under(folder):
+            image = cv2.imread(path)
+            faces = face_app.get(image) if image is not None else []
+            if faces:
+                face = max(faces, key=lambda f: f.det_score)
+                crops.append((person, face_align.norm_crop(image, landmark=face.kps, image_size=112)))
+            if limit and len(crops) >= limit:
+                return crops
+    return crops
+
+
+def quantize_recognizer(face_data_dir="face_data", root=FACE_MODEL_ROOT, src_pack=FP32_FACE_PACK,
+                        dst_pack=INT8_FACE_PACK, limit=500):
+    """Copy `src_pack` to `dst_pack` with its ArcFace model replaced by an INT8 one.
+
+    Calibrated on aligned crops of the enrolled faces. Lives in its own pack
+    because FaceAnalysis loads every model in a pack directory and keeps the
+    first one per task.
+    """
+    from insightface.model_zoo import get_model
+
+    src_dir, dst_dir = face_pack_dir(src_pack, root), face_pack_dir(dst_pack, root)
+    src_model = os.path.join(src_dir, RECOGNITION_MODEL)
+    rec = get_model(src_model, providers=["CPUExecutionProvider"])
+    crops = aligned_face_crops(face_data_dir, limit=limit)
+    if not crops:
+        raise FileNotFoundError(f"No faces found under {face_data_dir} to calibrate on")
+    blobs = (cv2.dnn.blobFromImage(crop, 1.0 / rec.input_std, rec.input_size,
+                                   (rec.input_mean, rec.input_mean, rec.input_mean), swapRB=True)
+             for _, crop in crops)
+
+    os.makedirs(dst_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(src_dir, "*.onnx")):
+        if os.path.basename(path) != RECOGNITION_MODEL:
+            shutil.copy2(path, dst_dir)
+    logging.info(f"Calibrating {src_model} on {len(crops)} face crops")
+    return _quantize_onnx(src_model, os.path.join(dst_dir, RECOGNITION_MODEL), blobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build INT8 versions of the person detector and ArcFace recognizer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    det = sub.add_parser("detector", help="quantize the YOLO person detector")
+    det.add_argument("--weights", default=None, help="PyTorch weights (default: yolo models/new_best12n.pt)")
+    det.add_argument("--run", default=None, help="training run under Training/runs, e.g. yolov12n")
+    det.add_argument("--data", required=True, help="dataset YAML whose train images calibrate the model")
+    det.add_argument("--backend", choices=["onnx_int8", "openvino_int8"], default="openvino_int8")
+    det.add_argument("--imgsz", type=int, default=640)
+    det.add_argument("--limit", type=int, default=300)
+    rec = sub.add_parser("recognizer", help="quantize buffalo_l's ArcFace model")
+    rec.add_argument("--face-data", default="face_data")
+    rec.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "detector":
+        from human_face.detector_backends import DEFAULT_WEIGHTS, run_weights
+
+        weights = run_weights(args.run) if args.run else (args.weights or DEFAULT_WEIGHTS)
+        print(quantize_detector(weights, args.backend, args.data, args.imgsz, args.limit))
+    else:
+        print(quantize_recognizer(args.face_data, limit=args.limit))
+
+
+if __name__ == "__main__":
+    main()
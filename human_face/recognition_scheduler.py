@@ -0,0 +1,48 @@
+class RecognitionScheduler:
+    """Chooses which tracks get a face inference on each frame.
+
+    At most `budget` tracks are picked per frame, in priority order:
+      1. tracks with no recognition result yet,
+      2. Unknown tracks not checked for `unknown_interval` frames, oldest first,
+      3. known tracks whose adaptive recheck interval has elapsed, lowest
+         match margin first, then oldest.
+
+    A known track's interval doubles each time a recheck confirms the same
+    identity with a comfortable margin, up to `max_interval`, and falls back
+    to `min_interval` whenever the result changes or is uncertain.
+    """
+
+    def __init__(self, budget=4, min_interval=10, max_interval=240, unknown_interval=30, confident_margin=0.1):
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.unknown_interval = unknown_interval
+        self.confident_margin = confident_margin
+
+    def select(self, track_ids, store, frame_idx):
+        """Return the set of `track_ids` to run face inference on this frame."""
+        new, unknown, known = [], [], []
+        for track_id in track_ids:
+            state = store.get(track_id, frame_idx)
+            if state is None:
+                new.append(track_id)
+                continue
+            age = frame_idx - state.last_checked
+            if state.name == "Unknown":
+                if age >= self.unknown_interval:
+                    unknown.append((-age, track_id))
+            elif age >= state.recheck_interval:
+                known.append((state.margin, -age, track_id))
+
+        unknown.sort()
+        known.sort()
+        ordered = new + [t for _, t in unknown] + [t for _, _, t in known]
+        return set(ordered[:self.budget])
+
+    def next_interval(self, state, name, margin, same_face):
+        """Interval until the next recheck after a result for a track previously in `state`."""
+        if name == "Unknown":
+            return self.unknown_interval
+        if state is None or not same_face or state.name != name or margin < self.confident_margin:
+            return self.min_interval
+        return min(self.max_interval, max(self.min_interval, state.recheck_interval * 2))
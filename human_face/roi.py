@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+
+def parse_polygons(text):
+    """Parse "x,y; x,y; x,y | x,y; ..." into polygons of (x, y) fractions of the frame size.
+
+    Raises ValueError for malformed points, coordinates outside [0, 1] or
+    polygons with fewer than three points.
+    """
+    polygons = []
+    for chunk in text.split("|"):
+        if not chunk.strip():
+            continue
+        points = []
+        for pair in chunk.split(";"):
+            if not pair.strip():
+                continue
+            try:
+                x, y = (float(v) for v in pair.split(","))
+            except ValueError:
+                raise ValueError(f"ROI point {pair.strip()!r} is not an 'x,y' pair") from None
+            if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+                raise ValueError(f"ROI point {pair.strip()!r} must use fractions between 0 and 1")
+            points.append((x, y))
+        if len(points) < 3:
+            raise ValueError("An ROI polygon needs at least three points")
+        polygons.append(points)
+    return polygons
+
+
+class RegionOfInterest:
+    """Polygon mask for one camera, in fractions of the frame so it survives resolution changes.
+
+    `crop` cuts a frame down to the polygons' bounding box and blanks the
+    pixels outside them, so detection and face inference only pay for the
+    region. `keep` tells which frame-space boxes have their centre inside.
+    Masks are built once per frame size.
+    """
+
+    def __init__(self, polygons):
+        if not polygons:
+            raise ValueError("RegionOfInterest needs at least one polygon")
+        self.polygons = [np.asarray(p, dtype=np.float32) for p in polygons]
+        self._cache = {}
+
+    def _layout(self, h, w):
+        layout = self._cache.get((h, w))
+        if layout is None:
+            pts = [np.round(p * [w - 1, h - 1]).astype(np.int32) for p in self.polygons]
+            mask = np.zeros((h, w), dtype=np.uint8)
+            cv2.fillPoly(mask, pts, 255)
+            x, y, bw, bh = cv2.boundingRect(np.vstack(pts))
+            bbox = (x, y, x + bw, y + bh)
+            crop_mask = mask[bbox[1]:bbox[3], bbox[0]:bbox[2]]
+            # A rectangle needs no blanking, just the crop
+            layout = (pts, mask, bbox, None if crop_mask.all() else crop_mask)
+            self._cache[(h, w)] = layout
+        return layout
+
+    def crop(self, frame):
+        """`(view, (x_offset, y_offset))`: the ROI bounding box of `frame` with outside pixels zeroed."""
+        _, _, (x1, y1, x2, y2), crop_mask = self._layout(*frame.shape[:2])
+        view = frame[y1:y2, x1:x2]
+        if crop_mask is not None:
+            view = cv2.bitwise_and(view, view, mask=crop_mask)
+        return view, (x1, y1)
+
+    def keep(self, boxes, frame_shape):
+        """Boolean array: which frame-space `boxes` have their centre inside the ROI."""
+        if len(boxes) == 0:
+            return np.zeros(0, dtype=bool)
+        h, w = frame_shape[:2]
+        mask = self._layout(h, w)[1]
+        boxes = np.asarray(boxes)
+        cx = np.clip((boxes[:, 0] + boxes[:, 2]) // 2, 0, w - 1).astype(int)
+        cy = np.clip((boxes[:, 1] + boxes[:, 3]) // 2, 0, h - 1).astype(int)
+        return mask[cy, cx] > 0
+
+    def draw(self, frame, color=(255, 200, 0)):
+        cv2.polylines(frame, self._layout(*frame.shape[:2])[0], True, color, 1)
+        return frame
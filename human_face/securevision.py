@@ -10,116 +10,232 @@ import time
 import numpy as np
 import logging
 import queue
-import pygame
-import torch
-from ultralytics import YOLO
-from sklearn.metrics.pairwise import cosine_similarity
-from insightface.app import FaceAnalysis
+from human_face.gallery import GalleryMatcher
+from human_face.gallery_watcher import GalleryReloader
+from human_face.track_state import TrackStateStore
+from human_face.recognition_scheduler import RecognitionScheduler
+from human_face.event_aggregator import EventAggregator
+from human_face.frame_buffer import LatestFrameBuffer
+from human_face.detector_backends import detector_device, load_detector, resolve_backend
+from human_face.quantization import face_model_pack
+from human_face.preprocess import MAX_FRAME_SIZE, detect_faces, detector_imgsz, fit_within
+from human_face.motion_gate import MotionGate
+from human_face.roi import RegionOfInterest
+from human_face.capture import open_capture
+from human_face.tracker import make_tracker, track_result
+from human_face.metrics import METRICS
+from human_face.tracing import TRACER, FrameTags
 
 # === Sound ===
-pygame.mixer.init()
-alert_sound = pygame.mixer.Sound("sounds/warning.wav")
-
-
-# === Logging ===
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] %(message)s',
-    filename='app.log',
-    filemode='w'
-)
-
-# === Device selection ===
-if torch.backends.mps.is_available():
-    power = torch.device("mps")
-elif torch.cuda.is_available():
-    power = torch.device("cuda:0")
-else:
-    power = torch.device("cpu")
-print(f"Using device: {power}")
+ALERT_SOUND = "sounds/warning.wav"
+_alert_sound = None
+
+
+def play_alert():
+    """Play the unknown-person warning; pygame and its mixer load on the first alert only."""
+    global _alert_sound
+    if _alert_sound is None:
+        try:
+            import pygame
+
+            pygame.mixer.init()
+            _alert_sound = pygame.mixer.Sound(ALERT_SOUND)
+        except Exception as e:
+            # No audio device (servers, containers): stay silent instead of retrying every alert
+            logging.warning(f"Alert sound unavailable: {e}")
+            _alert_sound = False
+    if _alert_sound:
+        _alert_sound.play()
+
+
+FACE_PASS_MODES = ("per_box", "full_frame")
+# Shared by the single-stream app and both multi-camera engines, so every mode recognises alike
+DEFAULT_FACE_PASS = "per_box"
+FRAME_BUFFER_MODES = ("auto", "latest", "queue")
+
 
 class MultiPersonFaceRecognitionApp:
-    def __init__(self, stream_url=0):
-        self.model = YOLO("yolo models/new_best12n.pt")
+    def __init__(self, stream_url=0, face_pass=DEFAULT_FACE_PASS, recognition_budget=4, frame_buffer="auto",
+                 model=None, face_app=None, gallery=None, detector_backend=None, face_model=None,
+                 motion_gate=False, roi=None, capture_backend=None, model_lock=None):
+        if face_pass not in FACE_PASS_MODES:
+            raise ValueError(f"face_pass must be one of {FACE_PASS_MODES}, got {face_pass!r}")
+        if frame_buffer not in FRAME_BUFFER_MODES:
+            raise ValueError(f"frame_buffer must be one of {FRAME_BUFFER_MODES}, got {frame_buffer!r}")
+        # model / face_app / gallery may be shared between several streams and pages (see
+        # MultiCameraEngine, human_face.model_registry); a shared model comes with the lock guarding it
+        # "torch", "onnx" or "openvino"; defaults to $SECUREVISION_DETECTOR_BACKEND, else torch
+        self.detector_backend = resolve_backend(detector_backend)
+        self.model = model if model is not None else load_detector(self.detector_backend)
+        self.model_lock = model_lock or threading.Lock()
+        self.device = detector_device(self.detector_backend)
         self.TRACK_CFG = "bytrack/bytetrack.yaml"
+        # ByteTrack state lives here rather than in the model, so the model can be shared
+        self.tracker = make_tracker(self.TRACK_CFG)
         self.max_frames_before_rechecking = 250
+        # "per_box": one InsightFace pass on each person crop
+        # "full_frame": one InsightFace pass per frame, faces assigned to person boxes
+        self.face_pass = face_pass
 
         # === InsightFace ===
-        MODEL_DIR = os.path.abspath("face_models")
-        self.face_app = FaceAnalysis(name="buffalo_l",root=MODEL_DIR,allowed_modules=["detection", "recognition"])
-        self.face_app.prepare(ctx_id=0)
-        self.face_app.det_size = (640, 640)
-
-        self.known_face_encodings, self.known_face_names = self.load_known_faces("face_data")
-        self.person_ids = {name: idx for idx, name in enumerate(sorted(set(self.known_face_names)))}
-        logging.info(f"Loaded {len(self.known_face_encodings)} encodings for {len(self.person_ids)} persons: {list(self.person_ids.keys())}")
+        if face_app is None:
+            from insightface.app import FaceAnalysis
+
+            MODEL_DIR = os.path.abspath("face_models")
+            # "buffalo_l", or "buffalo_l_int8" once human_face.quantization has built it
+            face_app = FaceAnalysis(name=face_model_pack(face_model),root=MODEL_DIR,allowed_modules=["detection", "recognition"])
+            face_app.prepare(ctx_id=0)
+            face_app.det_size = (640, 640)
+        self.face_app = face_app
+
+        self.recognition_threshold = 0.35
+        # Packed face_gallery/ when migrated, otherwise the per-person face_data/ folders.
+        # New registrations are picked up by the reloader without restarting the stream.
+        owns_gallery = gallery is None
+        self.gallery = GalleryReloader("face_gallery", "face_data") if owns_gallery else gallery
+        self.gallery_reload_interval = 2.0
+
+        # Per-track recognition state, expired in step with ByteTrack's track_buffer
+        self.track_store = TrackStateStore.from_tracker_config(self.TRACK_CFG, max_tracks=512)
+        self.track_stats_interval = 1000
+        # At most recognition_budget face inferences per frame; see RecognitionScheduler
+        self.scheduler = RecognitionScheduler(budget=recognition_budget)
 
-        self.frame_queue = queue.Queue(maxsize=5)
-        self.results_queue = queue.Queue(maxsize=5)
         self.stop_event = threading.Event()
-        self.display_scale = 1.0
+        if owns_gallery:
+            self.gallery.start(self.stop_event, interval=self.gallery_reload_interval)
+
+        self.frame_idx = 0
+        self._gallery_version = self.gallery.version
+        self._prev_time = time.time()
+
+        # "latest": live sources hand the processor only the newest frame
+        # "queue": keep up to 5 frames in order, as for offline files
+        if frame_buffer == "auto":
+            is_file = isinstance(stream_url, str) and os.path.isfile(stream_url)
+            frame_buffer = "queue" if is_file else "latest"
+        self.frame_buffer_mode = frame_buffer
+        self.frame_queue = LatestFrameBuffer() if frame_buffer == "latest" else queue.Queue(maxsize=5)
+        self.grab_dropped = 0
+        self.last_frame_seq = 0
+        self.skipped_frames = 0
+        self.results_queue = queue.Queue(maxsize=5)
+        self.max_frame_size = MAX_FRAME_SIZE
+        self.display_size = (720, 1280)
 
-        # Initialize video capture
+        # Initialize video capture: OpenCV, or FFmpeg via PyAV for network streams
+        # (low-latency, reconnects on its own); see human_face.capture
         try:
-            self.cap = cv2.VideoCapture(stream_url)
-            if not self.cap.isOpened():
+            self.cap = open_capture(stream_url, capture_backend)
+            if self.cap is None or not self.cap.isOpened():
                 logging.warning("Cannot open video source, will use frame queue only")
                 self.cap = None
         except Exception as e:
             logging.warning(f"Failed to initialize video capture: {e}")
             self.cap = None
 
-        self.detection_queue = queue.Queue()
+        # Skip YOLO on frames where nothing moved and reuse the last tracks (per camera)
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.last_tracks = (np.zeros((0, 4), dtype=int), [], np.zeros(0))
+        # Polygons (fractions of the frame) to analyse; everything outside is never inferred on
+        self.roi = roi if roi is None or isinstance(roi, RegionOfInterest) else RegionOfInterest(roi)
 
-    def load_known_faces(self, data_root):
-        encodings, names = [], []
-        for person_name in os.listdir(data_root):
-            folder = os.path.join(data_root, person_name)
-            if not os.path.isdir(folder):
-                continue
-            for file in os.listdir(folder):
-                if file.startswith("encoding_") and file.endswith(".npy"):
-                    enc = np.load(os.path.join(folder, file))
-                    encodings.append(enc)
-                    names.append(person_name)
-        return np.array(encodings), names
+        # Coalesced enter/heartbeat/leave DetectionEvents rather than one item per box per frame
+        self.detection_queue = queue.Queue()
+        self.events = EventAggregator(heartbeat_interval=60.0, leave_after=3.0)
+        # Event timestamps; offline analysis swaps in the video's own timeline
+        self.clock = time.time
+        self.sound_alerts = True
+        # Annotate frames; headless runs with nobody watching turn this off
+        self.draw = True
+        # Stage timings and counters (no-ops unless metrics are enabled); engines label them per camera
+        self.metrics = METRICS
+        self.metric_labels = ()
+        # Per-frame spans (no-ops until TRACER.start()); IDs follow frames through both queues
+        self.tracer = TRACER
+        self.frame_tags = FrameTags()
+        self.result_tags = FrameTags(limit=16)
+        self.current_frame_id = None
+
+    @property
+    def matcher(self):
+        return self.gallery.matcher
+
+    @property
+    def person_ids(self):
+        return {name: idx for idx, name in enumerate(self.matcher.identities)}
+
+    def track_stats(self):
+        """Counters for live, evicted and recognized tracks."""
+        return self.track_store.stats()
+
+    def reload_gallery(self):
+        """Re-read changed identities now instead of waiting for the next poll."""
+        return self.gallery.reload()
 
     def recognize_face(self, frame):
+        return self.match_embedding(self.get_face_embedding(frame))
+
+    def match_embedding(self, emb):
+        return self.match_embeddings([emb])[0]
+
+    def match_embeddings(self, embeddings):
+        """Match a batch of embeddings (None entries allowed) with a single gallery lookup."""
+        return [name for name, _, _ in self.score_embeddings(embeddings)]
+
+    def score_embeddings(self, embeddings):
+        """Return `(name, score, margin)` per embedding; margin is the lead over the runner-up identity."""
+        results = [("Unknown", 0.0, 0.0)] * len(embeddings)
+        valid = [idx for idx, emb in enumerate(embeddings) if emb is not None]
+        # Take one reference so a concurrent gallery swap can't change it mid-batch
+        matcher = self.matcher
+        if not valid or len(matcher) == 0:
+            return results
         try:
-            resized = cv2.resize(frame, (640, 640))
-            faces = self.face_app.get(resized)
-
-            if not faces:
-                return "Unknown"
-
-            face = faces[0]
-            emb = face.embedding.reshape(1, -1)
-
-            if len(self.known_face_encodings) == 0:
-                return "Unknown"
-
-            sims = cosine_similarity(emb, self.known_face_encodings)[0]
-            best_idx = np.argmax(sims)
-            if sims[best_idx] > 0.35:
-                return self.known_face_names[best_idx]
-
-            return "Unknown"
+            queries = np.vstack([embeddings[idx] for idx in valid])
+            top_names, top_scores = matcher.search(queries, k=2)
+            for idx, row_names, row_scores in zip(valid, top_names, top_scores):
+                if not row_names:
+                    continue
+                score = float(row_scores[0])
+                runner_up = float(row_scores[1]) if len(row_names) > 1 else -np.inf
+                # An identity with no rows scores -inf; it is no runner-up, not an infinite lead
+                margin = score - runner_up if np.isfinite(runner_up) else score
+                name = row_names[0] if score > self.recognition_threshold else "Unknown"
+                results[idx] = (name, score, margin)
         except Exception as e:
             logging.error(f"Face recognition failed: {e}")
-            return "Unknown"
+        return results
 
     def frame_grabber(self):
         logging.info("Frame grabber thread started.")
         while not self.stop_event.is_set():
             try:
                 if self.cap is not None:
-                    ret, frame = self.cap.read()
+                    frame_id = self.tracer.new_frame_id() if self.tracer.enabled else None
+                    with self.metrics.timer("capture", self.metric_labels), self.tracer.span("capture", frame_id):
+                        ret, frame = self.cap.read()
+                        if ret:
+                            # Native aspect ratio: YOLO letterboxes internally and maps boxes back to
+                            # these pixels; only oversized sources are scaled down, once, here
+                            frame, _ = fit_within(frame, self.max_frame_size)
                     if not ret:
                         time.sleep(0.1)
                         continue
-                    frame = cv2.resize(frame, (640, 640))
+                    self.metrics.inc("frames_grabbed", labels=self.metric_labels)
                     if not self.frame_queue.full():
-                        self.frame_queue.put(frame)
+                        if frame_id is not None:
+                            self.tracer.begin_wait("frame_queue", frame_id)
+                        if isinstance(self.frame_queue, LatestFrameBuffer):
+                            self.frame_queue.put(frame, frame_id=frame_id)
+                        else:
+                            if frame_id is not None:
+                                self.frame_tags.tag(frame, frame_id)
+                            self.frame_queue.put(frame)
+                    else:
+                        self.grab_dropped += 1
+                        self.metrics.inc("frames_dropped", labels=self.metric_labels)
+                    self.metrics.set_gauge("frame_queue_depth", self.frame_queue.qsize(), self.metric_labels)
                 else:
                     # If no video capture, just wait for frames from the queue
                     time.sleep(0.1)
@@ -129,10 +245,50 @@ class MultiPersonFaceRecognitionApp:
         logging.info("Frame grabber thread stopped.")
 
 
+    def next_frame(self, timeout=None):
+        """Take the next frame for processing, tracking sequence gaps in latest-frame mode."""
+        if isinstance(self.frame_queue, LatestFrameBuffer):
+            seq, _, frame, frame_id = self.frame_queue.get_packet(timeout=timeout)
+            if self.last_frame_seq:
+                skipped = seq - self.last_frame_seq - 1
+                self.skipped_frames += skipped
+                if skipped:
+                    self.metrics.inc("frames_dropped", skipped, self.metric_labels)
+            self.last_frame_seq = seq
+        else:
+            frame = self.frame_queue.get(timeout=timeout)
+            frame_id = self.frame_tags.pop(frame) if self.tracer.enabled else None
+        self.current_frame_id = self.take_frame_id(frame_id)
+        return frame
+
+    def take_frame_id(self, frame_id):
+        """Trace ID for a frame just taken from frame_queue; frames put there by other producers get a new one."""
+        if not self.tracer.enabled:
+            return None
+        if frame_id is None:
+            return self.tracer.new_frame_id()
+        self.tracer.end_wait("frame_queue", frame_id)
+        return frame_id
+
+    def frame_stats(self):
+        """Grabber/processor hand-off counters: frames produced, processed and dropped."""
+        if isinstance(self.frame_queue, LatestFrameBuffer):
+            stats = self.frame_queue.stats()
+            stats["last_seq"] = self.last_frame_seq
+        else:
+            stats = {"dropped": self.grab_dropped, "queued": self.frame_queue.qsize()}
+        stats["mode"] = self.frame_buffer_mode
+        if hasattr(self.cap, "stats"):
+            stats["capture"] = self.cap.stats()
+        if self.motion_gate is not None:
+            stats["motion_gate"] = self.motion_gate.stats()
+        return stats
+
     def get_face_embedding(self, frame):
         try:
-            resized = cv2.resize(frame, (640, 640))
-            faces = self.face_app.get(resized)
+            # Crop at native scale with a detector input sized to it, not stretched to 640x640
+            with self.tracer.span("face_embedding", self.current_frame_id):
+                faces = detect_faces(self.face_app, frame)
             if not faces:
                 return None
             return faces[0].embedding.reshape(1, -1)
@@ -140,109 +296,258 @@ class MultiPersonFaceRecognitionApp:
             logging.error(f"Embedding extraction failed: {e}")
             return None
 
+    def detect_faces(self, frame):
+        try:
+            if self.roi is not None:
+                view, offset = self.roi_view(frame)
+                return detect_faces(self.face_app, view, offset=offset)
+            return self.face_app.get(frame)
+        except Exception as e:
+            logging.error(f"Full-frame face detection failed: {e}")
+            return []
+
+    @staticmethod
+    def assign_faces_to_boxes(faces, boxes):
+        """Map each person box index to the face whose centre it contains.
+
+        When several boxes contain a face centre the tightest box wins, and a
+        box holding several faces keeps the one with the highest det_score.
+        """
+        assigned = {}
+        for face in faces:
+            fx1, fy1, fx2, fy2 = face.bbox
+            cx, cy = (fx1 + fx2) / 2, (fy1 + fy2) / 2
+            best_idx, best_area = None, None
+            for idx, (x1, y1, x2, y2) in enumerate(boxes):
+                if x1 <= cx <= x2 and y1 <= cy <= y2:
+                    area = (x2 - x1) * (y2 - y1)
+                    if best_area is None or area < best_area:
+                        best_idx, best_area = idx, area
+            if best_idx is None:
+                continue
+            current = assigned.get(best_idx)
+            if current is None or face.det_score > current.det_score:
+                assigned[best_idx] = face
+        return assigned
+
+    def get_box_embeddings(self, frame, boxes, selected=None):
+        """Return one embedding (or None) per person box using the configured face pass.
+
+        Only boxes whose index is in `selected` (default: all) are processed.
+        In full_frame mode the single face pass is skipped when nothing is selected.
+        """
+        selected = set(range(len(boxes))) if selected is None else selected
+        if self.face_pass == "full_frame":
+            faces = self.detect_faces(frame) if selected else []
+            assigned = self.assign_faces_to_boxes(faces, boxes)
+            return [
+                assigned[idx].embedding.reshape(1, -1) if idx in assigned and idx in selected else None
+                for idx in range(len(boxes))
+            ]
+        return [
+            self.get_face_embedding(frame[y1:y2, x1:x2]) if idx in selected else None
+            for idx, (x1, y1, x2, y2) in enumerate(boxes)
+        ]
+
+    def update_track(self, track_id, new_emb, name, score, margin, frame_idx):
+        """Fold a fresh face inference into the track's state and schedule its next recheck."""
+        stored = self.track_store.get(track_id, frame_idx)
+        if new_emb is None and stored is not None and stored.name != "Unknown":
+            # Face not visible this time (turned away, occluded): keep the identity, look again soon
+            stored.last_checked = frame_idx
+            stored.recheck_interval = self.scheduler.min_interval
+            return stored
+        same_face = stored is not None and self.is_same_person(new_emb, stored.embedding)
+        if stored is not None and stored.name != "Unknown" and not same_face:
+            logging.info(f"ID {track_id}: embedding mismatch → re-recognized as {name}")
+        interval = self.scheduler.next_interval(stored, name, margin, same_face)
+        return self.track_store.update(track_id, name, new_emb, frame_idx, score, margin, interval)
+
+    def emit_events(self, events):
+        for event in events:
+            try:
+                self.detection_queue.put_nowait(event)
+            except queue.Full:
+                pass
+
     def is_same_person(self, emb1, emb2, threshold=0.35):
         if emb1 is None or emb2 is None:
             return False
-        sim = cosine_similarity(emb1, emb2)[0][0]
-        return sim >= threshold
-
-
-    def processing_worker(self):
-        logging.info("Processing thread started.")
-        tracked_faces = {}
-        frame_idx = 0
-        prev_time = time.time()
+        return GalleryMatcher.similarity(emb1, emb2) >= threshold
 
-        while not self.stop_event.is_set():
-            try:
-                frame = self.frame_queue.get(timeout=1)
-            except queue.Empty:
-                continue
 
-            results = self.model.track(
+    def track_persons(self, frame):
+        """Run YOLO + ByteTrack on one frame; returns `(boxes, ids, confs)` for tracked persons."""
+        with self.model_lock:
+            result = self.model.predict(
                 frame,
-                persist=True,
+                imgsz=detector_imgsz(*frame.shape[:2]),
                 conf=0.25,
                 iou=0.20,
-                tracker=self.TRACK_CFG,
                 verbose=False,
-                device=power
+                device=self.device
             )[0]
+        return track_result(self.tracker, result)
+
+    def use_tracker(self, tracker_cfg=None, frame_rate=30):
+        """Start fresh ByteTrack state, optionally from another config or for another frame rate."""
+        if tracker_cfg is not None and tracker_cfg != self.TRACK_CFG:
+            self.TRACK_CFG = tracker_cfg
+            self.track_store = TrackStateStore.from_tracker_config(tracker_cfg, max_tracks=self.track_store.max_tracks)
+        self.tracker = make_tracker(self.TRACK_CFG, frame_rate=frame_rate)
+
+    def roi_view(self, frame):
+        """`(view, offset)`: the part of `frame` inference should see and its top-left corner."""
+        if self.roi is None:
+            return frame, (0, 0)
+        return self.roi.crop(frame)
+
+    def to_frame_tracks(self, tracks, offset, frame_shape):
+        """Shift `(boxes, ids, confs)` found in an ROI view back to frame space, dropping any outside the mask."""
+        if self.roi is None:
+            return tracks
+        boxes, ids, confs = tracks
+        if len(ids) == 0:
+            return tracks
+        boxes = boxes + np.array([offset[0], offset[1], offset[0], offset[1]])
+        keep = self.roi.keep(boxes, frame_shape)
+        return boxes[keep], [i for i, k in zip(ids, keep) if k], confs[keep]
+
+    def needs_detection(self, frame):
+        """False when the motion gate judges `frame` static, so `last_tracks` still hold."""
+        return self.motion_gate is None or self.motion_gate.should_detect(frame)
+
+    def detect_persons(self, frame):
+        """`track_persons` on the ROI behind the motion gate; static frames reuse the last tracks."""
+        view, offset = self.roi_view(frame)
+        if self.needs_detection(view):
+            self.last_tracks = self.to_frame_tracks(self.track_persons(view), offset, frame.shape)
+        return self.last_tracks
+
+    def analyze_frame(self, frame, boxes, ids, confs):
+        """Recognize, log and draw the tracked persons of one frame; returns the annotated frame.
+
+        With `draw` off nothing is copied or drawn and `frame` itself comes back.
+        """
+        tracked_faces = self.track_store
+        frame_idx = self.frame_idx
+
+        # Someone was enrolled or removed: let Unknown tracks retry on this frame
+        if self.gallery.version != self._gallery_version:
+            self._gallery_version = self.gallery.version
+            for stored in tracked_faces.values():
+                if stored.name == 'Unknown':
+                    stored.last_checked = frame_idx - self.scheduler.unknown_interval
+
+        draw = self.draw
+        # FPS calc
+        current_time = time.time()
+        fps = 1.0 / (current_time - self._prev_time) if current_time > self._prev_time else 0
+        self._prev_time = current_time
+
+        unknown_present = False
+        labels = []
+
+        if len(ids):
+            # Spend this frame's face-inference budget on the tracks that need it most
+            scheduled = self.scheduler.select(ids, tracked_faces, frame_idx)
+            selected = {idx for idx, track_id in enumerate(ids) if track_id in scheduled}
+            frame_id = self.current_frame_id
+            with self.metrics.timer("faces", self.metric_labels), \
+                    self.tracer.span("faces", frame_id, selected=len(selected), persons=len(ids)):
+                embeddings = self.get_box_embeddings(frame, boxes, selected)
+            with self.metrics.timer("match", self.metric_labels), self.tracer.span("match", frame_id):
+                scored = self.score_embeddings(embeddings)
+            self.metrics.inc("recognitions", len(selected), self.metric_labels)
+            for idx in selected:
+                self.update_track(ids[idx], embeddings[idx], *scored[idx], frame_idx)
+
+            for box, track_id, conf in zip(boxes, ids, confs):
+                x1, y1, x2, y2 = box
+                stored = tracked_faces.get(track_id, frame_idx)
+                # tracks still waiting for their first face inference show as Unknown but don't alert
+                name = stored.name if stored is not None else "Unknown"
+
+                if name == "Unknown" and stored is not None:
+                    unknown_present = True
+
+                if stored is not None:
+                    self.emit_events(self.events.observe(track_id, name, self.clock()))
+
+                if draw:
+                    labels.append((x1, y1, x2, y2, f"ID:{track_id} {name} ({conf:.2f})", name != "Unknown"))
+
+        self.emit_events(self.events.flush(self.clock()))
+
+        if draw:
+            with self.metrics.timer("draw", self.metric_labels), self.tracer.span("draw", self.current_frame_id):
+                display_frame = self.draw_overlay(frame, fps, labels)
+        else:
+            display_frame = frame
+
+        # forget tracks ByteTrack has dropped so memory stays flat on long runs
+        tracked_faces.prune(frame_idx)
+        self.metrics.set_gauge("live_tracks", len(tracked_faces), self.metric_labels)
+        if frame_idx % self.track_stats_interval == 0 and frame_idx:
+            logging.info(f"Track state: {tracked_faces.stats()}")
+
+        # play alert if unknown present every N frames
+        if frame_idx % self.max_frames_before_rechecking == 0 and unknown_present and self.sound_alerts:
+            play_alert()
+            print("⚠️⚠️⚠️ALERT: Unknown person detected!")
+
+        self.frame_idx += 1
+        return display_frame
+
+    def draw_overlay(self, frame, fps, labels):
+        """Copy of `frame` with the FPS, ROI and each `(x1, y1, x2, y2, label, known)` box drawn on."""
+        display_frame = frame.copy()
+        cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 50, 255), 2)
+        if self.roi is not None:
+            self.roi.draw(display_frame)
+        for x1, y1, x2, y2, label, known in labels:
+            color = (0,255,0) if known else (0,0,255)
+            cv2.rectangle(display_frame, (x1,y1),(x2,y2), color, 2)
+            cv2.putText(display_frame, label, (x1, y1-10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        return display_frame
+
+    def publish(self, display_frame):
+        if not self.results_queue.full():
+            if self.tracer.enabled and self.current_frame_id is not None:
+                self.result_tags.tag(display_frame, self.current_frame_id)
+                self.tracer.begin_wait("results_queue", self.current_frame_id)
+            self.results_queue.put(display_frame)
+        self.metrics.set_gauge("results_queue_depth", self.results_queue.qsize(), self.metric_labels)
+
+    def next_result(self, timeout=None):
+        """Take the next annotated frame as `(frame, frame_id)`; frame_id is None unless tracing."""
+        frame = self.results_queue.get(timeout=timeout)
+        frame_id = self.result_tags.pop(frame) if self.tracer.enabled else None
+        self.tracer.end_wait("results_queue", frame_id)
+        return frame, frame_id
 
-            display_frame = frame.copy()
-            # FPS calc
-            current_time = time.time()
-            fps = 1.0 / (current_time - prev_time) if current_time > prev_time else 0
-            prev_time = current_time
-            cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (50, 50, 255), 2)
-
-            unknown_present = False
-
-            if results.boxes is not None and results.boxes.id is not None:
-                boxes = results.boxes.xyxy.cpu().numpy().astype(int)
-                ids = results.boxes.id.int().cpu().tolist()
-                confs = results.boxes.conf.cpu().numpy()
-
-                for box, track_id, conf in zip(boxes, ids, confs):
-                    x1, y1, x2, y2 = box
-                    face_crop = frame[y1:y2, x1:x2]
-                    new_emb = self.get_face_embedding(face_crop)
-
-                    if track_id not in tracked_faces:
-                        # first time seeing this track
-                        name = self.recognize_face(face_crop)
-                        tracked_faces[track_id] = {
-                            'name': name,
-                            'embedding': new_emb,
-                            'last_checked': frame_idx
-                        }
-
-                    else:
-                        stored = tracked_faces[track_id]
-                        # if face appearance changed, re-id
-                        if not self.is_same_person(new_emb, stored['embedding']):
-                            logging.info(f"ID {track_id}: embedding mismatch → re-recognize")
-                            name = self.recognize_face(face_crop)
-                            tracked_faces[track_id] = {
-                                'name': name,
-                                'embedding': new_emb,
-                                'last_checked': frame_idx
-                            }
-                        # else if still unknown and enough frames passed, retry
-                        elif (stored['name'] == 'Unknown' and
-                            frame_idx - stored['last_checked'] >= self.max_frames_before_rechecking):
-                            name = self.recognize_face(face_crop)
-                            stored['name'] = name
-                            stored['embedding'] = new_emb
-                            stored['last_checked'] = frame_idx
-                        else:
-                            name = stored['name']
-
-                    if name == "Unknown":
-                        unknown_present = True
-
-                    try:
-                        self.detection_queue.put_nowait((name, time.time()))
-                    except queue.Full:
-                        pass
-
-                    # draw box & label
-                    label = f"ID:{track_id} {name} ({conf:.2f})"
-                    color = (0,255,0) if name!="Unknown" else (0,0,255)
-                    cv2.rectangle(display_frame, (x1,y1),(x2,y2), color, 2)
-                    cv2.putText(display_frame, label, (x1, y1-10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    def processing_worker(self):
+        logging.info("Processing thread started.")
 
-            # play alert if unknown present every N frames
-            if frame_idx % self.max_frames_before_rechecking == 0 and unknown_present:
-                alert_sound.play()
-                print("⚠️⚠️⚠️ALERT: Unknown person detected!")
+        while not self.stop_event.is_set():
+            try:
+                with self.metrics.timer("queue_wait", self.metric_labels):
+                    frame = self.next_frame(timeout=1)
+            except queue.Empty:
+                continue
 
-            frame_idx += 1
-            if not self.results_queue.full():
-                self.results_queue.put(display_frame)
+            frame_id = self.current_frame_id
+            with self.metrics.timer("detect", self.metric_labels), self.tracer.span("detect", frame_id):
+                boxes, ids, confs = self.detect_persons(frame)
+            # analyze includes the nested draw stage; analyze minus draw is recognition alone
+            with self.metrics.timer("analyze", self.metric_labels), self.tracer.span("analyze", frame_id):
+                display_frame = self.analyze_frame(frame, boxes, ids, confs)
+            self.publish(display_frame)
+            self.metrics.inc("frames_processed", labels=self.metric_labels)
 
+        self.emit_events(self.events.flush(self.clock(), force=True))
         logging.info("Processing thread stopped.")
 
 
@@ -254,9 +559,10 @@ class MultiPersonFaceRecognitionApp:
 
         while not self.stop_event.is_set():
             try:
-                display_frame = self.results_queue.get(timeout=0.1)
-                display_frame = cv2.resize(display_frame, (640, 640))
-                cv2.imshow("Multi-Person Face Recognition", display_frame)
+                display_frame, frame_id = self.next_result(timeout=0.1)
+                with self.tracer.span("display", frame_id):
+                    display_frame, _ = fit_within(display_frame, self.display_size)
+                    cv2.imshow("Multi-Person Face Recognition", display_frame)
             except queue.Empty:
                 continue
 
@@ -269,8 +575,11 @@ class MultiPersonFaceRecognitionApp:
         logging.info("Application exited cleanly.")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] %(message)s',
+                        filename='app.log', filemode='w')
     print("Welcome to Multi-Person Face Recognition App")
     cam_choice = input("Select camera source:\n1. Local webcam\n2. IP camera URL\nEnter 1 or 2: ").strip()
     stream_url = 0 if cam_choice != "2" else input("Enter the IP camera/video stream URL: ").strip()
-    app = MultiPersonFaceRecognitionApp(stream_url)
+    face_pass = "full_frame" if input("Use one face pass per frame? (y/N): ").strip().lower() == "y" else "per_box"
+    app = MultiPersonFaceRecognitionApp(stream_url, face_pass=face_pass)
     app.run()
\ No newline at end of file
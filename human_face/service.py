@@ -0,0 +1,188 @@
+import argparse
+import logging
+import signal
+import threading
+
+import yaml
+
+from human_face.roi import parse_polygons
+from human_face.sinks import EVENT_SINKS, FRAME_SINKS, build_sink, parse_sink_arg
+
+# Headless recognition service for rack servers: no window, no audio, no
+# prompts. Cameras, engine and sinks come from a YAML file and/or the
+# command line; events and (optionally) frames go to pluggable sinks.
+#
+#   python -m human_face.service --config service.yaml
+#   python -m human_face.service --source lobby=rtsp://cam1/stream --events csv --events webhook:http://host/hook
+#
+# service.yaml:
+#   sources:
+#     - {name: lobby, url: "rtsp://cam1/stream", motion_gate: true, roi: "0.1,0.3; 0.9,0.3; 0.9,1; 0.1,1"}
+#     - {name: door, url: 0}
+#   engine: threads            # or "processes": one capture + inference process per camera
+#   face_pass: full_frame
+#   recognition_budget: 4
+#   detector_backend: openvino
+#   draw: auto                 # annotate only when a frame sink is configured
+#   metrics_port: 9108         # Prometheus endpoint; leave out to disable
+#   event_sinks: [{type: csv, path: logs/detections.csv}, {type: log}]
+#   frame_sinks: [{type: jpeg, directory: snapshots, interval: 10}]
+
+DEFAULT_CONFIG = {
+    "sources": [],
+    "engine": "threads",
+    "face_pass": None,  # the app's default, as in the dashboard
+    "recognition_budget": 4,
+    "detector_backend": None,
+    "capture_backend": None,
+    "draw": "auto",
+    "metrics_port": None,
+    "event_sinks": [{"type": "log"}],
+    "frame_sinks": [],
+}
+
+
+def load_config(path=None, overrides=None):
+    """DEFAULT_CONFIG, updated from the YAML file at `path`, then from `overrides` (None values ignored)."""
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            config.update(yaml.safe_load(f) or {})
+    config.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return config
+
+
+def to_registry_source(source):
+    """Config source `{name, url, motion_gate, roi}` as a dashboard `video_source_registry` entry."""
+    url = source["url"]
+    if isinstance(url, str) and url.isdigit():
+        url = int(url)
+    roi = source.get("roi")
+    return {
+        "name": str(source["name"]),
+        "source_type": "Webcam" if isinstance(url, int) else "IP/Video URL",
+        "source_input": url,
+        "motion_gate": bool(source.get("motion_gate", False)),
+        "roi": (parse_polygons(roi) or None) if isinstance(roi, str) else roi,
+    }
+
+
+class RecognitionService:
+    """Runs the camera engine and hands its events and frames to the configured sinks."""
+
+    def __init__(self, config):
+        if not config["sources"]:
+            raise ValueError("no sources configured")
+        if config["engine"] not in ("threads", "processes"):
+            raise ValueError(f"engine must be 'threads' or 'processes', got {config['engine']!r}")
+        self.config = config
+        self.event_sinks = [build_sink(spec, EVENT_SINKS) for spec in config["event_sinks"]]
+        self.frame_sinks = [build_sink(spec, FRAME_SINKS) for spec in config["frame_sinks"]]
+        draw = config["draw"]
+        self.draw = bool(self.frame_sinks) if draw == "auto" else bool(draw)
+        self.stop_event = threading.Event()
+        self.engine = None
+
+    def _build_engine(self):
+        config = self.config
+        sources = [to_registry_source(s) for s in config["sources"]]
+        kwargs = dict(recognition_budget=config["recognition_budget"], detector_backend=config["detector_backend"],
+                      draw=self.draw, sound_alerts=False)
+        if config["face_pass"]:
+            kwargs["face_pass"] = config["face_pass"]
+        if config["engine"] == "processes":
+            from human_face.process_pipeline import ProcessCameraPool
+
+            return ProcessCameraPool(sources, capture_backend=config["capture_backend"], **kwargs)
+        from human_face.multi_camera import MultiCameraEngine
+
+        return MultiCameraEngine(sources, **kwargs)
+
+    def run(self):
+        if self.config["metrics_port"]:
+            from human_face.metrics import METRICS
+
+            METRICS.serve(port=int(self.config["metrics_port"]))
+        self.engine = self._build_engine()
+        self.engine.start()
+        logging.info(f"Service running: {len(self.config['sources'])} cameras, {self.config['engine']} engine, "
+                     f"drawing {'on' if self.draw else 'off'}, {len(self.event_sinks)} event sinks, "
+                     f"{len(self.frame_sinks)} frame sinks")
+        try:
+            while not self.stop_event.is_set():
+                frames = self.engine.latest_frames()
+                for sink in self.frame_sinks:
+                    for camera, frame in frames:
+                        self._guard(sink.write, camera, frame)
+                for camera, event in self.engine.drain_events():
+                    for sink in self.event_sinks:
+                        self._guard(sink.emit, camera, event)
+                self.stop_event.wait(0.02)
+        finally:
+            self.engine.stop()
+            # Events flushed on shutdown (final "leave"s)
+            for camera, event in self.engine.drain_events():
+                for sink in self.event_sinks:
+                    self._guard(sink.emit, camera, event)
+            for sink in self.event_sinks + self.frame_sinks:
+                self._guard(sink.close)
+            logging.info("Service stopped.")
+
+    @staticmethod
+    def _guard(fn, *args):
+        # One broken sink must not take the cameras down with it
+        try:
+            fn(*args)
+        except Exception as e:
+            logging.error(f"Sink {getattr(fn, '__self__', fn).__class__.__name__} failed: {e}")
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+
+def parse_source_arg(text):
+    name, sep, url = text.partition("=")
+    if not sep or not name or not url:
+        raise argparse.ArgumentTypeError(f"expected NAME=URL, got {text!r}")
+    return {"name": name, "url": url}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless SecureVision recognition service.")
+    parser.add_argument("--config", help="YAML service config")
+    parser.add_argument("--source", type=parse_source_arg, action="append", metavar="NAME=URL",
+                        help="camera to add (repeatable; a digit is a local device index)")
+    parser.add_argument("--engine", choices=["threads", "processes"])
+    parser.add_argument("--face-pass", choices=["per_box", "full_frame"])
+    parser.add_argument("--detector-backend")
+    parser.add_argument("--events", type=parse_sink_arg, action="append", metavar="SINK",
+                        help="event sink, e.g. log, csv[:path], jsonl[:path], webhook:URL, package.module:Class")
+    parser.add_argument("--frames", type=parse_sink_arg, action="append", metavar="SINK",
+                        help="frame sink, e.g. jpeg[:directory]; turns annotation on")
+    parser.add_argument("--metrics-port", type=int)
+    parser.add_argument("--log-file", help="log here instead of stderr")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s",
+                        filename=args.log_file, force=True)
+    config = load_config(args.config, {
+        "engine": args.engine,
+        "face_pass": args.face_pass,
+        "detector_backend": args.detector_backend,
+        "event_sinks": args.events,
+        "frame_sinks": args.frames,
+        "metrics_port": args.metrics_port,
+    })
+    if args.source:
+        config["sources"] = list(config["sources"]) + args.source
+    try:
+        service = RecognitionService(config)
+    except ValueError as e:
+        parser.error(str(e))
+    signal.signal(signal.SIGINT, service.stop)
+    signal.signal(signal.SIGTERM, service.stop)
+    service.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Per-slot header: sequence number, capture time (ns), height, width
+_SLOT_FIELDS = 4
+# Where POSIX shared memory lives on Linux; Docker caps it at 64 MB unless run with --shm-size
+SHM_DIR = "/dev/shm"
+
+
+def ring_bytes(slots, max_shape):
+    """Shared memory one `SharedFrameRing.create(slots, max_shape)` allocates."""
+    return (1 + slots * _SLOT_FIELDS) * 8 + slots * int(np.prod(max_shape))
+
+
+def shm_free_bytes():
+    """Free space in /dev/shm, or None where shared memory is not a filesystem (Windows, macOS)."""
+    try:
+        st = os.statvfs(SHM_DIR)
+    except (AttributeError, OSError):
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+class SharedFrameRing:
+    """Fixed-size ring of BGR frames in `multiprocessing.shared_memory`.
+
+    One writer process, any number of readers, no locks. Each slot carries a
+    sequence number that the writer sets to -1 while copying into it, so a
+    reader that copies a slot and sees the same sequence before and after
+    knows the copy is not torn (a seqlock). Frames up to `max_shape` are
+    stored with their own height/width, so sources need not share a size.
+    """
+
+    def __init__(self, shm, slots, max_shape, owner):
+        self.shm = shm
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.owner = owner
+        header_len = 1 + slots * _SLOT_FIELDS
+        self._header = np.ndarray((header_len,), dtype=np.int64, buffer=shm.buf)
+        self._slot_header = self._header[1:].reshape(slots, _SLOT_FIELDS)
+        frame_bytes = int(np.prod(self.max_shape))
+        self._data = np.ndarray((slots, frame_bytes), dtype=np.uint8, buffer=shm.buf, offset=header_len * 8)
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, slots=4, max_shape=(720, 1280, 3), name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=ring_bytes(slots, max_shape))
+        ring = cls(shm, slots, max_shape, owner=True)
+        ring._header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, max_shape):
+        return cls(shared_memory.SharedMemory(name=name), slots, max_shape, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def write_seq(self):
+        return int(self._header[0])
+
+    def write(self, frame, capture_ns=None):
+        """Copy `frame` into the next slot; returns its sequence number."""
+        h, w = frame.shape[:2]
+        if frame.size > self._data.shape[1] or frame.ndim != 3 or frame.shape[2] != self.max_shape[2]:
+            raise ValueError(f"Frame {frame.shape} does not fit ring slots of {self.max_shape}")
+        seq = self.write_seq + 1
+        slot = seq % self.slots
+        header = self._slot_header[slot]
+        header[0] = -1
+        self._data[slot, :frame.size] = np.ascontiguousarray(frame).reshape(-1)
+        header[1] = capture_ns if capture_ns is not None else time.time_ns()
+        header[2] = h
+        header[3] = w
+        header[0] = seq
+        self._header[0] = seq
+        return seq
+
+    def read_latest(self, after_seq=0):
+        """Return `(seq, capture_ns, frame)` for the newest frame newer than `after_seq`, else None."""
+        for _ in range(3):
+            seq = self.write_seq
+            if seq <= after_seq:
+                return None
+            slot = seq % self.slots
+            header = self._slot_header[slot]
+            if header[0] != seq:
+                continue
+            h, w, capture_ns = int(header[2]), int(header[3]), int(header[1])
+            frame = self._data[slot, :h * w * self.max_shape[2]].reshape(h, w, self.max_shape[2]).copy()
+            if header[0] == seq:
+                if after_seq and seq - after_seq > 1:
+                    self.dropped += seq - after_seq - 1
+                return seq, capture_ns, frame
+        return None
+
+    def close(self):
+        # Drop our numpy views first, or SharedMemory.close() refuses to release the buffer
+        self._header = self._slot_header = self._data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,153 @@
+import csv
+import importlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+import cv2
+
+# Where a headless pipeline sends what it finds. Event sinks get
+# `emit(camera, DetectionEvent)`, frame sinks get `write(camera, frame)`;
+# both get `close()` on shutdown. Built from config entries such as
+# {"type": "csv", "path": "logs/detections.csv"}; "type" is a name from
+# EVENT_SINKS / FRAME_SINKS or "package.module:Class" for your own.
+
+
+class LogEventSink:
+    def emit(self, camera, event):
+        logging.info(f"{camera}: {event.name} {event.kind} (track {event.track_id}, dwell {event.dwell:.0f}s)")
+
+    def close(self):
+        pass
+
+
+class CsvEventSink:
+    """Appends rows in the dashboard's logs/detections.csv layout."""
+
+    def __init__(self, path="logs/detections.csv"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", newline="")
+        self._writer = csv.writer(self._file)
+
+    def emit(self, camera, event):
+        self._writer.writerow([event.name, event.timestamp, camera, event.kind, round(event.dwell, 2)])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlEventSink:
+    def __init__(self, path="logs/events.jsonl"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a")
+
+    def emit(self, camera, event):
+        self._file.write(json.dumps({"camera": camera, **event._asdict()}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookEventSink:
+    """POSTs each event as JSON from a background thread, so a slow endpoint never stalls the pipeline.
+
+    Events beyond `max_pending` waiting to be sent are dropped and counted.
+    """
+
+    def __init__(self, url, timeout=2.0, max_pending=1000, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.dropped = 0
+        self.failed = 0
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._send_loop, name="webhook-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, camera, event):
+        try:
+            self._pending.put_nowait({"camera": camera, **event._asdict()})
+        except queue.Full:
+            self.dropped += 1
+
+    def _send_loop(self):
+        while True:
+            payload = self._pending.get()
+            if payload is None:
+                return
+            request = urllib.request.Request(self.url, data=json.dumps(payload).encode(), headers=self.headers,
+                                             method="POST")
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except OSError as e:
+                self.failed += 1
+                logging.warning(f"Webhook {self.url} failed: {e}")
+
+    def close(self):
+        self._pending.put(None)
+        self._thread.join(timeout=self.timeout + 1)
+
+
+class JpegFrameSink:
+    """Saves the newest frame of each camera as `<directory>/<camera>.jpg` at most every `interval` seconds.
+
+    With `keep` set, timestamped copies are written instead of overwriting one file.
+    """
+
+    def __init__(self, directory="snapshots", interval=5.0, quality=85, keep=False):
+        self.directory = directory
+        self.interval = interval
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        self.keep = keep
+        self._last = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, camera, frame):
+        now = time.monotonic()
+        if now - self._last.get(camera, -self.interval) < self.interval:
+            return
+        self._last[camera] = now
+        name = f"{camera}-{time.strftime('%Y%m%d-%H%M%S')}.jpg" if self.keep else f"{camera}.jpg"
+        cv2.imwrite(os.path.join(self.directory, name), frame, self.params)
+
+    def close(self):
+        pass
+
+
+EVENT_SINKS = {"log": LogEventSink, "csv": CsvEventSink, "jsonl": JsonlEventSink, "webhook": WebhookEventSink}
+FRAME_SINKS = {"jpeg": JpegFrameSink}
+
+
+def build_sink(spec, registry):
+    """Instantiate a sink from `{"type": ..., **kwargs}`; raises ValueError for unknown types."""
+    spec = dict(spec)
+    kind = spec.pop("type", None)
+    if kind in registry:
+        cls = registry[kind]
+    elif kind and ":" in kind:
+        module, _, name = kind.partition(":")
+        cls = getattr(importlib.import_module(module), name)
+    else:
+        raise ValueError(f"unknown sink type {kind!r}; use one of {sorted(registry)} or 'package.module:Class'")
+    return cls(**spec)
+
+
+def parse_sink_arg(text):
+    """CLI shorthand: "csv", "jsonl:logs/events.jsonl", "webhook:http://host/hook", "jpeg:snapshots".
+
+    Anything else is taken as a "package.module:Class" type with no arguments.
+    """
+    kind, _, target = text.partition(":")
+    if kind not in EVENT_SINKS and kind not in FRAME_SINKS:
+        return {"type": text}
+    if kind == "webhook":
+        return {"type": kind, "url": target}
+    if kind == "jpeg":
+        return {"type": kind, "directory": target} if target else {"type": kind}
+    return {"type": kind, "path": target} if target else {"type": kind}
@@ -0,0 +1,117 @@
+import csv
+import datetime
+import logging
+import os
+import threading
+import time
+
+from human_face.perf_utils import git_commit
+
+# Cold-start bookkeeping: warm the models in the background while the
+# operator is still on the login page, and log how long it took from launch
+# to the first annotated frame (logs/startup.csv) so it can be tracked
+# across releases. Set $SECUREVISION_PRELOAD=0 to load on first use instead.
+
+PRELOAD_ENV = "SECUREVISION_PRELOAD"
+STARTUP_LOG = "logs/startup.csv"
+STARTUP_FIELDS = ["launched_at", "commit", "preload", "detector_backend", "models_ready_s", "first_frame_s", "page"]
+
+
+def _process_start_time():
+    """Wall-clock launch time of this process; this module's import time without psutil."""
+    try:
+        import psutil
+
+        return psutil.Process().create_time()
+    except ImportError:
+        return time.time()
+
+
+LAUNCHED_AT = _process_start_time()
+_milestones = {}
+_lock = threading.Lock()
+_preload_thread = None
+
+
+def preload_enabled():
+    return os.environ.get(PRELOAD_ENV, "1") not in ("0", "false", "no")
+
+
+def mark(name):
+    """Record the first time `name` happens; returns seconds since launch (the first value on repeats)."""
+    with _lock:
+        if name not in _milestones:
+            _milestones[name] = time.time()
+        return _milestones[name] - LAUNCHED_AT
+
+
+def elapsed(name):
+    at = _milestones.get(name)
+    return None if at is None else at - LAUNCHED_AT
+
+
+def _preload(detector_backend, face_model):
+    try:
+        mark("preload_started")
+        from human_face.model_registry import REGISTRY
+
+        # torch, ultralytics and insightface get imported here, off the UI thread, by the loads
+        REGISTRY.app_kwargs(detector_backend, face_model)
+        logging.info(f"Models preloaded {mark('models_ready'):.1f}s after launch")
+    except Exception as e:
+        logging.error(f"Model preload failed, models will load on first use: {e}")
+
+
+def start_preload(detector_backend=None, face_model=None):
+    """Import and warm the detector, face models and gallery on a daemon thread, once per process.
+
+    Pipelines asking the registry for a model that is still loading wait for
+    this load rather than starting a second one.
+    """
+    global _preload_thread
+    with _lock:
+        if _preload_thread is not None or not preload_enabled():
+            return _preload_thread
+        _preload_thread = threading.Thread(target=_preload, args=(detector_backend, face_model),
+                                           name="model-preload", daemon=True)
+        _preload_thread.start()
+        return _preload_thread
+
+
+def preload_status():
+    """"off", "loading", "ready" or "failed" for the background preload."""
+    if _preload_thread is None:
+        return "off"
+    if _preload_thread.is_alive():
+        return "loading"
+    return "ready" if "models_ready" in _milestones else "failed"
+
+
+def first_frame(page, detector_backend=None, path=STARTUP_LOG):
+    """Call when an annotated frame is shown; the first call per process appends a row to `path`."""
+    with _lock:
+        if "first_frame" in _milestones:
+            return None
+        _milestones["first_frame"] = time.time()
+    models_ready = elapsed("models_ready")
+    row = {
+        "launched_at": datetime.datetime.fromtimestamp(LAUNCHED_AT).isoformat(timespec="seconds"),
+        "commit": git_commit() or "",
+        "preload": preload_status(),
+        "detector_backend": detector_backend or "",
+        "models_ready_s": round(models_ready, 2) if models_ready is not None else "",
+        "first_frame_s": round(elapsed("first_frame"), 2),
+        "page": page,
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=STARTUP_FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+    except OSError as e:
+        logging.error(f"Could not write {path}: {e}")
+    logging.info(f"First annotated frame {row['first_frame_s']}s after launch ({page}, preload {row['preload']})")
+    return row
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from itertools import count
+
+# Per-frame tracing for the recognition pipeline, exported as Chrome trace
+# JSON (chrome://tracing, https://ui.perfetto.dev). Every grabbed frame gets
+# an ID; spans on the grabber, processor and UI threads carry it, and the
+# time a frame sits in frame_queue / results_queue shows as an async slice.
+# Off until `TRACER.start()`; while off every call returns straight away.
+
+TRACE_DIR = "logs"
+
+
+class FrameTags:
+    """Frame ID for each in-flight frame on a plain queue.Queue.
+
+    Lets those queues keep carrying bare ndarrays (other producers and
+    consumers put and get frames directly) while traced frames keep their
+    ID across the hand-off. Tags are looked up by `id(frame)` but hold a weak
+    reference to the frame, so once a tagged frame is freed and its id is
+    reused the stale tag no longer matches. Only the newest `limit` tags are
+    kept, so frames that were dropped or taken by an untraced consumer age
+    out. LatestFrameBuffer carries IDs in its packets and needs none of this.
+    """
+
+    def __init__(self, limit=64):
+        self.limit = limit
+        self._tags = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tag(self, frame, frame_id):
+        with self._lock:
+            self._tags[id(frame)] = (weakref.ref(frame), frame_id)
+            self._tags.move_to_end(id(frame))
+            while len(self._tags) > self.limit:
+                self._tags.popitem(last=False)
+
+    def pop(self, frame):
+        with self._lock:
+            ref, frame_id = self._tags.pop(id(frame), (None, None))
+        return frame_id if ref is not None and ref() is frame else None
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "frame_id", "args", "start")
+
+    def __init__(self, tracer, name, frame_id, args):
+        self.tracer = tracer
+        self.name = name
+        self.frame_id = frame_id
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, time.perf_counter_ns(), self.frame_id, self.args)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Bounded recorder of per-frame spans.
+
+    Keeps at most `max_events` events (the newest win). `start(duration,
+    path)` records for `duration` seconds and then writes the trace to
+    `path`; `export(path)` writes whatever is buffered at any time.
+    """
+
+    def __init__(self, max_events=200_000):
+        self.enabled = False
+        self.max_events = max_events
+        self._events = deque(maxlen=max_events)
+        self._threads = {}
+        # Guards _events and _threads: export iterates them while worker threads record
+        self._lock = threading.Lock()
+        self._frame_ids = count(1)
+        self._epoch = time.perf_counter_ns()
+        self._timer = None
+        self.last_export = None
+
+    def new_frame_id(self):
+        return next(self._frame_ids)
+
+    def start(self, duration=None, path=None):
+        """Clear the buffer and start recording; after `duration` seconds stop and export to `path`."""
+        self.stop()
+        with self._lock:
+            self._events.clear()
+            self._threads.clear()
+        self._epoch = time.perf_counter_ns()
+        self.enabled = True
+        if duration:
+            path = path or os.path.join(TRACE_DIR, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+            self._timer = threading.Timer(duration, self._finish, args=(path,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        self.enabled = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _finish(self, path):
+        self.enabled = False
+        self._timer = None
+        try:
+            self.export(path)
+        except OSError as e:
+            logging.error(f"Could not write trace to {path}: {e}")
+
+    def _record(self, event):
+        tid = threading.get_ident()
+        event["pid"] = os.getpid()
+        event["tid"] = tid
+        with self._lock:
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            self._events.append(event)
+
+    def _us(self, ns):
+        return (ns - self._epoch) / 1000
+
+    def span(self, name, frame_id=None, **args):
+        """Context manager recording its block as a slice on the calling thread."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, frame_id, args)
+
+    def complete(self, name, start_ns, end_ns, frame_id=None, args=None):
+        if not self.enabled:
+            return
+        args = dict(args or ())
+        if frame_id is not None:
+            args["frame"] = frame_id
+        self._record({"name": name, "ph": "X", "ts": self._us(start_ns), "dur": (end_ns - start_ns) / 1000,
+                      "cat": "pipeline", "args": args})
+
+    def begin_wait(self, queue_name, frame_id):
+        """Mark `frame_id` entering `queue_name`; `end_wait` closes it on whichever thread takes it."""
+        if self.enabled and frame_id is not None:
+            self._record({"name": queue_name, "ph": "b", "id": frame_id, "cat": "queue",
+                          "ts": self._us(time.perf_counter_ns()), "args": {"frame": frame_id}})
+
+    def end_wait(self, queue_name, frame_id):
+        if self.enabled and frame_id is not None:
+            self._record({"name": queue_name, "ph": "e", "id": frame_id, "cat": "queue",
+                          "ts": self._us(time.perf_counter_ns())})
+
+    def events(self):
+        """Buffered events plus thread-name metadata, in Chrome trace event format."""
+        pid = os.getpid()
+        with self._lock:
+            threads = list(self._threads.items())
+            events = list(self._events)
+        meta = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in threads]
+        return meta + events
+
+    def export(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        events = self.events()
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        self.last_export = path
+        logging.info(f"Wrote {len(events)} trace events to {path}")
+        return path
+
+
+TRACER = Tracer()
@@ -0,0 +1,122 @@
+import logging
+from collections import OrderedDict
+
+import numpy as np
+import yaml
+
+
+class TrackState:
+    """Recognition state kept for one ByteTrack ID."""
+
+    __slots__ = ("name", "embedding", "last_checked", "last_seen", "score", "margin", "recheck_interval",
+                 "recognitions")
+
+    def __init__(self, name, embedding, last_checked, last_seen, score=0.0, margin=0.0, recheck_interval=0):
+        self.name = name
+        self.embedding = embedding
+        self.last_checked = last_checked
+        self.last_seen = last_seen
+        # best gallery similarity, its lead over the runner-up, and frames until the next recheck
+        self.score = score
+        self.margin = margin
+        self.recheck_interval = recheck_interval
+        # face inferences folded into this track so far
+        self.recognitions = 1
+
+
+class TrackStateStore:
+    """Bounded per-track recognition state with TTL and LRU eviction.
+
+    Entries are kept in last-seen order, so expiring tracks that ByteTrack has
+    dropped only walks the stale end of the dict. Embeddings are stored as
+    flat float32 vectors to keep each entry around 2 KB.
+    """
+
+    def __init__(self, max_tracks=512, ttl_frames=30):
+        self.max_tracks = max_tracks
+        self.ttl_frames = ttl_frames
+        self._states = OrderedDict()
+        self.created = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+        self.recognized = 0
+
+    @classmethod
+    def from_tracker_config(cls, tracker_cfg, max_tracks=512):
+        """Use ByteTrack's `track_buffer` as the TTL: once ByteTrack drops a track, so do we."""
+        try:
+            with open(tracker_cfg) as f:
+                ttl_frames = int(yaml.safe_load(f).get("track_buffer", 30))
+        except (OSError, ValueError, AttributeError, yaml.YAMLError) as e:
+            logging.warning(f"Could not read track_buffer from {tracker_cfg}: {e}")
+            ttl_frames = 30
+        return cls(max_tracks=max_tracks, ttl_frames=ttl_frames)
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, track_id):
+        return track_id in self._states
+
+    def get(self, track_id, frame_idx):
+        """Return the state for `track_id` (or None) and mark it as seen on `frame_idx`."""
+        state = self._states.get(track_id)
+        if state is not None:
+            state.last_seen = frame_idx
+            self._states.move_to_end(track_id)
+        return state
+
+    def update(self, track_id, name, embedding, frame_idx, score=0.0, margin=0.0, recheck_interval=0):
+        """Store a fresh recognition result for `track_id`, creating the entry if needed."""
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        state = self._states.get(track_id)
+        if state is None:
+            state = TrackState(name, embedding, frame_idx, frame_idx, score, margin, recheck_interval)
+            self._states[track_id] = state
+            self.created += 1
+            if name != "Unknown":
+                self.recognized += 1
+            while len(self._states) > self.max_tracks:
+                self._states.popitem(last=False)
+                self.evicted_lru += 1
+        else:
+            if state.name == "Unknown" and name != "Unknown":
+                self.recognized += 1
+            state.name = name
+            state.embedding = embedding
+            state.last_checked = frame_idx
+            state.last_seen = frame_idx
+            state.score = score
+            state.margin = margin
+            state.recheck_interval = recheck_interval
+            state.recognitions += 1
+            self._states.move_to_end(track_id)
+        return state
+
+    def prune(self, frame_idx):
+        """Drop tracks not seen for more than `ttl_frames`; returns how many were dropped."""
+        dropped = 0
+        while self._states:
+            track_id, state = next(iter(self._states.items()))
+            if frame_idx - state.last_seen <= self.ttl_frames:
+                break
+            del self._states[track_id]
+            dropped += 1
+        self.evicted_ttl += dropped
+        return dropped
+
+    def values(self):
+        return self._states.values()
+
+    def items(self):
+        return self._states.items()
+
+    def stats(self):
+        return {
+            "live": len(self._states),
+            "created": self.created,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_lru": self.evicted_lru,
+            "recognized": self.recognized,
+        }
@@ -0,0 +1,22 @@
+import numpy as np
+import yaml
+
+
+def make_tracker(tracker_cfg="bytrack/bytetrack.yaml", frame_rate=30):
+    """A standalone ByteTrack instance configured like `model.track(tracker=tracker_cfg)`."""
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils import IterableSimpleNamespace
+
+    with open(tracker_cfg) as f:
+        cfg = IterableSimpleNamespace(**yaml.safe_load(f))
+    return BYTETracker(args=cfg, frame_rate=frame_rate)
+
+
+def track_result(tracker, result):
+    """Feed one `predict()` result to `tracker`; returns `(boxes, ids, confs)` for the tracked persons."""
+    det = result.boxes.cpu().numpy()
+    tracks = tracker.update(det, result.orig_img)
+    if len(tracks) == 0:
+        return np.zeros((0, 4), dtype=int), [], np.zeros(0)
+    tracks = np.asarray(tracks)
+    return tracks[:, :4].astype(int), tracks[:, 4].astype(int).tolist(), tracks[:, 5]
@@ -1,9 +1,15 @@
+import logging
 import streamlit as st
+from human_face.startup import start_preload
 from ui.views.login import show_login
 from ui.views.dashboard.navigation import show_app
 
 st.set_page_config(page_title = "Secure Vision", layout = "wide")
 
+# Application log shown on the video and drone pages; a no-op on reruns once configured
+logging.basicConfig(level = logging.INFO, format = '[%(asctime)s] [%(levelname)s] %(message)s',
+                    filename = 'app.log', filemode = 'w')
+
 # Session State Setup
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False 
@@ -13,6 +19,9 @@ if 'username' not in st.session_state:
 if 'video_source_registry' not in st.session_state:
     st.session_state.video_source_registry = []
 
+# Load and warm the models while the operator is still logging in
+start_preload()
+
 def main():
     if not st.session_state.logged_in:
         show_login()
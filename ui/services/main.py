@@ -6,11 +6,14 @@ def login(username, password):
     users = {"admin": "1234", "user": "pass"}
     return users.get(username) == password
 
-def save_detection(person_name, timestamp, camera_name):
+def save_detection(person_name, timestamp, camera_name, event = "enter", dwell = 0.0):
     Path("logs").mkdir(exist_ok = True)
     with open("logs/detections.csv", "a", newline = "") as f:
         writer = csv.writer(f)
-        writer.writerow([person_name, timestamp, camera_name])
+        writer.writerow([person_name, timestamp, camera_name, event, round(dwell, 2)])
+
+def save_detection_event(event, camera_name):
+    save_detection(event.name, event.timestamp, camera_name, event.kind, event.dwell)
 
 def save_registration(name, num_poses):
     Path("logs").mkdir(exist_ok = True)
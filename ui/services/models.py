@@ -0,0 +1,15 @@
+import streamlit as st
+from human_face.model_registry import REGISTRY
+
+@st.cache_resource(show_spinner = "Loading detection and face models...")
+def shared_models(detector_backend = None, face_model = None):
+    """Process-wide detector, face models and gallery for these settings, loaded and warmed once.
+
+    Pass the result as keyword arguments to MultiPersonFaceRecognitionApp or
+    MultiCameraEngine; reruns and other pages get the same instances back.
+    """
+    return REGISTRY.app_kwargs(detector_backend, face_model)
+
+def model_memory_report():
+    """Rows for every model loaded in this process: load/warm-up time and the memory it added."""
+    return REGISTRY.stats()
@@ -6,6 +6,7 @@ import os
 import shutil
 import datetime
 from streamlit_autorefresh import st_autorefresh
+from human_face.gallery_store import sync_person
 
 def show_dashboard():
     st.title("Dashboard Home")
@@ -26,13 +27,15 @@ def show_dashboard():
     log_path = "logs/detections.csv"
 
     if os.path.exists(log_path):
-        df_log = pd.read_csv(log_path, names = ["Name", "Timestamp", "Camera"])
+        df_log = pd.read_csv(log_path, names = ["Name", "Timestamp", "Camera", "Event", "Dwell"])
+        # Rows written before event coalescing have no Event column; count each as an arrival
+        df_log["Event"] = df_log["Event"].fillna("enter")
         df_log["Timestamp"] = pd.to_datetime(df_log["Timestamp"], unit = "s")
         df_log["Date"] = df_log["Timestamp"].dt.date
         df_log["Hour"] = df_log["Timestamp"].dt.hour
 
         today = datetime.date.today()
-        df_today = df_log[df_log["Date"] == today]
+        df_today = df_log[(df_log["Date"] == today) & (df_log["Event"] == "enter")]
 
         # Metrics
         total_detections = len(df_today)
@@ -150,6 +153,7 @@ def show_dashboard():
         if st.button("Delete Selected Person", key = "del_btn"):
             try:
                 shutil.rmtree(os.path.join(base_dir, person_to_delete))
+                sync_person(person_to_delete, legacy_dir = base_dir)
                 st.success(f"Deleted '{person_to_delete}' and all its data.")
                 st.rerun()
             except Exception as e:
@@ -1,9 +1,6 @@
 import streamlit as st
-import pygame
-from djitellopy import Tello
 import threading
 import queue
-from drone.drone import Drone
 import cv2
 import numpy as np
 import os
@@ -12,7 +9,9 @@ import time
 import socket
 import subprocess
 from human_face.securevision import MultiPersonFaceRecognitionApp
-from ui.services.main import save_detection
+from human_face.startup import first_frame
+from ui.services.main import save_detection_event
+from ui.services.models import shared_models
 
 def cleanup_port_11111():
     """Ultra-aggressive cleanup of port 11111 and all djitellopy resources"""
@@ -94,6 +93,11 @@ def cleanup_port_11111():
 
 
 def show_drone():
+    # Controller and drone SDKs load when the page is opened, not when the dashboard starts
+    import pygame
+    from djitellopy import Tello
+    from drone.drone import Drone
+
     st.title("🛸 Drone Control Center")
     st.write("Control drones and view aerial footage.")
 
@@ -465,8 +469,9 @@ def show_drone():
                 def init_face_recognition(self):
                     """Initialize face recognition with drone stream"""
                     try:
-                        # Create face recognition app without video capture (we'll feed frames manually)
-                        self.face_recognition_app = MultiPersonFaceRecognitionApp(stream_url=None)
+                        # Create face recognition app without video capture (we'll feed frames manually),
+                        # borrowing the models the video page already loaded
+                        self.face_recognition_app = MultiPersonFaceRecognitionApp(stream_url=None, **shared_models())
                         # We don't want it to use its own video capture
                         if self.face_recognition_app.cap:
                             self.face_recognition_app.cap.release()
@@ -544,9 +549,8 @@ def show_drone():
                                     frame = frame_read.frame.copy()
                                     
                                     if frame is not None and frame.size > 0:
-                                        # Resize frame for face recognition (it expects 640x640)
-                                        frame_resized = cv2.resize(frame, (640, 640))
-                                        frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
+                                        # Native aspect ratio; YOLO letterboxes the frame itself
+                                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
                                         
                                         # Put frame directly into face recognition app's frame_queue
@@ -593,9 +597,9 @@ def show_drone():
                             
                             # Check for detections from face recognition detection_queue
                             try:
-                                person_name, timestamp = self.face_recognition_app.detection_queue.get_nowait()
+                                event = self.face_recognition_app.detection_queue.get_nowait()
                                 if not self.detection_queue.full():
-                                    self.detection_queue.put((person_name, timestamp))
+                                    self.detection_queue.put(event)
                             except queue.Empty:
                                 pass
                             
@@ -819,14 +823,21 @@ def show_drone():
                                 channels="RGB",
                                 width=640
                             )
+                            first_frame("drone")
                             
-                            # Check for face detections (same as video_feed.py)
+                            # Check for face detections (same as video_feed.py): log every event,
+                            # alert on arrivals, note departures, keep heartbeats quiet
                             try:
-                                person_name, ts = app.detection_queue.get_nowait()
-                                save_detection(person_name, ts, "Drone Camera")
-                                ts_str = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
-                                detection_placeholder.warning(
-                                    f"🚨 POI Detected: {person_name} at Drone Camera — {ts_str}")
+                                while not app.detection_queue.empty():
+                                    event = app.detection_queue.get_nowait()
+                                    save_detection_event(event, "Drone Camera")
+                                    ts_str = datetime.datetime.fromtimestamp(event.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+                                    if event.kind == "leave":
+                                        detection_placeholder.info(
+                                            f"👋 {event.name} left Drone Camera after {event.dwell:.0f}s — {ts_str}")
+                                    elif event.kind == "enter":
+                                        detection_placeholder.warning(
+                                            f"🚨 POI Detected: {event.name} at Drone Camera — {ts_str}")
                             except queue.Empty:
                                 pass
                             except Exception:
@@ -2,15 +2,24 @@ import os
 import cv2
 import json
 import numpy as np
+import logging
 import streamlit as st
-import pygame
 import time
 from facial_recognition.face_reco import FaceDataCollector
 from ui.services.main import save_registration
+from human_face.gallery_store import sync_person
 
-# === Sound ===
-pygame.mixer.init()
-camera_sound = pygame.mixer.Sound("sounds/picture click.mp3")
+# === Sound: pygame and its mixer load on the first capture only ===
+@st.cache_resource
+def load_camera_sound(path: str = "sounds/picture click.mp3"):
+    try:
+        import pygame
+
+        pygame.mixer.init()
+        return pygame.mixer.Sound(path)
+    except Exception as e:
+        logging.warning(f"Camera sound unavailable: {e}")
+        return None
 
 # === Cache the model so it only loads once ===
 @st.cache_resource
@@ -76,7 +85,9 @@ def show_face_registration():
         with col1:
             if st.button("📸 Capture Pose"):
                 st.session_state.capture_pose = True
-                camera_sound.play()
+                camera_sound = load_camera_sound()
+                if camera_sound is not None:
+                    camera_sound.play()
         with col2:
             if st.button("🛑 Stop Registration"):
                 st.session_state.stop = True
@@ -106,6 +117,7 @@ def show_face_registration():
             else:
                 info_placeholder.success("✅ Face registration completed.")
                 save_registration(person_name, st.session_state.index)
+                sync_person(person_name.replace(" ", "_"))
                 break
 
             # handle capture
@@ -1,8 +1,4 @@
 import streamlit as st
-from ui.views.dashboard.dashboard import show_dashboard
-from ui.views.dashboard.video_feed import show_video_feed
-from ui.views.dashboard.drone_dahsboard import show_drone
-from ui.views.dashboard.face_registration import show_face_registration
 
 def show_app():
     st.sidebar.markdown("## 🛡️ Secure Vision")
@@ -25,12 +21,17 @@ def show_app():
     if "page" not in st.session_state:
         st.session_state.page = "dashboard"
 
-    # Route to the selected page
+    # Route to the selected page; pages are imported on first visit so the
+    # dashboard never pays for the video, drone or registration dependencies
     if st.session_state.page == "dashboard":
+        from ui.views.dashboard.dashboard import show_dashboard
         show_dashboard()
     elif st.session_state.page == "video":
+        from ui.views.dashboard.video_feed import show_video_feed
         show_video_feed()
     elif st.session_state.page == "drone":
+        from ui.views.dashboard.drone_dahsboard import show_drone
         show_drone()
     elif st.session_state.page == "face":
+        from ui.views.dashboard.face_registration import show_face_registration
         show_face_registration()
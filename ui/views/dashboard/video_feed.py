@@ -2,9 +2,83 @@ import os
 import cv2
 import datetime
 import threading
+import time
 import streamlit as st
-from human_face.securevision import MultiPersonFaceRecognitionApp
-from ui.services.main import save_detection
+from human_face.securevision import DEFAULT_FACE_PASS, FACE_PASS_MODES, MultiPersonFaceRecognitionApp
+from human_face.detector_backends import DETECTOR_BACKENDS, resolve_backend
+from human_face.metrics import METRICS, METRICS_PORT
+from human_face.tracing import TRACE_DIR, TRACER
+from human_face.multi_camera import MultiCameraEngine
+from human_face.process_pipeline import ProcessCameraPool
+from human_face.roi import parse_polygons
+from human_face.startup import STARTUP_LOG, first_frame, preload_status
+from ui.services.main import save_detection_event
+from ui.services.models import model_memory_report, shared_models
+
+METRICS_REFRESH_SECONDS = 1.0
+
+def show_metrics_panel(placeholder, apps = ()):
+    """Stage latency percentiles, counters and per-track recognition counts from human_face.metrics."""
+    snapshot = METRICS.snapshot()
+    with placeholder.container():
+        st.markdown("#### 📈 Pipeline Metrics")
+        if snapshot["stages"]:
+            st.dataframe(snapshot["stages"], hide_index = True, use_container_width = True)
+        counters_col, gauges_col = st.columns(2)
+        if snapshot["counters"]:
+            counters_col.dataframe(snapshot["counters"], hide_index = True, use_container_width = True)
+        if snapshot["gauges"]:
+            gauges_col.dataframe(snapshot["gauges"], hide_index = True, use_container_width = True)
+        tracks = []
+        for app in apps:
+            try:
+                states = list(app.track_store.items())
+            except RuntimeError:
+                # The processing thread changed the store mid-copy; the next refresh catches up
+                continue
+            camera = dict(app.metric_labels).get("camera", "")
+            tracks += [{"camera": camera, "track": track_id, "name": state.name,
+                        "recognitions": state.recognitions, "score": round(state.score, 3)}
+                       for track_id, state in states]
+        if tracks:
+            st.dataframe(tracks, hide_index = True, use_container_width = True)
+
+def show_multi_camera_feed(sources, detection_placeholder, columns = 2, process_per_camera = False,
+                           detector_backend = None, metrics_placeholder = None, face_pass = DEFAULT_FACE_PASS):
+    if process_per_camera:
+        engine = ProcessCameraPool(sources, face_pass = face_pass, detector_backend = detector_backend)
+    else:
+        engine = MultiCameraEngine(sources, face_pass = face_pass, **shared_models(detector_backend))
+    grid = st.columns(min(columns, len(sources)))
+    placeholders = {source["name"]: grid[i % len(grid)].empty() for i, source in enumerate(sources)}
+    engine.start()
+    if process_per_camera:
+        st.info(f"Streaming {len(sources)} cameras, one worker process each...")
+    else:
+        st.info(f"Streaming {len(sources)} cameras through one batched engine...")
+    # Per-process registry: worker processes keep their own, so the panel only covers the threaded engine
+    apps = [] if process_per_camera else [stream.app for stream in engine.streams]
+    next_metrics = 0.0
+    try:
+        while True:
+            for name, frame in engine.latest_frames():
+                with METRICS.timer("display", (("camera", name),)), TRACER.span("display", camera = name):
+                    placeholders[name].image(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), channels = "RGB", caption = name)
+                first_frame("multi_camera", detector_backend)
+            if metrics_placeholder is not None and METRICS.enabled and time.monotonic() >= next_metrics:
+                next_metrics = time.monotonic() + METRICS_REFRESH_SECONDS
+                show_metrics_panel(metrics_placeholder, apps)
+            for name, event in engine.drain_events():
+                save_detection_event(event, name)
+                if event.kind == "enter":
+                    ts_str = datetime.datetime.fromtimestamp(event.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+                    detection_placeholder.warning(f"🚨 POI Detected: {event.name} at {name} — {ts_str}")
+            time.sleep(0.01)
+    except Exception as e:
+        st.error(f"Stream error: {e}")
+    finally:
+        engine.stop()
+        st.success("Video feeds stopped.")
 
 def show_video_feed():
     # Session Stores
@@ -25,15 +99,34 @@ def show_video_feed():
         video_source_input = 0  # Default webcam index
     else:
         video_source_input = st.text_input("Enter IP/Video URL:", value="http:172.19.120.105:8080/video")
+    motion_gate = st.checkbox(
+        "Skip detection on static scenes",
+        help = "Run YOLO only when the picture changes; suits cameras that watch an empty area most of the time."
+    )
+    roi_text = st.text_input(
+        "Region of Interest (optional):",
+        placeholder = "0.1,0.3; 0.9,0.3; 0.9,1; 0.1,1",
+        help = "Polygon corners as x,y fractions of the frame, separated by ';'. Separate several polygons with '|'. "
+               "Only people inside the region are detected and recognised; leave empty for the whole frame."
+    )
 
     if st.button("Add Source"):
-        if video_source_name:
+        roi, roi_error = None, None
+        try:
+            roi = parse_polygons(roi_text) or None
+        except ValueError as e:
+            roi_error = str(e)
+        if roi_error:
+            st.error(f"Invalid region of interest: {roi_error}")
+        elif video_source_name:
             if (video_source_name not in
                     [video_source["name"] for video_source in st.session_state.video_source_registry]):
                 st.session_state.video_source_registry.append({
                     "name": video_source_name,
                     "source_type": video_source_type,
-                    "source_input": video_source_input
+                    "source_input": video_source_input,
+                    "motion_gate": motion_gate,
+                    "roi": roi
                 })
                 st.success(f"'{video_source_name}' added successfully.")
             else:
@@ -80,6 +173,18 @@ def show_video_feed():
         ["Area 1", "Area 2", "Area 3", "Area 4", "Area 5"],
         default = ["Area 4"]
     )
+    face_pass = st.selectbox(
+        "Face Recognition Pass:",
+        list(FACE_PASS_MODES),
+        index = FACE_PASS_MODES.index(DEFAULT_FACE_PASS),
+        help = "Used by single and multi-camera feeds. per_box runs InsightFace on every person crop; full_frame runs it once per frame."
+    )
+    detector_backend = st.selectbox(
+        "Person Detector Backend:",
+        list(DETECTOR_BACKENDS),
+        index = DETECTOR_BACKENDS.index(resolve_backend()),
+        help = "ONNX Runtime and OpenVINO run the exported YOLO weights; both beat PyTorch on CPU."
+    )
 
     # Live Feed & Log Split View
     st.markdown("---")
@@ -89,8 +194,43 @@ def show_video_feed():
             run_stream = False
     else:
         run_stream = False
+    run_all = st.button("🟢 Start All Cameras", help = "One shared YOLO/InsightFace engine across every registered source")
+    process_per_camera = st.checkbox(
+        "One process per camera",
+        help = "Run each camera's capture and inference in its own worker process; frames move through shared memory."
+    )
+    collect_metrics = st.checkbox(
+        "Collect pipeline metrics",
+        value = METRICS.enabled,
+        help = f"Time every pipeline stage and show the results below; also served for Prometheus at "
+               f"http://127.0.0.1:{METRICS_PORT}/metrics."
+    )
+    if collect_metrics:
+        try:
+            METRICS.serve()
+        except OSError as e:
+            METRICS.enabled = True
+            st.warning(f"Metrics endpoint unavailable ({e}); collecting for this page only.")
+    else:
+        METRICS.enabled = False
+    trace_seconds = st.number_input(
+        "Trace seconds (0 = off):", min_value = 0, max_value = 600, value = 0, step = 5,
+        help = "Record every frame's path through the grabber, processor and UI threads for this long after the "
+               "feed starts, then save a Chrome trace to open in ui.perfetto.dev or chrome://tracing."
+    )
     image_placeholder = st.empty()
     detection_placeholder = st.empty()
+    metrics_placeholder = st.empty()
+
+    if trace_seconds and (run_stream or run_all):
+        trace_path = os.path.join(TRACE_DIR, datetime.datetime.now().strftime("trace-%Y%m%d-%H%M%S.json"))
+        TRACER.start(trace_seconds, trace_path)
+        st.info(f"Tracing the first {trace_seconds}s of frames to {trace_path}")
+
+    if run_all and st.session_state.video_source_registry:
+        show_multi_camera_feed(st.session_state.video_source_registry, detection_placeholder,
+                               process_per_camera = process_per_camera, detector_backend = detector_backend,
+                               metrics_placeholder = metrics_placeholder, face_pass = face_pass)
 
     if run_stream:
         selected_source = next(
@@ -107,26 +247,39 @@ def show_video_feed():
                 stream_source = selected_source["source_input"]
 
             # Run the video processing app
-            app = MultiPersonFaceRecognitionApp(stream_url = stream_source)
+            app = MultiPersonFaceRecognitionApp(stream_url = stream_source, face_pass = face_pass,
+                                                motion_gate = selected_source.get("motion_gate", False),
+                                                roi = selected_source.get("roi"),
+                                                **shared_models(detector_backend))
             grabber_thread = threading.Thread(target = app.frame_grabber, daemon = True)
             processor_thread = threading.Thread(target = app.processing_worker, daemon = True)
+            app.metric_labels = (("camera", selected_source["name"]),)
             grabber_thread.start()
             processor_thread.start()
+            next_metrics = 0.0
             try:
                 while run_stream:
                     try:
-                        frame = app.results_queue.get(timeout = 0.1)
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        image_placeholder.image(frame_rgb, channels = "RGB", width = 640)
-
-                        try:
-                            person_name, ts = app.detection_queue.get_nowait()
-                            save_detection(person_name, ts, selected_source["name"])
-                            ts_str = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
-                            detection_placeholder.warning(
-                                f"🚨 POI Detected: {person_name} at {selected_source['name']} — {ts_str}")
-                        except Exception:
-                            pass
+                        if METRICS.enabled and time.monotonic() >= next_metrics:
+                            next_metrics = time.monotonic() + METRICS_REFRESH_SECONDS
+                            show_metrics_panel(metrics_placeholder, [app])
+                        frame, frame_id = app.next_result(timeout = 0.1)
+                        with METRICS.timer("display", app.metric_labels), TRACER.span("display", frame_id):
+                            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                            image_placeholder.image(frame_rgb, channels = "RGB", width = 640)
+                        first_frame("video_feed", detector_backend)
+
+                        # Events are already coalesced per identity, so drain them all
+                        while not app.detection_queue.empty():
+                            event = app.detection_queue.get_nowait()
+                            save_detection_event(event, selected_source["name"])
+                            ts_str = datetime.datetime.fromtimestamp(event.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+                            if event.kind == "leave":
+                                detection_placeholder.info(
+                                    f"👋 {event.name} left {selected_source['name']} after {event.dwell:.0f}s — {ts_str}")
+                            elif event.kind == "enter":
+                                detection_placeholder.warning(
+                                    f"🚨 POI Detected: {event.name} at {selected_source['name']} — {ts_str}")
                     except Exception:
                         continue
             except Exception as e:
@@ -140,6 +293,13 @@ def show_video_feed():
     else:
         st.info("Tick the checkbox above to start the live feed.")
 
+    models = model_memory_report()
+    if models:
+        with st.expander("🧠 Loaded Models"):
+            st.caption("Loaded once per server process and shared by every page and rerun. "
+                       f"Background preload: {preload_status()}; launch-to-first-frame times go to {STARTUP_LOG}.")
+            st.dataframe(models, hide_index = True, use_container_width = True)
+
     # Application logs
     st.markdown("---")
     if st.button("🔄 Refresh Logs"):